@@ -7,22 +7,25 @@ from functools import wraps
 from importlib import import_module
 
 from flask import (
-    current_app, g, request, url_for, json, make_response, redirect, Blueprint
+    current_app, g, request, url_for, make_response, redirect, Blueprint
 )
 from flask_fs import UnauthorizedFileType
 from flask_restplus import Api, Resource
 from flask_cors import CORS
 
 from udata import tracking, entrypoints
+from udata.conditional import conditional
 from udata.app import csrf
 from udata.i18n import get_locale
 from udata.auth import (
     current_user, login_user, Permission, RoleNeed, PermissionDenied
 )
+from udata.auth import credentials
 from udata.core.user.models import User
 from udata.utils import safe_unicode
 
-from . import fields, oauth2
+from . import encoding, fields, oauth2
+from .cache import cached
 from .signals import on_api_call
 
 
@@ -124,6 +127,20 @@ class UDataApi(Api):
 
         return wrapper
 
+    def conditional(self, func):
+        '''
+        Answer conditional GET with `304 Not Modified`
+        and expose the `ETag` header on a given method
+        '''
+        return self.response(304, 'Not modified')(conditional(func))
+
+    def cached(self, *scopes):
+        '''
+        Cache responses for anonymous users,
+        invalidated when any of the given scopes changes
+        '''
+        return cached(self, *scopes)
+
     def authentify(self, func):
         '''Authentify the user if credentials are given'''
         @wraps(func)
@@ -133,9 +150,9 @@ class UDataApi(Api):
 
             apikey = request.headers.get(HEADER_API_KEY)
             if apikey:
-                try:
-                    user = User.objects.get(apikey=apikey)
-                except User.DoesNotExist:
+                user = credentials.get(credentials.APIKEY, apikey,
+                                       lambda key: User.objects(apikey=key).first())
+                if user is None:
                     self.abort(401, 'Invalid API Key')
 
                 if not login_user(user, False):
@@ -200,9 +217,10 @@ api.model_reference = api.model('ModelReference', {
 
 
 @api.representation('application/json')
+@apiv2.representation('application/json')
 def output_json(data, code, headers=None):
-    '''Use Flask JSON to serialize'''
-    resp = make_response(json.dumps(data), code)
+    '''Use the configured JSON backend to serialize'''
+    resp = make_response(encoding.dumps(data), code)
     resp.headers.extend(headers or {})
     return resp
 
@@ -334,5 +352,6 @@ def init_app(app):
     app.register_blueprint(apiv1_blueprint)
     app.register_blueprint(apiv2_blueprint)
 
+    encoding.init_app(app)
     oauth2.init_app(app)
     cors.init_app(app)
@@ -0,0 +1,157 @@
+'''
+Anonymous API responses cache.
+
+Responses are cached by path, query string, language and `X-Fields`
+for `API_CACHE_DURATION` seconds.
+Each cached view depends on some scopes (ie. `datasets` or `dataset:<id>`)
+having a generation: renewing a scope generation on model signals
+invalidates all the responses depending on it.
+
+The `organizations` scope covers the organizations references embedded
+in datasets and reuses lists and is only renewed when these references change.
+'''
+import hashlib
+import json
+import logging
+import uuid
+
+from functools import wraps
+
+from flask import current_app, request
+from flask_restplus.utils import unpack
+
+from udata.app import cache
+from udata.auth import current_user
+from udata.core.dataset.signals import on_datasets_bulk_updated
+from udata.i18n import get_locale
+from udata.models import Dataset, Organization, Reuse
+
+log = logging.getLogger(__name__)
+
+GENERATION_KEY = 'api-cache-generation:{0}'
+RESPONSE_KEY = 'api-cache-response:{0}'
+
+#: Headers of the cached response kept in cache
+CACHED_HEADERS = 'Content-Type', 'ETag'
+
+#: Organization fields embedded as references in other objects responses
+ORGANIZATION_REFERENCE_FIELDS = 'name', 'acronym', 'slug', 'logo', 'badges'
+
+
+def generations(scopes):
+    '''Get the current generation of each given scope'''
+    keys = [GENERATION_KEY.format(scope) for scope in scopes]
+    return [value or 0 for value in cache.get_many(*keys)]
+
+
+def invalidate(*scopes):
+    '''Invalidate all cached responses depending on any of the given scopes'''
+    duration = current_app.config['API_CACHE_DURATION']
+    if not duration:
+        return
+    # Generations must outlive the responses cached before they were renewed:
+    # an expired generation would revive these stale responses
+    cache.set_many({
+        GENERATION_KEY.format(scope): uuid.uuid4().hex for scope in scopes
+    }, timeout=2 * duration)
+
+
+def cache_key(scopes):
+    key = json.dumps([
+        request.path,
+        sorted(request.args.items(multi=True)),
+        get_locale(),
+        request.headers.get('X-Fields'),
+        list(zip(scopes, generations(scopes))),
+    ])
+    return RESPONSE_KEY.format(hashlib.md5(key.encode('utf8')).hexdigest())
+
+
+def format_scopes(scopes, kwargs):
+    '''
+    Format the scopes with the view arguments.
+
+    Scopes referencing a missing object (ie. a dataset without organization) are ignored.
+    '''
+    formatted = []
+    for scope in scopes:
+        try:
+            formatted.append(scope.format(**kwargs))
+        except AttributeError:
+            continue
+    return formatted
+
+
+def is_cacheable():
+    return (
+        request.method == 'GET' and
+        current_user.is_anonymous and
+        current_app.config['API_CACHE_DURATION']
+    )
+
+
+def cached(api, *scopes):
+    '''
+    Cache the decorated view responses for anonymous users.
+
+    Scopes are formatted with the view arguments,
+    ie. `dataset:{dataset.id}` or `organization:{dataset.organization.id}`.
+    '''
+    def wrapper(func):
+        @wraps(func)
+        def decorated(*args, **kwargs):
+            if not is_cacheable():
+                return func(*args, **kwargs)
+            key = cache_key(format_scopes(scopes, kwargs))
+            cached_response = cache.get(key)
+            if cached_response is not None:
+                data, code, headers = cached_response
+                return current_app.response_class(data, code, headers)
+            data, code, headers = unpack(func(*args, **kwargs))
+            response = api.make_response(data, code, headers=headers)
+            if code == 200:
+                headers = [(k, v) for k, v in response.headers if k in CACHED_HEADERS]
+                cache.set(key, (response.get_data(), code, headers),
+                          timeout=current_app.config['API_CACHE_DURATION'])
+            return response
+        return decorated
+    return wrapper
+
+
+def invalidate_datasets(ids):
+    '''Invalidate the cached responses depending on some datasets'''
+    # Reuses responses embed their datasets
+    reuses = Reuse.objects(datasets__in=ids).scalar('id')
+    invalidate('datasets', *(
+        ['dataset:{0}'.format(id) for id in ids] +
+        ['reuse:{0}'.format(reuse_id) for reuse_id in reuses]
+    ))
+
+
+@Dataset.on_create.connect
+@Dataset.on_update.connect
+@Dataset.on_delete.connect
+def invalidate_dataset(dataset):
+    invalidate_datasets([dataset.id])
+
+
+@on_datasets_bulk_updated.connect
+def invalidate_bulk_updated_datasets(ids):
+    invalidate_datasets(ids)
+
+
+@Organization.on_create.connect
+@Organization.on_update.connect
+def invalidate_organization(org):
+    scopes = ['organization:{0}'.format(org.id)]
+    changed = {field.split('.')[0] for field in org._get_changed_fields()}
+    if changed.intersection(ORGANIZATION_REFERENCE_FIELDS):
+        scopes.append('organizations')
+    invalidate(*scopes)
+
+
+@Reuse.on_create.connect
+@Reuse.on_update.connect
+@Reuse.on_delete.connect
+def invalidate_reuse(reuse):
+    invalidate('reuses', 'reuse:{0}'.format(reuse.id))
@@ -0,0 +1,141 @@
+'''
+Pluggable JSON encoding backends for API responses.
+
+A native-speed JSON library is used when installed,
+Flask JSON with the `UDataJsonEncoder` is used otherwise.
+Unsupported types are always delegated to the application JSON encoder
+so ObjectId, datetimes, lazy strings and documents are serialized
+the same way whatever the backend.
+'''
+import logging
+
+from flask import current_app, json
+
+log = logging.getLogger(__name__)
+
+
+class JsonBackend(object):
+    '''Base class for JSON encoding backends'''
+    name = None
+
+    @classmethod
+    def is_available(cls):
+        return True
+
+    def dumps(self, data):
+        raise NotImplementedError()
+
+    def default(self):
+        '''The application encoder fallback for unsupported types'''
+        return current_app.json_encoder().default
+
+
+class FlaskBackend(JsonBackend):
+    '''Flask JSON serialization using the application encoder'''
+    name = 'flask'
+
+    def dumps(self, data):
+        return json.dumps(data)
+
+
+class OrjsonBackend(JsonBackend):
+    '''
+    Serialize using `orjson`.
+
+    Dates, datetimes and dataclasses are passed through to the application encoder
+    to keep the same representation as the Flask backend.
+    '''
+    name = 'orjson'
+
+    @classmethod
+    def is_available(cls):
+        try:
+            import orjson  # noqa
+        except ImportError:
+            return False
+        return True
+
+    def __init__(self):
+        import orjson
+        self.orjson = orjson
+        self.options = (
+            orjson.OPT_NON_STR_KEYS |
+            orjson.OPT_PASSTHROUGH_DATETIME |
+            orjson.OPT_PASSTHROUGH_DATACLASS
+        )
+
+    def dumps(self, data):
+        options = self.options
+        if current_app.config.get('JSON_SORT_KEYS'):
+            options |= self.orjson.OPT_SORT_KEYS
+        return self.orjson.dumps(data, default=self.default(), option=options)
+
+
+class UjsonBackend(JsonBackend):
+    '''
+    Serialize using `ujson`.
+
+    Only `ujson` versions supporting the `default` hook are usable.
+    '''
+    name = 'ujson'
+
+    @classmethod
+    def is_available(cls):
+        try:
+            import ujson
+        except ImportError:
+            return False
+        try:
+            ujson.dumps(object(), default=str)
+        except TypeError:  # Too old, no `default` support
+            return False
+        return True
+
+    def __init__(self):
+        import ujson
+        self.ujson = ujson
+
+    def dumps(self, data):
+        return self.ujson.dumps(data, default=self.default(),
+                                sort_keys=current_app.config.get('JSON_SORT_KEYS', False),
+                                escape_forward_slashes=False,
+                                ensure_ascii=False)
+
+
+BACKENDS = {b.name: b for b in (OrjsonBackend, UjsonBackend, FlaskBackend)}
+
+#: Order in which backends are tried when `API_JSON_BACKEND` is `auto`
+PREFERRED_BACKENDS = ('orjson', 'ujson', 'flask')
+
+
+def get_backend(name='auto'):
+    '''
+    Get a JSON backend instance given its name.
+
+    If `name` is `auto`, the first available backend is used.
+    '''
+    if name == 'auto':
+        for candidate in PREFERRED_BACKENDS:
+            if BACKENDS[candidate].is_available():
+                return BACKENDS[candidate]()
+    if name not in BACKENDS:
+        raise ValueError('Unknown JSON backend: {0}'.format(name))
+    backend = BACKENDS[name]
+    if not backend.is_available():
+        log.warning('JSON backend "%s" is not available, using "flask" instead', name)
+        backend = FlaskBackend
+    return backend()
+
+
+def dumps(data):
+    '''Serialize `data` with the current application JSON backend'''
+    backend = current_app.extensions.get('udata-json-backend')
+    if backend is None:
+        backend = init_app(current_app)
+    return backend.dumps(data)
+
+
+def init_app(app):
+    backend = get_backend(app.config['API_JSON_BACKEND'])
+    app.extensions['udata-json-backend'] = backend
+    return backend
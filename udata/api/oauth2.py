@@ -32,7 +32,7 @@ from werkzeug.exceptions import Unauthorized
 from werkzeug.security import gen_salt
 
 from udata.app import csrf
-from udata.auth import current_user, login_required, login_user
+from udata.auth import credentials, current_user, login_required, login_user
 from udata.i18n import I18nBlueprint, lazy_gettext as _
 from udata.models import db
 from udata.core.user.models import User
@@ -255,6 +255,7 @@ class RefreshTokenGrant(grants.RefreshTokenGrant):
     def revoke_old_credential(self, credential):
         credential.revoked = True
         credential.save()
+        credentials.invalidate(credentials.TOKEN, credential.access_token)
 
 
 class RevokeToken(RevocationEndpoint):
@@ -271,11 +272,17 @@ class RevokeToken(RevocationEndpoint):
     def revoke_token(self, token):
         token.revoked = True
         token.save()
+        credentials.invalidate(credentials.TOKEN, token.access_token)
 
 
 class BearerToken(BearerTokenValidator):
     def authenticate_token(self, token_string):
-        return OAuth2Token.objects(access_token=token_string).first()
+        result = credentials.get(credentials.TOKEN, token_string, load_token)
+        if result:
+            token, user = result
+            # Attach the already loaded user without marking the field as changed
+            token._data['user'] = user
+            return token
 
     def request_invalid(self, request):
         return False
@@ -332,7 +339,9 @@ def save_token(token, request):
     scope = token.pop('scope', '')
     if request.grant_type == 'refresh_token':
         credential = request.credential
+        previous = credential.access_token
         credential.update(scope=scope, **token)
+        credentials.invalidate(credentials.TOKEN, previous)
     else:
         client = request.client
         user = request.user or client.owner
@@ -344,6 +353,25 @@ def save_token(token, request):
         )
 
 
+def load_token(access_token):
+    '''
+    Fetch a token and its user by its access token.
+
+    The user is returned alongside as pickled documents only keep references ids.
+    '''
+    token = OAuth2Token.objects(access_token=access_token).first()
+    if token:
+        return token, token.user
+
+
+@User.on_update.connect
+def invalidate_user_tokens(user):
+    '''Deleted or deactivated users tokens can't be used anymore'''
+    if user.deleted or not user.active:
+        tokens = OAuth2Token.objects(user=user).scalar('access_token')
+        credentials.invalidate(credentials.TOKEN, *tokens)
+
+
 def check_credentials():
     try:
         with require_oauth.acquire() as token:
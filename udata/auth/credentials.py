@@ -0,0 +1,117 @@
+'''
+Authentication credentials cache.
+
+API keys and OAuth2 access tokens are resolved on each authenticated API call.
+Resolved documents are kept for `API_AUTH_CACHE_DURATION` seconds
+in the shared application cache (ie. Redis)
+and for a few seconds in a bounded process-local cache.
+
+Entries are keyed by a hash of the credential, never by the credential itself,
+and must be explicitly invalidated when a credential is changed or revoked.
+'''
+import hashlib
+import logging
+import pickle
+import threading
+import time
+
+from collections import OrderedDict
+
+from flask import current_app
+
+from udata.app import cache
+
+log = logging.getLogger(__name__)
+
+APIKEY = 'apikey'
+TOKEN = 'token'
+
+CACHE_KEY = 'auth-credential:{0}:{1}'
+
+LOCAL_CACHE_SIZE = 1000
+#: Process-local entries can't be invalidated from other processes,
+#: so they are kept for a short time only (in seconds)
+LOCAL_CACHE_DURATION = 10
+
+
+class LocalCache(object):
+    '''A bounded and thread-safe LRU cache with expiring entries'''
+    def __init__(self, size=LOCAL_CACHE_SIZE):
+        self.size = size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            expires, value = self._data[key]
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._data[key] = (time.monotonic() + timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_cache = LocalCache()
+
+
+def cache_key(kind, credential):
+    digest = hashlib.sha256(credential.encode('utf8')).hexdigest()
+    return CACHE_KEY.format(kind, digest)
+
+
+def get(kind, credential, loader):
+    '''
+    Get the document matching a given credential,
+    calling `loader(credential)` on cache miss.
+
+    Only successful lookups are cached.
+    Documents are stored pickled so each call gets its own instance.
+    '''
+    duration = current_app.config['API_AUTH_CACHE_DURATION']
+    if not duration or not credential:
+        return loader(credential)
+    key = cache_key(kind, credential)
+    local_duration = min(duration, LOCAL_CACHE_DURATION)
+    payload = local_cache.get(key)
+    if payload is None:
+        payload = cache.get(key)
+        if payload is not None:
+            local_cache.set(key, payload, local_duration)
+    if payload is not None:
+        try:
+            return pickle.loads(payload)
+        except Exception:
+            log.exception('Unable to load cached %s credential', kind)
+            invalidate(kind, credential)
+    obj = loader(credential)
+    if obj is not None:
+        payload = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+        cache.set(key, payload, timeout=duration)
+        local_cache.set(key, payload, local_duration)
+    return obj
+
+
+def invalidate(kind, *credentials):
+    '''Invalidate the cached documents for the given credentials'''
+    keys = [cache_key(kind, c) for c in credentials if c]
+    for key in keys:
+        local_cache.delete(key)
+    if keys:
+        cache.delete_many(*keys)
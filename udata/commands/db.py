@@ -2,9 +2,13 @@ import collections
 import logging
 import os
 
+from concurrent.futures import ThreadPoolExecutor
+
 import click
 import mongoengine
 
+from bson import DBRef
+
 from udata import migrations, models as core_models
 from udata.api import oauth2 as oauth2_models
 from udata.commands import cli, green, yellow, cyan, red, magenta, white, echo
@@ -15,6 +19,11 @@ from udata.models import db
 # Date format used to for display
 DATE_FORMAT = '%Y-%m-%d %H:%M'
 
+# Number of references identifiers checked at once
+INTEGRITY_BATCH_SIZE = 1000
+# Default number of references checked in parallel
+INTEGRITY_WORKERS = 4
+
 log = logging.getLogger(__name__)
 
 
@@ -136,7 +145,61 @@ def display_op(op):
     format_output(op['output'], success=op['success'], traceback=op.get('traceback'))
 
 
-def check_references(models_to_check):
+def iter_references(reference):
+    '''
+    Stream the `(document id, referenced collection, referenced id)` tuples of a given reference
+    using a single aggregation
+    '''
+    pipeline = [
+        {'$match': {reference['path']: {'$ne': None}}},
+        {'$project': {'ref': f'${reference["path"]}'}},
+        {'$unwind': '$ref'},
+    ]
+    cursor = reference['model']._get_collection().aggregate(pipeline, allowDiskUse=True)
+    for row in cursor:
+        ref = row['ref']
+        if isinstance(ref, DBRef):
+            yield row['_id'], ref.collection, ref.id
+        elif ref is not None and reference['collection']:
+            yield row['_id'], reference['collection'], ref
+
+
+def check_reference(reference):
+    '''
+    Check a given reference targets existence by batches of `INTEGRITY_BATCH_SIZE` identifiers.
+
+    Return the broken references count by document identifier and the error if any.
+    '''
+    broken = collections.Counter()
+    database = reference['model']._get_db()
+
+    def check(batch):
+        by_collection = collections.defaultdict(set)
+        for _, collection, id in batch:
+            by_collection[collection].add(id)
+        missing = set()
+        for collection, ids in by_collection.items():
+            found = database[collection].find({'_id': {'$in': list(ids)}}, {'_id': 1})
+            missing.update((collection, id) for id in ids - set(doc['_id'] for doc in found))
+        for doc_id, collection, id in batch:
+            if (collection, id) in missing:
+                broken[doc_id] += 1
+
+    try:
+        batch = []
+        for ref in iter_references(reference):
+            batch.append(ref)
+            if len(batch) >= INTEGRITY_BATCH_SIZE:
+                check(batch)
+                batch = []
+        if batch:
+            check(batch)
+    except Exception as e:
+        return broken, e
+    return broken, None
+
+
+def check_references(models_to_check, workers=None):
     errors = collections.defaultdict(int)
 
     _models = []
@@ -165,7 +228,9 @@ def check_references(models_to_check):
             'model': model,
             'repr': f'{model.__name__}.{r.name}',
             'name': r.name,
+            'path': r.db_field,
             'destination': r.document_type.__name__,
+            'collection': r.document_type._get_collection_name(),
             'type': 'direct',
         } for r in refs]
 
@@ -176,7 +241,9 @@ def check_references(models_to_check):
             'model': model,
             'repr': f'{model.__name__}.{r.name}',
             'name': r.name,
+            'path': f'{r.db_field}._ref',
             'destination': 'Generic',
+            'collection': None,
             'type': 'direct',
         } for r in refs]
 
@@ -189,7 +256,9 @@ def check_references(models_to_check):
             'model': model,
             'repr': f'{model.__name__}.{lr.name}',
             'name': lr.name,
+            'path': lr.db_field,
             'destination': lr.field.document_type.__name__,
+            'collection': lr.field.document_type._get_collection_name(),
             'type': 'list',
         } for lr in list_refs]
 
@@ -203,7 +272,9 @@ def check_references(models_to_check):
                 'model': model,
                 'repr': f'{model.__name__}.{embed.name}__{er.name}',
                 'name': f'{embed.name}__{er.name}',
+                'path': f'{embed.db_field}.{er.db_field}',
                 'destination': er.document_type.__name__,
+                'collection': er.document_type._get_collection_name(),
                 'type': 'embed_list',
             } for er in embed_refs]
 
@@ -217,7 +288,9 @@ def check_references(models_to_check):
                 'model': model,
                 'repr': f'{model.__name__}.{embed_field.name}__{er.name}',
                 'name': f'{embed_field.name}__{er.name}',
+                'path': f'{embed_field.db_field}.{er.db_field}',
                 'destination': er.document_type.__name__,
+                'collection': er.document_type._get_collection_name(),
                 'type': 'embed',
             } for er in embed_refs]
 
@@ -231,7 +304,9 @@ def check_references(models_to_check):
                 'model': model,
                 'repr': f'{model.__name__}.{embed_field.name}__{lr.name}',
                 'name': f'{embed_field.name}__{lr.name}',
+                'path': f'{embed_field.db_field}.{lr.db_field}',
                 'destination': lr.field.document_type.__name__,
+                'collection': lr.field.document_type._get_collection_name(),
                 'type': 'embed_list_ref',
             } for lr in elists_refs]
 
@@ -240,56 +315,25 @@ def check_references(models_to_check):
         print(f'- {reference["repr"]}({reference["destination"]}) — {reference["type"]}')
     print('')
 
-    for reference in references:
-        print(f'- {reference["repr"]}({reference["destination"]}) — {reference["type"]}...')
-        query = {f'{reference["name"]}__ne': None}
-        qs = reference['model'].objects(**query).no_cache().all()
-        try:
-            for obj in qs:
-                if reference['type'] == 'direct':
-                    try:
-                        _ = getattr(obj, reference['name'])
-                    except mongoengine.errors.DoesNotExist:
-                        errors[reference["repr"]] += 1
-                elif reference['type'] == 'list':
-                    for sub in getattr(obj, reference['name']):
-                        try:
-                            _ = sub.id
-                        except mongoengine.errors.DoesNotExist:
-                            errors[reference["repr"]] += 1
-                elif reference['type'] == 'embed_list':
-                    p1, p2 = reference['name'].split('__')
-                    for sub in getattr(obj, p1):
-                        try:
-                            getattr(sub, p2)
-                        except mongoengine.errors.DoesNotExist:
-                            errors[reference["repr"]] += 1
-                elif reference['type'] == 'embed':
-                    p1, p2 = reference['name'].split('__')
-                    sub = getattr(obj, p1)
-                    try:
-                        getattr(sub, p2)
-                    except mongoengine.errors.DoesNotExist:
-                        errors[reference["repr"]] += 1
-                elif reference['type'] == 'embed_list_ref':
-                    p1, p2 = reference['name'].split('__')
-                    sub = getattr(getattr(obj, p1), p2)
-                    for obj in sub:
-                        try:
-                            obj.id
-                        except mongoengine.errors.DoesNotExist:
-                            errors[reference["repr"]] += 1
-                else:
-                    print(f'Unknown ref type {reference["type"]}')
-            print('Errors:', errors[reference["repr"]])
-        except mongoengine.errors.FieldDoesNotExist as e:
-            print('[ERROR]', e)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(check_reference, references)
+        for reference, (broken, error) in zip(references, results):
+            print(f'- {reference["repr"]}({reference["destination"]}) — {reference["type"]}...')
+            if error:
+                print('[ERROR]', error)
+                continue
+            errors[reference['repr']] = sum(broken.values())
+            print('Errors:', errors[reference['repr']])
+            for id, count in broken.items():
+                print(f'  {id} ({count})')
 
     print(f'\n Total errors: {sum(errors.values())}')
 
 
 @grp.command()
 @click.option('--models', multiple=True, default=[], help='Model(s) to check')
-def check_integrity(models):
+@click.option('-w', '--workers', default=INTEGRITY_WORKERS,
+              help='Number of references checked in parallel')
+def check_integrity(models, workers):
     '''Check the integrity of the database from a business perspective'''
-    check_references(models)
+    check_references(models, workers)
@@ -0,0 +1,164 @@
+'''
+Conditional GET helpers.
+
+Models declaring an `__etag_related__` attribute can be answered
+with `304 Not Modified` before being marshalled.
+
+The ETag is a hash of the stored document and of every stored document
+embedded in its representation:
+
+- `__etag_related__` maps a stored path to the referenced model name
+- `__etag_referrers__` maps a model name to its field referencing the document
+- `__etag_properties__` lists the computed properties exposed in the representation
+
+Related documents are fetched as raw documents and their own relations are followed.
+'''
+import hashlib
+import json
+
+from functools import wraps
+
+from flask import current_app, has_request_context, make_response, request
+from flask_restplus.utils import unpack
+from mongoengine.base import get_document
+from werkzeug.http import quote_etag
+
+CONDITIONAL_METHODS = 'GET', 'HEAD'
+CONDITIONAL_HEADERS = 'If-None-Match',
+
+
+def supports(model):
+    '''Whether a model (or a document) can be used for conditional requests'''
+    return getattr(model, '__etag_related__', None) is not None
+
+
+def is_conditional_request():
+    '''Whether the current request is a conditional GET'''
+    return (
+        has_request_context() and
+        request.method in CONDITIONAL_METHODS and
+        any(header in request.headers for header in CONDITIONAL_HEADERS)
+    )
+
+
+def is_conditional_view():
+    '''Whether the view matching the current request handles conditional GET'''
+    view = current_app.view_functions.get(request.endpoint)
+    view_class = getattr(view, 'view_class', None)
+    if view_class is None:
+        return getattr(view, '__conditional__', False)
+    method = request.method.lower()
+    meth = getattr(view_class, method, None)
+    if meth is None and method == 'head':
+        meth = getattr(view_class, 'get', None)
+    return getattr(meth, '__conditional__', False)
+
+
+def _ids_at(son, path):
+    '''Extract the referenced identifiers at a given path of a raw document'''
+    values = [son]
+    for part in path.split('.'):
+        found = []
+        for value in values:
+            value = value.get(part) if isinstance(value, dict) else None
+            if isinstance(value, (list, tuple)):
+                found.extend(value)
+            elif value is not None:
+                found.append(value)
+        values = found
+    return [getattr(value, 'id', value) for value in values]
+
+
+def _fetch(model, query):
+    return list(model._get_collection().find(query).sort('_id'))
+
+
+def _values(model, sons, seen, objs=None):
+    '''
+    The values of some raw documents and of their related documents.
+
+    `seen` holds the already hashed documents identifiers
+    to avoid fetching a document twice and to break cycles.
+    '''
+    values = list(sons)
+    properties = getattr(model, '__etag_properties__', None) or []
+    if properties:
+        for obj in objs or [model._from_son(son) for son in sons]:
+            values.append([getattr(obj, name) for name in properties])
+    for path, name in sorted((getattr(model, '__etag_related__', None) or {}).items()):
+        related = get_document(name)
+        ids = [id for son in sons for id in _ids_at(son, path) if id not in seen]
+        if ids:
+            seen.update(ids)
+            values.extend(_values(related, _fetch(related, {'_id': {'$in': ids}}), seen))
+    for name, field in sorted((getattr(model, '__etag_referrers__', None) or {}).items()):
+        referrer = get_document(name)
+        ids = [son['_id'] for son in sons]
+        related = [son for son in _fetch(referrer, {field: {'$in': ids}})
+                   if son['_id'] not in seen]
+        seen.update(son['_id'] for son in related)
+        values.extend(_values(referrer, related, seen))
+    return values
+
+
+def etag_for(obj):
+    '''
+    Compute an object ETag from its stored content
+    and the stored content of its related documents.
+
+    The ETag also depends on the representation:
+    endpoint, language and requested fields.
+    '''
+    key = json.dumps([
+        request.endpoint,
+        request.args.get('lang'),
+        request.headers.get('X-Fields'),
+        _values(obj.__class__, [obj.to_mongo()], {obj.id}, [obj]),
+    ], default=str, sort_keys=True)
+    return hashlib.md5(key.encode('utf8')).hexdigest()
+
+
+def not_modified(obj, etag):
+    '''
+    Whether the current request conditions are fulfilled for a given object ETag.
+
+    Deleted objects are never considered as not modified
+    to let the view handle permissions.
+    '''
+    if getattr(obj, 'deleted', None):
+        return False
+    return bool(request.if_none_match) and request.if_none_match.contains_weak(etag)
+
+
+def headers_for(etag):
+    '''The validators headers for a given ETag'''
+    return {'ETag': quote_etag(etag, weak=True)}
+
+
+def not_modified_response(etag):
+    response = make_response('', 304)
+    response.headers.extend(headers_for(etag))
+    return response
+
+
+def conditional(func):
+    '''
+    Mark a view as handling conditional GET
+    and add the `ETag` header to successful responses.
+
+    The validator is computed from the first view argument
+    supporting conditional requests.
+    '''
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        result = func(*args, **kwargs)
+        obj = next((v for v in kwargs.values() if supports(v)), None)
+        if obj is None:
+            return result
+        data, code, headers = unpack(result)
+        if code != 200:
+            return result
+        headers = dict(headers or {}, **headers_for(etag_for(obj)))
+        return data, code, headers
+    wrapper.__conditional__ = True
+    return wrapper
@@ -1,6 +1,6 @@
 import logging
 
-from mongoengine.errors import DoesNotExist
+from bson import DBRef
 
 from udata.api import api, API, fields
 from udata.models import db, Activity
@@ -51,6 +51,41 @@ activity_parser.add_argument(
     help='Filter activities for that particular organization',
     location='args')
 
+REFERENCES = ('actor', 'organization', 'related_to')
+
+
+def resolve_references(activities):
+    '''
+    Dereference the activities references with a single query by target collection.
+
+    Missing actors and organizations are set to `None`.
+    Activities whose target is missing are filtered out (but the error is logged).
+    Can happen when someone manually delete an object in DB (ie. without proper purge)
+    '''
+    ids_by_model = {}
+    for activity in activities:
+        for name in REFERENCES:
+            value = activity._data.get(name)
+            if isinstance(value, DBRef):
+                model = activity._fields[name].document_type
+                ids_by_model.setdefault(model, set()).add(value.id)
+    documents = {
+        model: model.objects.in_bulk(list(ids))
+        for model, ids in ids_by_model.items()
+    }
+    resolved = []
+    for activity in activities:
+        for name in REFERENCES:
+            value = activity._data.get(name)
+            if isinstance(value, DBRef):
+                model = activity._fields[name].document_type
+                activity._data[name] = documents[model].get(value.id)
+        if activity._data.get('related_to') is None:
+            log.error('Missing target for activity %s', activity.id)
+        else:
+            resolved.append(activity)
+    return resolved
+
 
 @api.route('/activity', endpoint='activity')
 class SiteActivityAPI(API):
@@ -72,18 +107,8 @@ class SiteActivityAPI(API):
         qs = qs.order_by('-created_at')
         qs = qs.paginate(args['page'], args['page_size'])
 
-        # Filter out DBRefs
         # Always return a result even not complete
         # But log the error (ie. visible in sentry, silent for user)
-        # Can happen when someone manually delete an object in DB (ie. without proper purge)
-        safe_items = []
-        for item in qs.queryset.items:
-            try:
-                item.related_to
-            except DoesNotExist as e:
-                log.error(e, exc_info=True)
-            else:
-                safe_items.append(item)
-        qs.queryset.items = safe_items
+        qs.queryset.items = resolve_references(qs.queryset.items)
 
         return qs
@@ -9,7 +9,7 @@ from udata.auth import current_user
 from .signals import new_activity
 
 
-__all__ = ('Activity', )
+__all__ = ('Activity', 'QueuedActivity')
 
 
 _registered_activities = {}
@@ -70,3 +70,25 @@ class Activity(db.Document, metaclass=EmitNewActivityMetaClass):
                           related_to=related_to,
                           actor=current_user._get_current_object(),
                           organization=organization)
+
+
+class QueuedActivity(db.Document):
+    '''
+    An activity waiting to be written by the `emit-activities` job.
+
+    References are stored as raw identifiers.
+    Queued activities are claimed by a job run before being written
+    so concurrent runs never write them twice.
+    '''
+    classname = db.StringField(required=True)
+    actor = db.ObjectIdField(required=True)
+    organization = db.ObjectIdField()
+    related_to = db.ObjectIdField(required=True)
+    created_at = db.DateTimeField(default=datetime.now, required=True)
+
+    claim = db.StringField()
+    claimed_at = db.DateTimeField()
+
+    meta = {
+        'indexes': ['claim', 'claimed_at'],
+    }
@@ -1,27 +1,102 @@
 import logging
+import uuid
+
+from datetime import datetime, timedelta
+
+from flask import current_app
+from mongoengine.errors import ValidationError
 
 from udata.models import db, User, Organization
-from udata.tasks import task, celery
+from udata.tasks import job, task
 
+from .models import Activity, QueuedActivity
 from .signals import new_activity
 
 log = logging.getLogger(__name__)
 
 
+#: Claimed activities not written after this delay (in seconds) are claimed again
+CLAIM_TIMEOUT = 10 * 60
+
+
 @new_activity.connect
 def delay_activity(cls, related_to, actor, organization=None):
-    emit_activity.delay(
-        cls.__name__,
-        str(actor.id),
-        related_to_cls=related_to.__class__.__name__,
-        related_to_id=str(related_to.id),
-        organization_id=str(organization.id) if organization else None,
-    )
+    event = {
+        'classname': cls.__name__,
+        'actor': actor.id,
+        'related_to': related_to.id,
+        'organization': organization.id if organization else None,
+        'created_at': datetime.now(),
+    }
+    if current_app.config['ACTIVITY_FLUSH_INTERVAL']:
+        QueuedActivity._get_collection().insert_one(event)
+    else:
+        emit_activities.delay([event])
+
+
+def write_activities(events):
+    '''Write a batch of activities with a single query, from raw references'''
+    activities = []
+    for event in events:
+        cls = db.resolve_model(event['classname'])
+        activity = cls(actor=event['actor'], related_to=event['related_to'],
+                       organization=event['organization'], created_at=event['created_at'])
+        try:
+            activity.validate()
+        except ValidationError:
+            log.exception('Invalid activity %s', event)
+            continue
+        activities.append(activity.to_mongo())
+    if not activities:
+        return
+    log.debug('Emit %s new activities', len(activities))
+    Activity._get_collection().insert_many(activities)
+    for son in activities:
+        activity = Activity._from_son(son)
+        activity.__class__.on_new.send(activity.__class__, activity=activity)
+
+
+def claim_activities(size):
+    '''Claim a batch of queued activities and return the claim token (if any)'''
+    collection = QueuedActivity._get_collection()
+    expired = datetime.now() - timedelta(seconds=CLAIM_TIMEOUT)
+    claimable = {'$or': [{'claim': None}, {'claimed_at': {'$lt': expired}}]}
+    ids = [row['_id'] for row in collection.find(claimable, {'_id': 1}).sort('_id').limit(size)]
+    if not ids:
+        return None
+    token = uuid.uuid4().hex
+    collection.update_many(dict(claimable, _id={'$in': ids}),
+                           {'$set': {'claim': token, 'claimed_at': datetime.now()}})
+    return token
+
+
+@task
+def emit_activities(events):
+    '''Write a batch of activities from raw references'''
+    write_activities(events)
+
+
+@job('emit-activities')
+def emit_queued_activities(self):
+    '''Write the queued activities by batches of `ACTIVITY_BATCH_SIZE`'''
+    collection = QueuedActivity._get_collection()
+    size = current_app.config['ACTIVITY_BATCH_SIZE']
+    count = 0
+    token = claim_activities(size)
+    while token:
+        events = list(collection.find({'claim': token}).sort('_id'))
+        write_activities(events)
+        collection.delete_many({'claim': token})
+        count += len(events)
+        token = claim_activities(size)
+    if count:
+        self.log.info('Emitted %s queued activities', count)
 
 
 @task
 def emit_activity(classname, actor_id, related_to_cls, related_to_id,
                   organization_id=None):
+    '''Emit a single activity (kept for already queued tasks)'''
     log.debug('Emit new activity: %s %s %s %s %s',
               classname, actor_id, related_to_cls,
               related_to_id, organization_id)
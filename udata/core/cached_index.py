@@ -0,0 +1,72 @@
+'''
+Process-level in-memory indexes built from the database.
+
+Each process lazily builds its index on first use and rebuilds it:
+- when it is marked as dirty, ie. on a model signal in the current process
+- when the index version stored in cache changes, ie. after an `invalidate()` in any process
+
+The version is checked at most once every `check_interval` seconds.
+'''
+import threading
+import time
+import uuid
+
+from udata.app import cache
+
+
+class CachedIndex(object):
+    '''
+    Base class for in-process indexes.
+
+    Subclasses implement `build()` and define a `version_key`.
+    '''
+    #: The cache key storing the index version shared by all processes
+    version_key = None
+    #: Interval (in seconds) between two checks of the index version
+    check_interval = 60
+    #: Keep serving the current index while another thread rebuilds it.
+    #: Only safe if `build()` swaps the index data as a whole.
+    serve_stale = False
+
+    def __init__(self):
+        self.version = None
+        self.checked_at = 0
+        self.dirty = True
+        self.built = False
+        self._lock = threading.Lock()
+
+    def build(self):
+        '''Load the index data'''
+        raise NotImplementedError
+
+    def is_fresh(self, now):
+        return not self.dirty and now - self.checked_at < self.check_interval
+
+    def ensure_fresh(self):
+        '''Build the index if it is outdated'''
+        now = time.monotonic()
+        if self.is_fresh(now):
+            return
+        if not self._lock.acquire(blocking=not (self.serve_stale and self.built)):
+            return
+        try:
+            if self.is_fresh(now):
+                return
+            version = cache.get(self.version_key)
+            if self.dirty or version != self.version:
+                self.dirty = False
+                self.build()
+                self.built = True
+                self.version = version
+            self.checked_at = now
+        finally:
+            self._lock.release()
+
+    def mark_dirty(self, *args, **kwargs):
+        '''Trigger the index rebuild in the current process'''
+        self.dirty = True
+
+    def invalidate(self):
+        '''Trigger the index rebuild in all processes'''
+        self.mark_dirty()
+        cache.set(self.version_key, uuid.uuid4().hex, timeout=0)
@@ -166,6 +166,7 @@ class DatasetListAPI(API):
     '''Datasets collection endpoint'''
     @api.doc('list_datasets')
     @api.expect(dataset_parser.parser)
+    @api.cached('datasets', 'organizations')
     @api.marshal_with(dataset_page_fields)
     def get(self):
         '''List or search all datasets'''
@@ -192,6 +193,8 @@ class DatasetListAPI(API):
 @api.response(410, 'Dataset has been deleted')
 class DatasetAPI(API):
     @api.doc('get_dataset')
+    @api.cached('dataset:{dataset.id}', 'organization:{dataset.organization.id}')
+    @api.conditional
     @api.marshal_with(dataset_fields)
     def get(self, dataset):
         '''Get a dataset given its identifier'''
@@ -177,6 +177,7 @@ class DatasetSearchAPI(API):
 @apiv2.response(410, 'Dataset has been deleted')
 class DatasetAPI(API):
     @apiv2.doc('get_dataset')
+    @apiv2.conditional
     @apiv2.marshal_with(dataset_fields)
     def get(self, dataset):
         '''Get a dataset given its identifier'''
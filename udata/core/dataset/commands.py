@@ -7,6 +7,8 @@ from bson import ObjectId
 
 from udata.commands import cli, success, exit_with_error
 from udata.models import License, DEFAULT_LICENSE, Dataset
+
+from .models import license_matcher
 from .tasks import send_frequency_reminder
 from . import actions
 
@@ -61,6 +63,7 @@ def licenses(source=DEFAULT_LICENSE_FILE):
     except License.DoesNotExist:
         License.objects.create(**DEFAULT_LICENSE)
         log.info('Added license "%s"', DEFAULT_LICENSE['title'])
+    license_matcher.invalidate()
     success('Done')
 
 
@@ -7,7 +7,7 @@ from urllib.parse import urlparse
 from blinker import signal
 from dateutil.parser import parse as parse_dt
 from flask import current_app
-from mongoengine.signals import pre_save, post_save
+from mongoengine.signals import pre_save, post_save, post_delete
 from mongoengine.fields import DateTimeField
 from stringdist import rdlevenshtein
 from werkzeug import cached_property
@@ -15,6 +15,7 @@ import requests
 
 from udata.app import cache
 from udata.core import storages
+from udata.core.cached_index import CachedIndex
 from udata.frontend.markdown import mdstrip
 from udata.models import db, WithMetrics, BadgeMixin, SpatialCoverage
 from udata.i18n import lazy_gettext as _
@@ -76,6 +77,21 @@ LEGACY_FREQUENCIES = {
 
 DEFAULT_FREQUENCY = 'unknown'
 
+#: Expected delay between two updates, for the frequencies having one
+UPDATE_FREQUENCY_DELTAS = {
+    'daily': timedelta(days=1),
+    'weekly': timedelta(weeks=1),
+    'fortnighly': timedelta(weeks=2),
+    'monthly': timedelta(weeks=4),
+    'bimonthly': timedelta(weeks=4 * 2),
+    'quarterly': timedelta(weeks=52 / 4),
+    'biannual': timedelta(weeks=52 / 2),
+    'annual': timedelta(weeks=52),
+    'biennial': timedelta(weeks=52 * 2),
+    'triennial': timedelta(weeks=52 * 3),
+    'quinquennial': timedelta(weeks=52 * 5),
+}
+
 DEFAULT_LICENSE = {
     'id': 'notspecified',
     'title': "License Not Specified",
@@ -111,6 +127,9 @@ CLOSED_FORMATS = ('pdf', 'doc', 'word', 'xls', 'excel')
 # (ie. number of allowed character changes)
 MAX_DISTANCE = 2
 
+#: Maximum number of memoized license guesses
+LICENSE_MATCHER_MEMO_SIZE = 10000
+
 SCHEMA_CACHE_DURATION = 60 * 5  # In seconds
 
 TITLE_SIZE_LIMIT = 350
@@ -168,70 +187,136 @@ class License(db.Document):
         Try to exact match on identifier then slugified title
         and fallback on edit distance ranking (after slugification)
         '''
+        return license_matcher.guess(text)
+
+    @classmethod
+    def default(cls):
+        return cls.objects(id=DEFAULT_LICENSE['id']).first()
+
+
+class LicenseMatcher(CachedIndex):
+    '''
+    A process-level license matcher used by `License.guess_one`.
+
+    Licenses are loaded once into exact match dictionaries and fuzzy matching lists
+    and guesses are memoized by input string.
+    It is rebuilt when a license is saved or deleted in the current process
+    or when the version stored in cache changes, ie. after `udata licenses`.
+
+    Loaded licenses are shared by all threads: guesses return copies.
+    '''
+    version_key = 'license-matcher-version'
+
+    def __init__(self):
+        super(LicenseMatcher, self).__init__()
+        self.licenses = []
+        self.memo = {}
+
+    def build(self):
+        licenses = list(License.objects)
+        exact = {'id': {}, 'slug': {}, 'url': {}, 'alternate_url': {}}
+        for position, license in enumerate(licenses):
+            values = [
+                ('id', license.id.lower()),
+                ('slug', license.slug),
+                ('url', (license.url or '').lower()),
+            ] + [('alternate_url', url.lower()) for url in license.alternate_urls]
+            for kind, value in values:
+                if value:
+                    exact[kind].setdefault(value, position)
+        self.licenses = licenses
+        self.exact = exact
+        self.slugs = [license.slug for license in licenses]
+        self.titles = [license.title.lower() for license in licenses]
+        self.alternate_slugs = [
+            (position, License.slug.slugify(title))
+            for position, license in enumerate(licenses)
+            for title in license.alternate_titles
+        ]
+        self.memo = {}
+
+    def guess(self, text):
         if not text:
             return
-        qs = cls.objects
+        self.ensure_fresh()
+        memo = self.memo
+        if text not in memo:
+            if len(memo) >= LICENSE_MATCHER_MEMO_SIZE:
+                memo.clear()
+            memo[text] = self.match(text)
+        position = memo[text]
+        if position is None:
+            return
+        return License._from_son(self.licenses[position].to_mongo())
+
+    def match(self, text):
+        '''Get the position of the license matching a given text if any'''
         text = text.strip().lower()  # Stored identifiers are lower case
-        slug = cls.slug.slugify(text)  # Use slug as it normalize string
-        license = qs(
-            db.Q(id__iexact=text) | db.Q(slug=slug) | db.Q(url__iexact=text)
-            | db.Q(alternate_urls__iexact=text)
-        ).first()
-
-        if license is None:
-            # If we're dealing with an URL, let's try some specific stuff
-            # like getting rid of trailing slash and scheme mismatch
-            try:
-                url = validate_url(text)
-            except ValidationError:
-                pass
-            else:
-                parsed = urlparse(url)
-                path = parsed.path.rstrip('/')
-                query = f'{parsed.netloc}{path}'
-                license = qs(db.Q(url__icontains=query) | db.Q(alternate_urls__contains=query)).first()
-
-        if license is None:
-            # Try to single match `slug` with a low Damerau-Levenshtein distance
-            computed = ((l, rdlevenshtein(l.slug, slug)) for l in cls.objects)
-            candidates = [l for l, d in computed if d <= MAX_DISTANCE]
-            # If there is more that one match, we cannot determinate
-            # which one is closer to safely choose between candidates
-            if len(candidates) == 1:
-                license = candidates[0]
-
-        if license is None:
-            # Try to match `title` with a low Damerau-Levenshtein distance
-            computed = ((l, rdlevenshtein(l.title.lower(), text)) for l in cls.objects)
-            candidates = [l for l, d in computed if d <= MAX_DISTANCE]
-            # If there is more that one match, we cannot determinate
-            # which one is closer to safely choose between candidates
-            if len(candidates) == 1:
-                license = candidates[0]
-
-        if license is None:
-            # Try to single match `alternate_titles` with a low Damerau-Levenshtein distance
-            computed = (
-                (l, rdlevenshtein(cls.slug.slugify(t), slug))
-                for l in cls.objects
-                for t in l.alternate_titles
+        slug = License.slug.slugify(text)  # Use slug as it normalize string
+
+        positions = [
+            self.exact[kind].get(value)
+            for kind, value in (
+                ('id', text), ('slug', slug), ('url', text), ('alternate_url', text)
             )
-            candidates = [l for l, d in computed if d <= MAX_DISTANCE]
-            # If there is more that one license matching, we cannot determinate
-            # which one is closer to safely choose between candidates
-            if len(set(candidates)) == 1:
-                license = candidates[0]
-        return license
+        ]
+        positions = [p for p in positions if p is not None]
+        if positions:
+            return min(positions)
+
+        # If we're dealing with an URL, let's try some specific stuff
+        # like getting rid of trailing slash and scheme mismatch
+        try:
+            url = validate_url(text)
+        except ValidationError:
+            pass
+        else:
+            parsed = urlparse(url)
+            path = parsed.path.rstrip('/')
+            query = f'{parsed.netloc}{path}'
+            for position, license in enumerate(self.licenses):
+                if (query in (license.url or '').lower()
+                        or any(query in u for u in license.alternate_urls)):
+                    return position
+
+        # Try to single match `slug` then `title` with a low Damerau-Levenshtein distance.
+        # If there is more that one match, we cannot determinate
+        # which one is closer to safely choose between candidates
+        for values, value in ((self.slugs, slug), (self.titles, text)):
+            candidates = [
+                position for position, v in enumerate(values)
+                if rdlevenshtein(v, value) <= MAX_DISTANCE
+            ]
+            if len(candidates) == 1:
+                return candidates[0]
+
+        # Try to single match `alternate_titles` with a low Damerau-Levenshtein distance
+        candidates = set(
+            position for position, s in self.alternate_slugs
+            if rdlevenshtein(s, slug) <= MAX_DISTANCE
+        )
+        if len(candidates) == 1:
+            return candidates.pop()
 
-    @classmethod
-    def default(cls):
-        return cls.objects(id=DEFAULT_LICENSE['id']).first()
+
+license_matcher = LicenseMatcher()
+
+post_save.connect(license_matcher.mark_dirty, sender=License)
+post_delete.connect(license_matcher.mark_dirty, sender=License)
+
+
+#: Raw query matching visible datasets, usable in aggregation pipelines
+VISIBLE_DATASETS_QUERY = {
+    'private': {'$ne': True},
+    'resources.0': {'$exists': True},
+    'deleted': None,
+    'archived': None,
+}
 
 
 class DatasetQuerySet(db.OwnedQuerySet):
     def visible(self):
-        return self(private__ne=True, resources__0__exists=True,
-                    deleted=None, archived=None)
+        return self(__raw__=VISIBLE_DATASETS_QUERY)
 
     def hidden(self):
         return self(db.Q(private=True) |
@@ -455,6 +540,16 @@ class Dataset(WithMetrics, BadgeMixin, db.Owned, db.Document):
         'views',
     ]
 
+    # Documents embedded in the API representation, used to compute ETag
+    __etag_related__ = {
+        'owner': 'User',
+        'organization': 'Organization',
+    }
+    __etag_referrers__ = {
+        'CommunityResource': 'dataset',
+    }
+    __etag_properties__ = ['quality']
+
     meta = {
         'indexes': [
             '$title',
@@ -569,29 +664,7 @@ class Dataset(WithMetrics, BadgeMixin, db.Owned, db.Document):
         given the frequency and last_update.
         Return None if the frequency is not handled.
         """
-        delta = None
-        if self.frequency == 'daily':
-            delta = timedelta(days=1)
-        elif self.frequency == 'weekly':
-            delta = timedelta(weeks=1)
-        elif self.frequency == 'fortnighly':
-            delta = timedelta(weeks=2)
-        elif self.frequency == 'monthly':
-            delta = timedelta(weeks=4)
-        elif self.frequency == 'bimonthly':
-            delta = timedelta(weeks=4 * 2)
-        elif self.frequency == 'quarterly':
-            delta = timedelta(weeks=52 / 4)
-        elif self.frequency == 'biannual':
-            delta = timedelta(weeks=52 / 2)
-        elif self.frequency == 'annual':
-            delta = timedelta(weeks=52)
-        elif self.frequency == 'biennial':
-            delta = timedelta(weeks=52 * 2)
-        elif self.frequency == 'triennial':
-            delta = timedelta(weeks=52 * 3)
-        elif self.frequency == 'quinquennial':
-            delta = timedelta(weeks=52 * 5)
+        delta = UPDATE_FREQUENCY_DELTAS.get(self.frequency)
         if delta is None:
             return
         else:
@@ -794,6 +867,12 @@ class CommunityResource(ResourceMixin, WithMetrics, db.Owned, db.Document):
         'views',
     ]
 
+    # Documents embedded in the dataset API representation, used to compute ETag
+    __etag_related__ = {
+        'owner': 'User',
+        'organization': 'Organization',
+    }
+
     meta = {
         'ordering': ['-created_at'],
         'queryset_class': db.OwnedQuerySet,
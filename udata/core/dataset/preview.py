@@ -5,12 +5,6 @@ from abc import ABC, abstractmethod
 from flask import current_app
 
 from udata import entrypoints
-from udata.app import cache
-
-# Cache available plugins for a day
-# Don't forget to flush cache on new configuration or plugin
-CACHE_DURATION = 60 * 60 * 24
-CACHE_KEY = 'udata.preview.enabled_plugins'
 
 
 class PreviewWarning(UserWarning):
@@ -55,12 +49,12 @@ class PreviewPlugin(ABC):
         pass
 
 
-@cache.cached(timeout=CACHE_DURATION, key_prefix=CACHE_KEY)
 def get_enabled_plugins():
     '''
     Returns enabled preview plugins.
 
-    Plugins are sorted, defaults come last
+    Plugins are sorted, defaults come last.
+    Plugins classes are only loaded once per process (see `udata.entrypoints`).
     '''
     plugins = entrypoints.get_enabled('udata.preview', current_app).values()
     valid = [p for p in plugins if issubclass(p, PreviewPlugin)]
@@ -4,3 +4,7 @@ namespace = Namespace()
 
 #: Trigerred when a dataset is published
 on_dataset_published = namespace.signal('on-dataset-published')
+
+#: Trigerred with some datasets identifiers when they are updated in bulk
+#: (bulk writes do not send the per-document signals)
+on_datasets_bulk_updated = namespace.signal('on-datasets-bulk-updated')
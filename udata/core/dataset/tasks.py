@@ -1,4 +1,3 @@
-import collections
 import os
 
 from datetime import datetime, timedelta
@@ -6,109 +5,191 @@ from tempfile import NamedTemporaryFile
 
 from celery.utils.log import get_task_logger
 from flask import current_app
+from pymongo import UpdateOne
 
 from udata import mail
 from udata import models as udata_models
 from udata.core import storages
+from udata.core.purge import purge
+from udata.core.reuse.models import VISIBLE_REUSES_QUERY
 from udata.frontend import csv
 from udata.harvest.models import HarvestJob
 from udata.i18n import lazy_gettext as _
 from udata.models import (Follow, Discussion, Activity, Topic,
-                          Organization, Transfer)
-from udata.tasks import job
+                          Organization, Reuse, Transfer)
+from udata.search import reindex_many
+from udata.tasks import job, task
 
-from .models import Dataset, Resource, CommunityResource, UPDATE_FREQUENCIES, Checksum
+from .models import (
+    Dataset, Resource, CommunityResource, UPDATE_FREQUENCIES, UPDATE_FREQUENCY_DELTAS, Checksum,
+    VISIBLE_DATASETS_QUERY
+)
+from .signals import on_datasets_bulk_updated
 
 log = get_task_logger(__name__)
 
+#: Number of datasets reindexed by a single task
+REINDEX_BATCH_SIZE = 1000
 
-def flatten(iterable):
-    for el in iterable:
-        if isinstance(el, collections.Iterable) and not isinstance(el, str):
-            yield from flatten(el)
-        else:
-            yield el
 
-
-@job('purge-datasets')
-def purge_datasets(self):
-    for dataset in Dataset.objects(deleted__ne=None):
-        log.info(f'Purging dataset {dataset}')
-        # Remove followers
-        Follow.objects(following=dataset).delete()
-        # Remove discussions
-        Discussion.objects(subject=dataset).delete()
-        # Remove activity
-        Activity.objects(related_to=dataset).delete()
-        # Remove topics' related dataset
-        for topic in Topic.objects(datasets=dataset):
-            datasets = topic.datasets
-            datasets.remove(dataset)
-            topic.update(datasets=datasets)
-        # Remove HarvestItem references
-        HarvestJob.objects(items__dataset=dataset).update(set__items__S__dataset=None)
-        # Remove associated Transfers
-        Transfer.objects(subject=dataset).delete()
-        # Remove each dataset's resource's file
-        storage = storages.resources
+def purge_datasets_related(datasets):
+    '''Cleanup the objects related to a batch of deleted datasets'''
+    ids = [dataset.id for dataset in datasets]
+    # Remove followers
+    Follow.objects(following__in=datasets).delete()
+    # Remove discussions
+    Discussion.objects(subject__in=datasets).delete()
+    # Remove activity
+    Activity.objects(related_to__in=ids).delete()
+    # Remove topics' related datasets
+    Topic.objects(datasets__in=ids).update(pull_all__datasets=ids)
+    # Remove HarvestItem references
+    unset_harvest_items_datasets(ids)
+    # Remove associated Transfers
+    Transfer.objects(subject__in=datasets).delete()
+    # Remove each dataset's resource's file
+    files = []
+    for dataset in datasets:
         for resource in dataset.resources:
-            if resource.fs_filename is not None:
-                storage.delete(resource.fs_filename)
+            files.append((storages.resources, resource.fs_filename))
             # Not removing the resource from dataset.resources
             # with `dataset.remove_resource` as removing elements
             # from a list while iterating causes random effects.
             Dataset.on_resource_removed.send(Dataset, document=dataset, resource_id=resource.id)
-        # Remove each dataset related community resource and it's file
-        community_resources = CommunityResource.objects(dataset=dataset)
-        for community_resource in community_resources:
-            if community_resource.fs_filename is not None:
-                storage.delete(community_resource.fs_filename)
-            community_resource.delete()
-        # Remove dataset
-        dataset.delete()
+    # Remove each dataset related community resource and it's file
+    community_resources = CommunityResource.objects(dataset__in=ids)
+    files.extend(
+        (storages.resources, fs_filename)
+        for fs_filename in community_resources.scalar('fs_filename')
+    )
+    community_resources.delete()
+    return files
+
+
+def unset_harvest_items_datasets(ids):
+    '''Unset the given datasets from harvest jobs items with a single bulk write'''
+    ids = set(ids)
+    collection = HarvestJob._get_collection()
+    updates = []
+    jobs = collection.find({'items.dataset': {'$in': list(ids)}}, {'items.dataset': 1})
+    for harvest_job in jobs:
+        unset = {
+            'items.{0}.dataset'.format(i): None
+            for i, item in enumerate(harvest_job['items'])
+            if item.get('dataset') in ids
+        }
+        updates.append(UpdateOne({'_id': harvest_job['_id']}, {'$set': unset}))
+    if updates:
+        collection.bulk_write(updates, ordered=False)
+
+
+@job('purge-datasets')
+def purge_datasets(self):
+    count = purge(Dataset, purge_datasets_related)
+    log.info(f'Purged {count} datasets')
+
+
+def outdated_datasets_pipeline(now, allowed_delay):
+    '''
+    Aggregation pipeline grouping by organization the visible datasets
+    not updated according to their frequency.
+
+    The last update is the latest resource publication date
+    (visible datasets have resources) and it is compared to a threshold
+    computed for each frequency.
+    '''
+    return [
+        {'$match': dict(
+            VISIBLE_DATASETS_QUERY,
+            frequency={'$in': list(UPDATE_FREQUENCY_DELTAS)},
+            organization={'$ne': None},
+        )},
+        {'$project': {
+            'organization': 1,
+            'frequency': 1,
+            'last_update': {'$max': '$resources.published'},
+        }},
+        {'$match': {'$or': [
+            {'frequency': frequency, 'last_update': {'$lt': now - delta - allowed_delay}}
+            for frequency, delta in UPDATE_FREQUENCY_DELTAS.items()
+        ]}},
+        {'$group': {'_id': '$organization', 'datasets': {'$push': '$_id'}}},
+    ]
+
+
+@task(route='high.mail')
+def notify_outdated_datasets(org_id, dataset_ids):
+    '''Send a frequency reminder to an organization members'''
+    org = Organization.objects.get(pk=org_id)
+    now = datetime.now()
+    datasets = list(Dataset.objects(id__in=dataset_ids))
+    for dataset in datasets:
+        dataset.outdated = now - dataset.next_update
+        dataset.frequency_str = UPDATE_FREQUENCIES[dataset.frequency]
+    recipients = [m.user for m in org.members]
+    subject = _('You need to update some frequency-based datasets')
+    mail.send(subject, recipients, 'frequency_reminder',
+              org=org, datasets=datasets)
 
 
 @job('send-frequency-reminder')
 def send_frequency_reminder(self):
-    # We exclude irrelevant frequencies.
-    frequencies = [f for f in UPDATE_FREQUENCIES.keys()
-                   if f not in ('unknown', 'realtime', 'punctual')]
     now = datetime.now()
-    reminded_orgs = {}
+    allowed_delay = timedelta(days=current_app.config['DELAY_BEFORE_REMINDER_NOTIFICATION'])
+    pipeline = outdated_datasets_pipeline(now, allowed_delay)
+    outdated = {
+        row['_id']: row['datasets'] for row in Dataset._get_collection().aggregate(pipeline)
+    }
     reminded_people = []
-    allowed_delay = current_app.config['DELAY_BEFORE_REMINDER_NOTIFICATION']
-    for org in Organization.objects.visible():
-        outdated_datasets = []
-        for dataset in Dataset.objects.filter(
-                frequency__in=frequencies, organization=org).visible():
-            if dataset.next_update + timedelta(days=allowed_delay) < now:
-                dataset.outdated = now - dataset.next_update
-                dataset.frequency_str = UPDATE_FREQUENCIES[dataset.frequency]
-                outdated_datasets.append(dataset)
-        if outdated_datasets:
-            reminded_orgs[org] = outdated_datasets
-    for reminded_org, datasets in reminded_orgs.items():
-        print('{org.name} will be emailed for {datasets_nb} datasets'.format(
-              org=reminded_org, datasets_nb=len(datasets)))
-        recipients = [m.user for m in reminded_org.members]
-        reminded_people.append(recipients)
-        subject = _('You need to update some frequency-based datasets')
-        mail.send(subject, recipients, 'frequency_reminder',
-                  org=reminded_org, datasets=datasets)
-
-    print('{nb_orgs} orgs concerned'.format(nb_orgs=len(reminded_orgs)))
-    reminded_people = list(flatten(reminded_people))
+    orgs = Organization.objects(id__in=list(outdated)).visible()
+    orgs = list(orgs.only('name', 'members.user').as_pymongo())
+    for org in orgs:
+        datasets = outdated[org['_id']]
+        print('{name} will be emailed for {datasets_nb} datasets'.format(
+              name=org['name'], datasets_nb=len(datasets)))
+        reminded_people.extend(m.get('user') for m in org.get('members', []))
+        notify_outdated_datasets.delay(str(org['_id']), [str(id) for id in datasets])
+
+    print('{nb_orgs} orgs concerned'.format(nb_orgs=len(orgs)))
     print('{nb_emails} people contacted ({nb_emails_twice} twice)'.format(
         nb_emails=len(reminded_people),
         nb_emails_twice=len(reminded_people) - len(set(reminded_people))))
     print('Done')
 
 
+def reuses_by_dataset_pipeline():
+    '''Aggregation pipeline counting visible reuses by dataset'''
+    return [
+        {'$match': VISIBLE_REUSES_QUERY},
+        {'$project': {'datasets': 1}},
+        {'$unwind': '$datasets'},
+        # A reuse may reference a dataset more than once
+        {'$group': {'_id': {'reuse': '$_id', 'dataset': '$datasets'}}},
+        {'$group': {'_id': '$_id.dataset', 'count': {'$sum': 1}}},
+    ]
+
+
 @job('update-datasets-reuses-metrics')
 def update_datasets_reuses_metrics(self):
-    all_datasets = Dataset.objects.visible().timeout(False)
-    for dataset in all_datasets:
-        dataset.count_reuses()
+    counts = {
+        row['_id']: row['count']
+        for row in Reuse._get_collection().aggregate(reuses_by_dataset_pipeline())
+    }
+    collection = Dataset._get_collection()
+    datasets = collection.find(VISIBLE_DATASETS_QUERY, {'metrics.reuses': 1})
+    updates, changed = [], []
+    for dataset in datasets:
+        count = counts.get(dataset['_id'], 0)
+        if dataset.get('metrics', {}).get('reuses', 0) != count:
+            updates.append(UpdateOne({'_id': dataset['_id']}, {'$set': {'metrics.reuses': count}}))
+            changed.append(str(dataset['_id']))
+    if updates:
+        collection.bulk_write(updates, ordered=False)
+        on_datasets_bulk_updated.send(changed)
+    log.info(f'Updated reuses metrics of {len(changed)} datasets')
+    if current_app.config.get('AUTO_INDEX'):
+        for start in range(0, len(changed), REINDEX_BATCH_SIZE):
+            reindex_many.delay(Dataset.__name__, changed[start:start + REINDEX_BATCH_SIZE])
 
 
 def get_queryset(model_cls):
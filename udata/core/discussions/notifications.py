@@ -1,6 +1,10 @@
-from udata.features.notifications.actions import notifier
+from udata.features.notifications.actions import (
+    notifier, notify, clear, invalidate, owners, recipients
+)
+from udata.models import Owned
 
 from .actions import discussions_for
+from .signals import on_new_discussion, on_discussion_closed, on_discussion_deleted
 
 
 import logging
@@ -30,3 +34,29 @@ def discussions_notifications(user):
         }))
 
     return notifications
+
+
+@on_new_discussion.connect
+def add_discussion_notification(discussion):
+    '''Add the new discussion to its subject owners inboxes'''
+    subject = discussion.subject
+    notify('discussion', owners(subject), discussion.created, {
+        'id': discussion.id,
+        'title': discussion.title,
+        'subject': {
+            'id': subject.id,
+            'type': subject.__class__.__name__.lower(),
+        }
+    })
+
+
+@on_discussion_closed.connect
+@on_discussion_deleted.connect
+def clear_discussion(discussion, **kwargs):
+    clear('discussion', discussion.id)
+
+
+@Owned.on_owner_change.connect
+def invalidate_owners(document, previous):
+    '''Discussions notifications follow their subject ownership'''
+    invalidate(recipients(previous) + owners(document))
@@ -0,0 +1,3 @@
+def init_app(app):
+    # Connect organizations rollups invalidation
+    import udata.core.organization.rollups  # noqa
@@ -20,6 +20,10 @@ from .permissions import (
     EditOrganizationPermission, OrganizationPrivatePermission
 )
 from .rdf import build_org_catalog
+from .signals import (
+    new_member, member_updated, member_removed,
+    new_membership_request, membership_accepted, membership_refused
+)
 from .tasks import notify_membership_request, notify_membership_response
 from .api_fields import (
     org_fields,
@@ -110,6 +114,8 @@ class OrganizationListAPI(API):
 @api.response(410, 'Organization has been deleted')
 class OrganizationAPI(API):
     @api.doc('get_organization')
+    @api.cached('organization:{org.id}')
+    @api.conditional
     @api.marshal_with(org_fields)
     def get(self, org):
         '''Get a organization given its identifier'''
@@ -249,6 +255,7 @@ class MembershipRequestAPI(API):
         form.populate_obj(membership_request)
         org.save()
 
+        new_membership_request.send(org, request=membership_request)
         notify_membership_request.delay(str(org.id), str(membership_request.id))
 
         return membership_request, code
@@ -285,6 +292,7 @@ class MembershipAcceptAPI(MembershipAPI):
         org.count_members()
         org.save()
 
+        membership_accepted.send(org, request=membership_request)
         notify_membership_response.delay(str(org.id), str(membership_request.id))
 
         return member
@@ -308,6 +316,7 @@ class MembershipRefuseAPI(MembershipAPI):
 
         org.save()
 
+        membership_refused.send(org, request=membership_request)
         notify_membership_response.delay(str(org.id), str(membership_request.id))
 
         return {}, 200
@@ -333,6 +342,8 @@ class MemberAPI(API):
         org.count_members()
         org.save()
 
+        new_member.send(org, member=member)
+
         return member, 201
 
     @api.secure
@@ -347,6 +358,8 @@ class MemberAPI(API):
         form.populate_obj(member)
         org.save()
 
+        member_updated.send(org, member=member)
+
         return member
 
     @api.secure
@@ -358,6 +371,7 @@ class MemberAPI(API):
         if member:
             Organization.objects(id=org.id).update_one(pull__members=member)
             org.count_members()
+            member_removed.send(org, member=member)
             return '', 204
         else:
             api.abort(404)
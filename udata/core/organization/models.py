@@ -1,5 +1,4 @@
 from datetime import datetime
-from itertools import chain
 
 from blinker import Signal
 from flask import url_for
@@ -139,6 +138,11 @@ class Organization(WithMetrics, BadgeMixin, db.Datetimed, db.Document):
         CERTIFIED: _('Certified'),
     }
 
+    # Documents embedded in the API representation, used to compute ETag
+    __etag_related__ = {
+        'members.user': 'User',
+    }
+
     __metrics_keys__ = [
         'datasets',
         'members',
@@ -224,12 +228,9 @@ class Organization(WithMetrics, BadgeMixin, db.Datetimed, db.Document):
         return filter(lambda m: m.role == role, self.members)
 
     def check_availability(self):
-        from udata.models import Dataset  # Circular imports.
+        from .rollups import availabilities  # Circular imports.
         # Performances: only check the first 20 datasets for now.
-        return chain(
-            *[dataset.check_availability()
-              for dataset in Dataset.objects(organization=self).visible()[:20]]
-        )
+        return availabilities([self.id])
 
     @cached_property
     def json_ld(self):
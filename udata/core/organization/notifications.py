@@ -1,4 +1,14 @@
-from udata.features.notifications.actions import notifier
+from mongoengine.signals import post_save
+
+from udata.features.notifications.actions import (
+    notifier, notify, clear, invalidate, members
+)
+
+from .models import Organization
+from .signals import (
+    new_member, member_updated, member_removed,
+    new_membership_request, membership_accepted, membership_refused
+)
 
 
 import logging
@@ -6,6 +16,18 @@ import logging
 log = logging.getLogger(__name__)
 
 
+def membership_request_details(org, request):
+    return {
+        'id': request.id,
+        'organization': org.id,
+        'user': {
+            'id': request.user.id,
+            'fullname': request.user.fullname,
+            'avatar': str(request.user.avatar)
+        }
+    }
+
+
 @notifier('membership_request')
 def membership_request_notifications(user):
     '''Notify user about pending membership requests'''
@@ -14,14 +36,38 @@ def membership_request_notifications(user):
 
     for org in orgs:
         for request in org.pending_requests:
-            notifications.append((request.created, {
-                'id': request.id,
-                'organization': org.id,
-                'user': {
-                    'id': request.user.id,
-                    'fullname': request.user.fullname,
-                    'avatar': str(request.user.avatar)
-                }
-            }))
+            notifications.append((request.created, membership_request_details(org, request)))
 
     return notifications
+
+
+@new_membership_request.connect
+def add_membership_request_notification(org, request):
+    '''Add the new membership request to the organization admins inboxes'''
+    notify('membership_request', members(org.id, role='admin'), request.created,
+           membership_request_details(org, request))
+
+
+@membership_accepted.connect
+@membership_refused.connect
+def clear_membership_request(org, request):
+    clear('membership_request', request.id)
+    if request.status == 'accepted':
+        invalidate([request.user])
+
+
+@new_member.connect
+@member_updated.connect
+@member_removed.connect
+def invalidate_member(org, member):
+    '''Organization notifications depend on the user membership and role'''
+    invalidate([member.user])
+
+
+def on_organization_saved(sender, document, **kwargs):
+    '''Deleted organizations notifications are dropped from their members inboxes'''
+    if 'deleted' in document._get_changed_fields():
+        invalidate(members(document.id))
+
+
+post_save.connect(on_organization_saved, sender=Organization)
@@ -0,0 +1,150 @@
+'''
+Organizations rollups shared by their members profiles.
+
+Rollups are computed for a set of organizations
+with a single query by metric and cached by organizations versions.
+An organization version is bumped each time one of its datasets or follows is saved
+so rollups of all its members are explicitly invalidated.
+'''
+import hashlib
+import logging
+import uuid
+
+from mongoengine.signals import post_save
+
+from udata.app import cache
+from udata.core.dataset.models import VISIBLE_DATASETS_QUERY
+from udata.models import Dataset, Follow, Owned
+
+from .models import Organization
+
+log = logging.getLogger(__name__)
+
+#: Maximum duration (in seconds) of cached rollups and organizations versions
+#: (versions must not expire before the rollups computed with them)
+CACHE_DURATION = 60 * 60
+CACHE_KEY = 'organizations-rollups-{0}'
+VERSION_KEY = 'organization-rollups-version-{0}'
+
+#: Performances: only check the first datasets of each organization
+AVAILABILITY_SAMPLE_SIZE = 20
+
+
+def availability_pipeline(org_ids, size=None):
+    '''
+    Aggregation pipeline fetching the resources of the first datasets of each organization.
+
+    Datasets are looked up by organization and limited to the sample size
+    so only the sampled datasets are read.
+    '''
+    size = size or AVAILABILITY_SAMPLE_SIZE
+    return [
+        {'$match': {'_id': {'$in': org_ids}}},
+        {'$lookup': {
+            'from': Dataset._get_collection_name(),
+            'let': {'organization': '$_id'},
+            'pipeline': [
+                {'$match': dict(VISIBLE_DATASETS_QUERY, **{
+                    '$expr': {'$eq': ['$organization', '$$organization']},
+                })},
+                {'$limit': size},
+                {'$project': {
+                    '_id': 0,
+                    'resources.filetype': 1,
+                    'resources.extras.check:available': 1,
+                }},
+            ],
+            'as': 'datasets',
+        }},
+        {'$project': {'datasets': 1}},
+    ]
+
+
+def availabilities(org_ids):
+    '''
+    Return the check status (boolean or `unknown`)
+    of the remote resources of the organizations first datasets
+    '''
+    statuses = []
+    pipeline = availability_pipeline(list(org_ids))
+    for row in Organization._get_collection().aggregate(pipeline):
+        for dataset in row['datasets']:
+            statuses.extend(
+                resource.get('extras', {}).get('check:available', 'unknown')
+                for resource in dataset.get('resources', [])
+                if resource.get('filetype') == 'remote'
+            )
+    return statuses
+
+
+def availability_rate(statuses):
+    '''Return the percentage of availability for some resources statuses'''
+    # Filter out the unknown
+    statuses = [s for s in statuses if type(s) is bool]
+    if statuses:
+        # Trick will work because it's a sum() of booleans.
+        return round(100. * sum(statuses) / len(statuses), 2)
+    # if nothing is unavailable, everything is considered OK
+    return 100
+
+
+def compute(org_ids):
+    '''Compute the rollups of some organizations'''
+    org_ids = list(org_ids)
+    if not org_ids:
+        return {'datasets': 0, 'followers': 0, 'resources_availability': 100}
+    orgs = [Organization(id=org_id) for org_id in org_ids]
+    return {
+        'datasets': Dataset.objects(organization__in=org_ids).visible().count(),
+        'followers': Follow.objects(following__in=orgs).count(),
+        'resources_availability': availability_rate(availabilities(org_ids)),
+    }
+
+
+def get(org_ids):
+    '''Get the (cached) rollups of some organizations'''
+    org_ids = sorted(str(org_id) for org_id in org_ids)
+    if not org_ids:
+        return compute([])
+    version_keys = [VERSION_KEY.format(org_id) for org_id in org_ids]
+    versions = cache.get_many(*version_keys)
+    signature = ','.join('{0}:{1}'.format(*pair) for pair in zip(org_ids, versions))
+    key = CACHE_KEY.format(hashlib.sha1(signature.encode('utf8')).hexdigest())
+    rollups = cache.get(key)
+    if rollups is None:
+        rollups = compute(Organization.id.to_python(org_id) for org_id in org_ids)
+        cache.set(key, rollups, timeout=CACHE_DURATION)
+    return rollups
+
+
+def invalidate(*org_ids):
+    '''Invalidate all the cached rollups including some organizations'''
+    cache.set_many({
+        VERSION_KEY.format(org_id): uuid.uuid4().hex
+        for org_id in org_ids if org_id
+    }, timeout=CACHE_DURATION)
+
+
+def on_dataset_saved(sender, document, **kwargs):
+    org = document._data.get('organization')
+    if org:
+        invalidate(org.id)
+
+
+def on_owner_change(document, previous):
+    '''Datasets moved to another owner also change their previous organization rollups'''
+    if isinstance(document, Dataset) and isinstance(previous, Organization):
+        invalidate(previous.id)
+
+
+def on_follow_saved(sender, document, **kwargs):
+    following = document._data.get('following')
+    if isinstance(following, Organization):
+        invalidate(following.id)
+    elif isinstance(following, dict) and following.get('_cls') == Organization.__name__:
+        invalidate(following['_ref'].id)
+
+
+post_save.connect(on_dataset_saved, sender=Dataset)
+post_save.connect(on_follow_saved, sender=Follow)
+Owned.on_owner_change.connect(on_owner_change)
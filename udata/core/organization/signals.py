@@ -10,6 +10,10 @@ organization_deleted = namespace.signal('organization-deleted')
 
 new_member = namespace.signal('new-member')
 
+member_updated = namespace.signal('member-updated')
+
+member_removed = namespace.signal('member-removed')
+
 new_membership_request = namespace.signal('new-membership-request')
 
 membership_accepted = namespace.signal('membership-accepted')
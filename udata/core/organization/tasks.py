@@ -1,8 +1,9 @@
 from udata import mail
 from udata.i18n import lazy_gettext as _
 from udata.core import storages
+from udata.core.purge import purge
 from udata.models import Follow, Activity, Dataset, Transfer
-from udata.search import reindex
+from udata.search import reindex_many
 from udata.tasks import job, task, get_logger
 
 from udata.core.badges.tasks import notify_new_badge
@@ -12,32 +13,38 @@ from .models import Organization, CERTIFIED, PUBLIC_SERVICE
 log = get_logger(__name__)
 
 
+def purge_organizations_related(organizations):
+    '''Cleanup the objects related to a batch of deleted organizations'''
+    ids = [organization.id for organization in organizations]
+    # Remove followers
+    Follow.objects(following__in=organizations).delete()
+    # Remove activity
+    Activity.objects(related_to__in=ids).delete()
+    Activity.objects(organization__in=ids).delete()
+    # Remove transfers
+    Transfer.objects(recipient__in=organizations).delete()
+    Transfer.objects(owner__in=organizations).delete()
+    # Unlink datasets from the organizations and reindex them
+    datasets = Dataset.objects(organization__in=ids)
+    d_ids = [str(id) for id in datasets.scalar('id')]
+    if d_ids:
+        datasets.update(unset__organization=True)
+        reindex_many.delay(Dataset.__name__, d_ids)
+    # Remove organization's logo in all sizes
+    return [
+        (storages.avatars, filename)
+        for organization in organizations if organization.logo.filename is not None
+        for filename in (
+            [organization.logo.filename, organization.logo.original]
+            + list(organization.logo.thumbnails.values())
+        )
+    ]
+
+
 @job('purge-organizations')
 def purge_organizations(self):
-    for organization in Organization.objects(deleted__ne=None):
-        log.info(f'Purging organization {organization}')
-        # Remove followers
-        Follow.objects(following=organization).delete()
-        # Remove activity
-        Activity.objects(related_to=organization).delete()
-        Activity.objects(organization=organization).delete()
-        # Remove transfers
-        Transfer.objects(recipient=organization).delete()
-        Transfer.objects(owner=organization).delete()
-        # Store datasets for later reindexation
-        d_ids = [d.id for d in Dataset.objects(organization=organization)]
-        # Remove organization's logo in all sizes
-        if organization.logo.filename is not None:
-            storage = storages.avatars
-            storage.delete(organization.logo.filename)
-            storage.delete(organization.logo.original)
-            for key, value in organization.logo.thumbnails.items():
-                storage.delete(value)
-        # Remove
-        organization.delete()
-        # Reindex the datasets that were linked to the organization
-        for id in d_ids:
-            reindex(Dataset.__name__, str(id))
+    count = purge(Organization, purge_organizations_related)
+    log.info(f'Purged {count} organizations')
 
 
 @task(route='high.mail')
@@ -0,0 +1,114 @@
+'''
+Bulk purge of soft-deleted documents.
+
+Deleted documents are purged by batches:
+- related documents are cleaned up with a single `$in` query per collection and batch
+- storages files are deleted by a thread pool
+- documents are deleted with a single query per batch,
+  their search unindexation being sent as a single task per batch.
+
+`pre_delete` and `post_delete` are still sent for each purged document,
+with a `bulk=True` keyword argument: receivers whose side effects
+are performed here for the whole batch (search unindexation,
+slug redirections cleanup) ignore these signals.
+'''
+import logging
+
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from mongoengine import CASCADE, DENY, NULLIFY, PULL
+from mongoengine.errors import OperationError
+from mongoengine.signals import pre_delete, post_delete
+
+from udata.models.slug_fields import SlugField, SlugFollow
+from udata.search import adapter_catalog, unindex_many
+
+log = logging.getLogger(__name__)
+
+#: Number of documents purged at once
+BATCH_SIZE = 1000
+#: Number of threads deleting storages files
+STORAGE_WORKERS = 8
+
+
+def delete_files(files):
+    '''Delete some `(storage, filename)` files using a thread pool'''
+    files = [(storage, filename) for storage, filename in files if filename]
+    if not files:
+        return
+    app = current_app._get_current_object()
+
+    def delete(file):
+        storage, filename = file
+        with app.app_context():
+            try:
+                storage.delete(filename)
+            except Exception:
+                log.exception('Unable to delete file "%s" from storage %s', filename, storage.name)
+
+    with ThreadPoolExecutor(max_workers=STORAGE_WORKERS) as executor:
+        list(executor.map(delete, files))
+
+
+def apply_delete_rules(model, ids):
+    '''Apply the `reverse_delete_rule` of the fields referencing some documents'''
+    rules = [
+        (document_cls, field_name, rule)
+        for (document_cls, field_name), rule in (model._meta.get('delete_rules') or {}).items()
+        if not document_cls._meta.get('abstract')
+    ]
+    for document_cls, field_name, rule in rules:
+        if rule == DENY and document_cls.objects(**{field_name + '__in': ids}).count():
+            raise OperationError('Could not delete document ({0}.{1} refers to it)'.format(
+                document_cls.__name__, field_name))
+    for document_cls, field_name, rule in rules:
+        refs = document_cls.objects(**{field_name + '__in': ids})
+        if rule == CASCADE:
+            refs.delete()
+        elif rule == NULLIFY:
+            refs.update(**{'unset__' + field_name: 1})
+        elif rule == PULL:
+            refs.update(**{'pull_all__' + field_name: ids})
+
+
+def delete_documents(model, docs):
+    '''
+    Delete some documents with a single query.
+
+    Delete rules are applied and delete signals are sent for each document
+    with `bulk=True`, the search and slug handlers side effects being performed in bulk.
+    '''
+    ids = [doc.id for doc in docs]
+    for doc in docs:
+        pre_delete.send(model, document=doc, bulk=True)
+    apply_delete_rules(model, ids)
+    model._get_collection().delete_many({'_id': {'$in': ids}})
+    for doc in docs:
+        post_delete.send(model, document=doc, bulk=True)
+    for field in model._fields.values():
+        if isinstance(field, SlugField) and field.follow:
+            slugs = [doc[field.name] for doc in docs]
+            SlugFollow.objects(namespace=model.__name__, new_slug__in=slugs).delete()
+    if current_app.config.get('AUTO_INDEX') and model in adapter_catalog:
+        unindex_many.delay(model.__name__, [str(id) for id in ids])
+
+
+def purge(model, cleanup=None, batch_size=None):
+    '''
+    Purge all the deleted documents of a given model.
+
+    `cleanup` is called with each batch of documents before their deletion
+    and may return some `(storage, filename)` files to delete.
+
+    Returns the number of purged documents.
+    '''
+    batch_size = batch_size or BATCH_SIZE
+    ids = list(model.objects(deleted__ne=None).scalar('id'))
+    for start in range(0, len(ids), batch_size):
+        docs = list(model.objects(id__in=ids[start:start + batch_size]))
+        log.info('Purging %s %s', len(docs), model.__name__)
+        files = cleanup(docs) if cleanup else None
+        delete_files(files or [])
+        delete_documents(model, docs)
+    return len(ids)
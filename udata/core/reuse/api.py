@@ -112,6 +112,8 @@ class ReuseListAPI(API):
 @api.response(410, 'Reuse has been deleted')
 class ReuseAPI(API):
     @api.doc('get_reuse')
+    @api.cached('reuse:{reuse.id}', 'organizations')
+    @api.conditional
     @api.marshal_with(reuse_fields)
     def get(self, reuse):
         '''Fetch a given reuse'''
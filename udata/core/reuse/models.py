@@ -48,10 +48,17 @@ IMAGE_MAX_SIZE = 800
 TITLE_SIZE_LIMIT = 350
 DESCRIPTION_SIZE_LIMIT = 100000
 
+#: Raw query matching visible reuses, usable in aggregation pipelines
+VISIBLE_REUSES_QUERY = {
+    'private': {'$ne': True},
+    'datasets.0': {'$exists': True},
+    'deleted': None,
+}
+
 
 class ReuseQuerySet(db.OwnedQuerySet):
     def visible(self):
-        return self(private__ne=True, datasets__0__exists=True, deleted=None)
+        return self(__raw__=VISIBLE_REUSES_QUERY)
 
     def hidden(self):
         return self(db.Q(private=True) |
@@ -97,6 +104,13 @@ class Reuse(db.Datetimed, WithMetrics, BadgeMixin, db.Owned, db.Document):
         'views',
     ]
 
+    # Documents embedded in the API representation, used to compute ETag
+    __etag_related__ = {
+        'owner': 'User',
+        'organization': 'Organization',
+        'datasets': 'Dataset',
+    }
+
     meta = {
         'indexes': ['$title',
                     'created_at',
@@ -1,6 +1,7 @@
 from udata import mail
 from udata.i18n import lazy_gettext as _
 from udata.core import storages
+from udata.core.purge import purge
 from udata.models import Activity, Discussion, Follow, Transfer
 from udata.tasks import get_logger, job, task
 
@@ -9,26 +10,30 @@ from .models import Reuse
 log = get_logger(__name__)
 
 
+def purge_reuses_related(reuses):
+    '''Cleanup the objects related to a batch of deleted reuses'''
+    # Remove followers
+    Follow.objects(following__in=reuses).delete()
+    # Remove discussions
+    Discussion.objects(subject__in=reuses).delete()
+    # Remove activity
+    Activity.objects(related_to__in=[reuse.id for reuse in reuses]).delete()
+    # Remove transfers
+    Transfer.objects(subject__in=reuses).delete()
+    # Remove reuse's logo in all sizes
+    return [
+        (storages.images, filename)
+        for reuse in reuses if reuse.image.filename is not None
+        for filename in (
+            [reuse.image.filename, reuse.image.original] + list(reuse.image.thumbnails.values())
+        )
+    ]
+
+
 @job('purge-reuses')
 def purge_reuses(self):
-    for reuse in Reuse.objects(deleted__ne=None):
-        log.info(f'Purging reuse {reuse}')
-        # Remove followers
-        Follow.objects(following=reuse).delete()
-        # Remove discussions
-        Discussion.objects(subject=reuse).delete()
-        # Remove activity
-        Activity.objects(related_to=reuse).delete()
-        # Remove transfers
-        Transfer.objects(subject=reuse).delete()
-        # Remove reuse's logo in all sizes
-        if reuse.image.filename is not None:
-            storage = storages.images
-            storage.delete(reuse.image.filename)
-            storage.delete(reuse.image.original)
-            for key, value in reuse.image.thumbnails.items():
-                storage.delete(value)
-        reuse.delete()
+    count = purge(Reuse, purge_reuses_related)
+    log.info(f'Purged {count} reuses')
 
 
 @task
@@ -30,6 +30,7 @@ site_fields = api.model('Site', {
 class SiteAPI(API):
 
     @api.doc(id='get_site')
+    @api.cached('datasets', 'organizations', 'reuses')
     @api.marshal_with(site_fields)
     def get(self):
         '''Site-wide variables'''
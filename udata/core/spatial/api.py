@@ -1,5 +1,4 @@
 from flask import current_app, abort
-from mongoengine.queryset.visitor import Q
 
 from flask_restplus import inputs
 
@@ -14,7 +13,9 @@ from .api_fields import (
     feature_collection_fields,
     zone_suggestion_fields
 )
-from .models import GeoZone, GeoLevel, spatial_granularities
+from . import suggest
+from .geometry import SIMPLIFICATION_LEVELS, reduce_precision
+from .models import GeoZone, GeoLevel, ZoneCoverage, spatial_granularities
 
 
 GEOM_TYPES = (
@@ -22,9 +23,6 @@ GEOM_TYPES = (
     'MultiPolygon'
 )
 
-DEFAULT_SORTING = '-created_at'
-
-
 ns = api.namespace('spatial', 'Spatial references')
 
 
@@ -48,21 +46,27 @@ class SuggestZonesAPI(API):
     @api.expect(suggest_parser)
     @api.doc('suggest_zones')
     def get(self):
-        '''Geospatial zones suggest endpoint using mongoDB contains'''
+        '''Geospatial zones suggest endpoint using an in-memory index'''
         args = suggest_parser.parse_args()
-        geozones = GeoZone.objects(Q(name__icontains=args['q']) | Q(code__icontains=args['q']))
         return [
-            {
-                'id': geozone.id,
-                'name': payload_name(geozone.name),
-                'code': geozone.code,
-                'level': geozone.level,
-                'keys': geozone.keys
-            }
-            for geozone in geozones.order_by(DEFAULT_SORTING).limit(args['size']) if geozone.is_current
+            dict(zone, name=payload_name(zone['name']))
+            for zone in suggest.suggest(args['q'], args['size'])
         ]
 
 
+geom_parser = api.parser()
+geom_parser.add_argument(
+    'simplify', type=int, location='args', default=0,
+    choices=[0] + sorted(SIMPLIFICATION_LEVELS),
+    help='The geometry simplification level, from 0 (none) to {0} (coarsest)'.format(
+        max(SIMPLIFICATION_LEVELS)))
+
+
+def zones_queryset(simplify):
+    '''Only fetch the simplified geometries when required'''
+    return GeoZone.objects if simplify else GeoZone.objects.exclude('simplified')
+
+
 dataset_parser = api.parser()
 dataset_parser.add_argument(
     'dynamic', type=inputs.boolean, help='Append dynamic datasets',
@@ -76,29 +80,36 @@ dataset_parser.add_argument(
 class ZonesAPI(API):
     @api.doc('spatial_zones',
              params={'ids': 'A zone identifiers list (comma separated)'})
+    @api.expect(geom_parser)
     @api.marshal_with(feature_collection_fields)
     def get(self, ids):
         '''Fetch a zone list as GeoJSON'''
-        zones = GeoZone.objects.in_bulk(ids)
+        simplify = geom_parser.parse_args()['simplify']
+        zones = zones_queryset(simplify).in_bulk(ids)
         zones = [zones[id] for id in ids]
         return {
             'type': 'FeatureCollection',
-            'features': [z.toGeoJSON() for z in zones],
+            'features': [z.toGeoJSON(simplify) for z in zones],
         }
 
 
 @ns.route('/zone/<path:id>/children/', endpoint='zone_children')
 class ZoneChildrenAPI(API):
     @api.doc('spatial_zone_children', params={'id': 'A zone identifier'})
+    @api.expect(geom_parser)
     @api.marshal_list_with(feature_collection_fields)
     def get(self, id):
         '''Fetch children of a zone.'''
         zone = GeoZone.objects.get_or_404(id=id)
         if not current_app.config.get('ACTIVATE_TERRITORIES'):
             return abort(501)
+        simplify = geom_parser.parse_args()['simplify']
+        children = zone.children
+        if not simplify:
+            children = children.exclude('simplified')
         return {
             'type': 'FeatureCollection',
-            'features': [z.toGeoJSON() for z in zone.children]
+            'features': [z.toGeoJSON(simplify) for z in children]
         }
 
 
@@ -131,10 +142,12 @@ class ZoneDatasetsAPI(API):
 @ns.route('/zone/<path:id>/', endpoint='zone')
 class ZoneAPI(API):
     @api.doc('spatial_zone', params={'id': 'A zone identifier'})
+    @api.expect(geom_parser)
     def get(self, id):
         '''Fetch a zone'''
-        zone = GeoZone.objects.get_or_404(id=id)
-        return zone.toGeoJSON()
+        simplify = geom_parser.parse_args()['simplify']
+        zone = zones_queryset(simplify).get_or_404(id=id)
+        return zone.toGeoJSON(simplify)
 
 
 @ns.route('/levels/', endpoint='spatial_levels')
@@ -167,29 +180,27 @@ class SpatialCoverageAPI(API):
     @api.doc('spatial_coverage')
     @api.marshal_list_with(feature_collection_fields)
     def get(self, level):
-        '''List each zone for a given level with their datasets count'''
+        '''
+        List each zone for a given level with their datasets count
+
+        Datasets counts are computed by the `compute-spatial-coverage` job.
+        '''
         level = GeoLevel.objects.get_or_404(id=level)
-        features = []
-
-        for zone in GeoZone.objects(level=level.id):
-            # fetch nested levels IDs
-            ids = GeoZone.objects(parents=zone.id).only('id').distinct('id')
-            ids.append(zone.id)
-            # Count datasets in zone
-            nb_datasets = Dataset.objects(spatial__zones__in=ids).count()
-            features.append({
+        precision = current_app.config['SPATIAL_COVERAGE_PRECISION']
+        counts = dict(ZoneCoverage.objects(level=level.id).scalar('id', 'datasets'))
+        zones = GeoZone.objects(level=level.id).only('id', 'name', 'code', 'level', 'geom')
+
+        return {
+            'type': 'FeatureCollection',
+            'features': [{
                 'id': zone.id,
                 'type': 'Feature',
-                'geometry': zone.geom,
+                'geometry': reduce_precision(zone.geom, precision),
                 'properties': {
                     'name': _(zone.name),
                     'code': zone.code,
                     'level': zone.level,
-                    'datasets': nb_datasets
+                    'datasets': counts.get(zone.id, 0)
                 }
-            })
-
-        return {
-            'type': 'FeatureCollection',
-            'features': features
+            } for zone in zones]
         }
@@ -1,5 +1,7 @@
 import os
 import contextlib
+import functools
+import itertools
 import logging
 import lzma
 import tarfile
@@ -21,11 +23,15 @@ import slugify
 from bson import DBRef
 from mongoengine import errors
 from mongoengine.context_managers import switch_collection
+from mongoengine.queryset import transform
+from pymongo import UpdateOne
 
 from udata.commands import cli
 from udata.core.dataset.models import Dataset
-from udata.core.spatial import geoids
+from udata.core.spatial import geoids, suggest
+from udata.core.spatial.geometry import simplify_levels
 from udata.core.spatial.models import GeoLevel, GeoZone, SpatialCoverage
+from udata.core.spatial.tasks import compute_coverage
 from udata.core.storages import logos, tmp
 
 log = logging.getLogger(__name__)
@@ -33,6 +39,7 @@ log = logging.getLogger(__name__)
 
 DEFAULT_GEOZONES_FILE = 'https://github.com/etalab/geozones/releases/download/2019.0/geozones-countries-2019-0-msgpack.tar.xz'
 GEOZONE_FILENAME = 'geozones.tar.xz'
+DEFAULT_BATCH_SIZE = 1000
 
 
 def level_ref(level):
@@ -45,55 +52,103 @@ def grp():
     pass
 
 
-def load_levels(col, path):
-    with open(path, 'rb') as fp:
-        unpacker = msgpack.Unpacker(fp, raw=False)
-        for i, level in enumerate(unpacker, start=1):
-            col.objects(id=level['id']).modify(
-                upsert=True,
-                set__name=level['label'],
-                set__parents=[level_ref(p) for p in level['parents']],
-                set__admin_level=level.get('admin_level')
-            )
-    return i
+def batched(iterable, size):
+    '''Split an iterable into lists of at most `size` items'''
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def bulk_load(col, path, to_update, drop=False, batch_size=DEFAULT_BATCH_SIZE,
+              skip_header=False, label=None):
+    '''
+    Load a msgpack file into a collection by batches.
 
+    `to_update` transforms each unpacked item into an `(id, update)` pair
+    or `None` to skip it.
+    Documents are inserted if `drop` is set (ie. the target collection is new),
+    upserted otherwise.
 
-def load_zones(col, path):
+    Returns the number of loaded documents.
+    '''
+    collection = col._get_collection()
+    total = 0
     with open(path, 'rb') as fp:
-        unpacker = msgpack.Unpacker(fp, raw=False)
-        next(unpacker)  # Skip headers.
-        for i, geozone in enumerate(unpacker):
-            params = {
-                'slug': slugify.slugify(geozone['name'], separator='-'),
-                'level': geozone['level'],
-                'code': geozone['code'],
-                'name': geozone['name'],
-                'keys': geozone.get('keys'),
-                'parents': geozone.get('parents', []),
-                'ancestors': geozone.get('ancestors', []),
-                'successors': geozone.get('successors', []),
-                'validity': geozone.get('validity'),
-                'population': geozone.get('population'),
-                'dbpedia': geozone.get('dbpedia'),
-                'flag': geozone.get('flag'),
-                'blazon': geozone.get('blazon'),
-                'wikidata': geozone.get('wikidata'),
-                'wikipedia': geozone.get('wikipedia'),
-                'area': geozone.get('area'),
-            }
-            if geozone.get('geom') and (
-                geozone['geom']['type'] != 'GeometryCollection' or
-                    geozone['geom']['geometries']):
-                params['geom'] = geozone['geom']
-            try:
-                col.objects(id=geozone['_id']).modify(upsert=True, **{
-                    'set__{0}'.format(k): v for k, v in params.items()
-                })
-            except errors.ValidationError as e:
-                log.warning('Validation error (%s) for %s with %s',
-                            e, geozone['_id'], params)
-                continue
-    return i
+        with click.progressbar(length=os.path.getsize(path), label=label) as bar:
+            unpacker = msgpack.Unpacker(fp, raw=False)
+            if skip_header:
+                next(unpacker)
+            position = unpacker.tell()
+            items = (to_update(item) for item in unpacker)
+            for batch in batched(filter(None, items), batch_size):
+                if drop:
+                    collection.insert_many([
+                        dict(update['$set'], _id=id) for id, update in batch
+                    ], ordered=False)
+                else:
+                    collection.bulk_write([
+                        UpdateOne({'_id': id}, update, upsert=True) for id, update in batch
+                    ], ordered=False)
+                total += len(batch)
+                bar.update(unpacker.tell() - position)
+                position = unpacker.tell()
+    return total
+
+
+def level_update(col, level):
+    return level['id'], transform.update(
+        col,
+        set__name=level['label'],
+        set__parents=[level_ref(p) for p in level['parents']],
+        set__admin_level=level.get('admin_level')
+    )
+
+
+def zone_update(col, geozone):
+    params = {
+        'slug': slugify.slugify(geozone['name'], separator='-'),
+        'level': geozone['level'],
+        'code': geozone['code'],
+        'name': geozone['name'],
+        'keys': geozone.get('keys'),
+        'parents': geozone.get('parents', []),
+        'ancestors': geozone.get('ancestors', []),
+        'successors': geozone.get('successors', []),
+        'validity': geozone.get('validity'),
+        'population': geozone.get('population'),
+        'dbpedia': geozone.get('dbpedia'),
+        'flag': geozone.get('flag'),
+        'blazon': geozone.get('blazon'),
+        'wikidata': geozone.get('wikidata'),
+        'wikipedia': geozone.get('wikipedia'),
+        'area': geozone.get('area'),
+    }
+    if geozone.get('geom') and (
+        geozone['geom']['type'] != 'GeometryCollection' or
+            geozone['geom']['geometries']):
+        params['geom'] = geozone['geom']
+        params['simplified'] = simplify_levels(geozone['geom'])
+    try:
+        return geozone['_id'], transform.update(col, **{
+            'set__{0}'.format(k): v for k, v in params.items()
+        })
+    except errors.ValidationError as e:
+        log.warning('Validation error (%s) for %s with %s',
+                    e, geozone['_id'], params)
+
+
+def load_levels(col, path, drop=False, batch_size=DEFAULT_BATCH_SIZE):
+    return bulk_load(col, path, functools.partial(level_update, col),
+                     drop=drop, batch_size=batch_size, label='Loading levels')
+
+
+def load_zones(col, path, drop=False, batch_size=DEFAULT_BATCH_SIZE):
+    return bulk_load(col, path, functools.partial(zone_update, col),
+                     drop=drop, batch_size=batch_size, skip_header=True,
+                     label='Loading zones')
 
 
 def cleanup(prefix):
@@ -132,7 +187,9 @@ def handle_error(prefix, to_delete=None):
 @grp.command()
 @click.argument('filename', metavar='<filename>', default=DEFAULT_GEOZONES_FILE)
 @click.option('-d', '--drop', is_flag=True, help='Drop existing data')
-def load(filename=DEFAULT_GEOZONES_FILE, drop=False):
+@click.option('-b', '--batch-size', default=DEFAULT_BATCH_SIZE, type=int,
+              help='Number of documents written by batch')
+def load(filename=DEFAULT_GEOZONES_FILE, drop=False, batch_size=DEFAULT_BATCH_SIZE):
     '''
     Load a geozones archive from <filename>
 
@@ -162,11 +219,11 @@ def load(filename=DEFAULT_GEOZONES_FILE, drop=False):
         target = GeoLevel._get_collection_name()
         with switch_collection(GeoLevel, name):
             with handle_error(prefix, GeoLevel):
-                total = load_levels(GeoLevel, levels_filepath)
+                total = load_levels(GeoLevel, levels_filepath, drop=True, batch_size=batch_size)
                 GeoLevel.objects._collection.rename(target, dropTarget=True)
     else:
         with handle_error(prefix):
-            total = load_levels(GeoLevel, levels_filepath)
+            total = load_levels(GeoLevel, levels_filepath, batch_size=batch_size)
     log.info('Loaded {total} levels'.format(total=total))
 
     log.info('Loading zones.msgpack')
@@ -176,13 +233,20 @@ def load(filename=DEFAULT_GEOZONES_FILE, drop=False):
         target = GeoZone._get_collection_name()
         with switch_collection(GeoZone, name):
             with handle_error(prefix, GeoZone):
-                total = load_zones(GeoZone, zones_filepath)
+                total = load_zones(GeoZone, zones_filepath, drop=True, batch_size=batch_size)
                 GeoZone.objects._collection.rename(target, dropTarget=True)
     else:
         with handle_error(prefix):
-            total = load_zones(GeoZone, zones_filepath)
+            total = load_zones(GeoZone, zones_filepath, batch_size=batch_size)
     log.info('Loaded {total} zones'.format(total=total))
 
+    suggest.invalidate()
+
+    log.info('Computing spatial coverage')
+    with handle_error(prefix):
+        total = compute_coverage()
+    log.info('Computed spatial coverage for {total} zones'.format(total=total))
+
     cleanup(prefix)
 
 
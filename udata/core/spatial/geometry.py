@@ -0,0 +1,119 @@
+'''
+GeoJSON geometries helpers.
+'''
+
+
+def round_coordinates(coordinates, precision):
+    '''Round nested GeoJSON coordinates to a given number of decimals'''
+    if coordinates and isinstance(coordinates[0], (int, float)):
+        return [round(value, precision) for value in coordinates]
+    return [round_coordinates(c, precision) for c in coordinates]
+
+
+def reduce_precision(geom, precision):
+    '''Get a copy of a GeoJSON geometry with coordinates at a given precision'''
+    if not geom:
+        return geom
+    if geom['type'] == 'GeometryCollection':
+        return {
+            'type': geom['type'],
+            'geometries': [reduce_precision(g, precision) for g in geom['geometries']],
+        }
+    return {
+        'type': geom['type'],
+        'coordinates': round_coordinates(geom['coordinates'], precision),
+    }
+
+
+#: Simplification levels, from the finest to the coarsest,
+#: as a tolerance (in degrees) and a coordinates precision (in decimals)
+SIMPLIFICATION_LEVELS = {
+    1: (0.0005, 5),
+    2: (0.005, 4),
+    3: (0.05, 3),
+}
+
+
+def _distance(point, start, end):
+    '''Distance from a point to a segment'''
+    (x, y), (x1, y1), (x2, y2) = point, start, end
+    dx, dy = x2 - x1, y2 - y1
+    if dx == 0 and dy == 0:
+        return ((x - x1) ** 2 + (y - y1) ** 2) ** 0.5
+    t = max(0, min(1, ((x - x1) * dx + (y - y1) * dy) / (dx * dx + dy * dy)))
+    px, py = x1 + t * dx, y1 + t * dy
+    return ((x - px) ** 2 + (y - py) ** 2) ** 0.5
+
+
+def simplify_line(points, tolerance):
+    '''Simplify a coordinates list using the Douglas-Peucker algorithm'''
+    if len(points) < 3:
+        return points
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        max_distance, index = 0, None
+        for i in range(start + 1, end):
+            distance = _distance(points[i], points[start], points[end])
+            if distance > max_distance:
+                max_distance, index = distance, i
+        if index is not None and max_distance > tolerance:
+            keep[index] = True
+            stack.extend(((start, index), (index, end)))
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def simplify_ring(ring, tolerance, precision):
+    '''
+    Simplify and quantize a linear ring.
+
+    Returns `None` if the ring collapses.
+    '''
+    ring = round_coordinates(simplify_line(ring, tolerance), precision)
+    # Quantization may produce duplicate consecutive points
+    ring = [p for i, p in enumerate(ring) if i == 0 or p != ring[i - 1]]
+    return ring if len(ring) >= 4 else None
+
+
+def simplify_polygon(polygon, tolerance, precision):
+    '''
+    Simplify a polygon coordinates, dropping the collapsed holes.
+
+    Returns `None` if the exterior ring collapses.
+    '''
+    exterior = simplify_ring(polygon[0], tolerance, precision) if polygon else None
+    if not exterior:
+        return None
+    holes = (simplify_ring(hole, tolerance, precision) for hole in polygon[1:])
+    return [exterior] + [hole for hole in holes if hole]
+
+
+def simplify(geom, level):
+    '''
+    Get a simplified copy of a `Polygon` or `MultiPolygon` geometry
+    for a given simplification level.
+
+    Collapsed polygons are dropped
+    unless all of them collapse, in which case only quantization is applied.
+    '''
+    if not geom or geom['type'] not in ('Polygon', 'MultiPolygon'):
+        return geom
+    tolerance, precision = SIMPLIFICATION_LEVELS[level]
+    if geom['type'] == 'Polygon':
+        coordinates = simplify_polygon(geom['coordinates'], tolerance, precision)
+    else:
+        polygons = (simplify_polygon(p, tolerance, precision)
+                    for p in geom['coordinates'])
+        coordinates = [p for p in polygons if p]
+    if not coordinates and geom['coordinates']:
+        return reduce_precision(geom, precision)
+    return {'type': geom['type'], 'coordinates': coordinates}
+
+
+def simplify_levels(geom):
+    '''Compute all the simplification levels of a geometry'''
+    if not geom:
+        return {}
+    return {str(level): simplify(geom, level) for level in SIMPLIFICATION_LEVELS}
@@ -10,11 +10,11 @@ from udata.i18n import _, L_, get_locale, language
 from udata.models import db
 from udata.core.storages import logos
 
-from . import geoids
+from . import geoids, geometry
 
 
 __all__ = (
-    'GeoLevel', 'GeoZone', 'SpatialCoverage', 'BASE_GRANULARITIES',
+    'GeoLevel', 'GeoZone', 'SpatialCoverage', 'ZoneCoverage', 'BASE_GRANULARITIES',
     'spatial_granularities',
 )
 
@@ -94,6 +94,8 @@ class GeoZone(db.Document):
     level = db.StringField(required=True)
     code = db.StringField(required=True)
     geom = db.MultiPolygonField(null=True)
+    # Simplified geometries by simplification level
+    simplified = db.DictField()
     parents = db.ListField()
     keys = db.DictField()
     validity = db.EmbeddedDocumentField(db.DateRange)
@@ -266,11 +268,25 @@ class GeoZone(db.Document):
     def is_current(self):
         return self.valid_at(date.today())
 
-    def toGeoJSON(self):
+    def get_geom(self, simplify=None):
+        '''
+        Get the zone geometry, simplified if a simplification level is given.
+
+        Simplified geometries are precomputed on load,
+        they are computed on the fly for zones loaded before.
+        '''
+        if not self.geom:
+            return EMPTY_GEOM
+        if not simplify:
+            return self.geom
+        simplified = (self.simplified or {}).get(str(simplify))
+        return simplified or geometry.simplify(self.geom, simplify)
+
+    def toGeoJSON(self, simplify=None):
         return {
             'id': self.id,
             'type': 'Feature',
-            'geometry': self.geom or EMPTY_GEOM,
+            'geometry': self.get_geom(simplify),
             'properties': {
                 'slug': self.slug,
                 'name': _(self.name),
@@ -286,6 +302,22 @@ class GeoZone(db.Document):
         }
 
 
+class ZoneCoverage(db.Document):
+    '''
+    Datasets count for a zone, including the datasets covering its children.
+
+    This collection is replaced by the `compute-spatial-coverage` job.
+    '''
+    id = db.StringField(primary_key=True)
+    level = db.StringField(required=True)
+    datasets = db.IntField(default=0)
+
+    meta = {
+        'collection': 'spatial_coverage',
+        'indexes': ['level'],
+    }
+
+
 @cache.memoize()
 def get_spatial_granularities(lang):
     with language(lang):
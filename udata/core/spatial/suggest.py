@@ -0,0 +1,120 @@
+'''
+In-process zones suggestion index.
+
+Current zones are indexed by their accent-folded name and code words prefixes
+and suggestions are ranked by level (biggest first) then population.
+
+The index is lazily built on first use and rebuilt:
+- when a zone is saved or deleted in the current process
+- when the index version stored in cache changes, ie. after `udata spatial load`
+'''
+import logging
+import re
+import unicodedata
+
+from mongoengine.signals import post_save, post_delete
+
+from udata.core.cached_index import CachedIndex
+
+from .models import GeoLevel, GeoZone, ADMIN_LEVEL_MAX
+
+log = logging.getLogger(__name__)
+
+#: Longest indexed prefix, longer terms are matched against candidates words
+MAX_PREFIX_LENGTH = 10
+
+RE_WORDS = re.compile(r'\w+')
+
+
+def fold(text):
+    '''Remove accents and case from a given text'''
+    normalized = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in normalized if not unicodedata.combining(c)).casefold()
+
+
+def words(text):
+    return RE_WORDS.findall(fold(text))
+
+
+class ZoneSuggestIndex(CachedIndex):
+    version_key = 'spatial-suggest-index-version'
+
+    def __init__(self):
+        super(ZoneSuggestIndex, self).__init__()
+        self.entries = []
+        self.words = []
+        self.prefixes = {}
+
+    def build(self):
+        '''Index all the current zones'''
+        admin_levels = dict(GeoLevel.objects.scalar('id', 'admin_level'))
+        zones = [
+            zone for zone in GeoZone.objects.only(
+                'id', 'name', 'code', 'level', 'keys', 'population', 'validity'
+            ) if zone.is_current
+        ]
+        zones.sort(key=lambda z: (
+            admin_levels.get(z.level) or ADMIN_LEVEL_MAX,
+            -(z.population or 0),
+            z.name,
+        ))
+        entries, entries_words, prefixes = [], [], {}
+        for index, zone in enumerate(zones):
+            entries.append({
+                'id': zone.id,
+                'name': zone.name,
+                'code': zone.code,
+                'level': zone.level,
+                'keys': zone.keys,
+            })
+            zone_words = set(words(zone.name) + words(zone.code))
+            entries_words.append(zone_words)
+            zone_prefixes = set(
+                word[:length]
+                for word in zone_words
+                for length in range(1, min(len(word), MAX_PREFIX_LENGTH) + 1)
+            )
+            for prefix in zone_prefixes:
+                prefixes.setdefault(prefix, []).append(index)
+        self.entries, self.words, self.prefixes = entries, entries_words, prefixes
+        log.debug('Indexed %s zones for suggestion', len(entries))
+
+    def suggest(self, q, size=10):
+        '''
+        Suggest zones whose name or code words start with each query word.
+
+        Suggestions are returned as dictionaries ordered by rank.
+        '''
+        self.ensure_fresh()
+        terms = words(q)
+        if not terms:
+            return []
+        candidates = []
+        for term in terms:
+            indexes = self.prefixes.get(term[:MAX_PREFIX_LENGTH])
+            if not indexes:
+                return []
+            candidates.append(indexes)
+        results = []
+        for index in min(candidates, key=len):
+            zone_words = self.words[index]
+            if all(any(w.startswith(t) for w in zone_words) for t in terms):
+                results.append(self.entries[index])
+                if len(results) >= size:
+                    break
+        return results
+
+
+index = ZoneSuggestIndex()
+
+post_save.connect(index.mark_dirty, sender=GeoZone)
+post_delete.connect(index.mark_dirty, sender=GeoZone)
+
+
+def suggest(q, size=10):
+    return index.suggest(q, size)
+
+
+def invalidate():
+    '''Trigger the suggestion index rebuild in all processes'''
+    index.invalidate()
@@ -0,0 +1,60 @@
+import logging
+
+from udata.models import Dataset
+from udata.tasks import job
+
+from .models import GeoZone, ZoneCoverage
+
+log = logging.getLogger(__name__)
+
+
+def coverage_pipeline():
+    '''
+    Count datasets by zone, including the datasets covering its children,
+    and replace the coverage collection with the result.
+
+    A dataset covers its zones and all their parents.
+    '''
+    geozones = GeoZone._get_collection_name()
+    return [
+        {'$match': {'spatial.zones.0': {'$exists': True}}},
+        {'$project': {'zones': '$spatial.zones', 'zone': '$spatial.zones'}},
+        {'$unwind': '$zone'},
+        {'$lookup': {
+            'from': geozones,
+            'localField': 'zone',
+            'foreignField': '_id',
+            'as': 'geozone',
+        }},
+        {'$unwind': {'path': '$geozone', 'preserveNullAndEmptyArrays': True}},
+        {'$project': {'covered': {
+            '$concatArrays': ['$zones', {'$ifNull': ['$geozone.parents', []]}]
+        }}},
+        {'$unwind': '$covered'},
+        # Count each dataset only once by zone
+        {'$group': {'_id': {'dataset': '$_id', 'zone': '$covered'}}},
+        {'$group': {'_id': '$_id.zone', 'datasets': {'$sum': 1}}},
+        {'$lookup': {
+            'from': geozones,
+            'localField': '_id',
+            'foreignField': '_id',
+            'as': 'zone',
+        }},
+        {'$unwind': '$zone'},
+        {'$project': {'level': '$zone.level', 'datasets': 1}},
+        {'$out': ZoneCoverage._get_collection_name()},
+    ]
+
+
+def compute_coverage():
+    '''Compute the datasets count by zone in a single aggregation'''
+    ZoneCoverage.ensure_indexes()
+    list(Dataset._get_collection().aggregate(coverage_pipeline(), allowDiskUse=True))
+    return ZoneCoverage.objects.count()
+
+
+@job('compute-spatial-coverage')
+def compute_spatial_coverage(self):
+    '''Compute the datasets count by zone used by the coverage API'''
+    total = compute_coverage()
+    log.info('Computed spatial coverage for %s zones', total)
@@ -13,6 +13,8 @@ from udata.core.dataset.factories import VisibleDatasetFactory
 from udata.core.spatial.factories import (
     SpatialCoverageFactory, GeoZoneFactory, GeoLevelFactory
 )
+from udata.core.spatial.geometry import reduce_precision, simplify
+from udata.core.spatial.tasks import compute_coverage
 
 
 class SpatialApiTest(APITestCase):
@@ -42,6 +44,34 @@ class SpatialApiTest(APITestCase):
         self.assertEqual(properties['keys'], zone.keys)
         self.assertEqual(properties['logo'], zone.logo_url(external=True))
 
+    def test_zones_api_simplified(self):
+        zone = GeoZoneFactory()
+        zone.simplified = {'2': {
+            'type': 'MultiPolygon',
+            'coordinates': [[[[0, 0], [1, 0], [1, 1], [0, 0]]]],
+        }}
+        zone.save()
+
+        url = url_for('api.zones', ids=[zone.id], simplify=2)
+        response = self.get(url)
+        self.assert200(response)
+
+        [feature] = response.json['features']
+        assert_json_equal(feature['geometry'], zone.simplified['2'])
+
+    def test_zone_api_simplified_on_the_fly(self):
+        zone = GeoZoneFactory()
+
+        response = self.get(url_for('api.zone', id=zone.id, simplify=1))
+        self.assert200(response)
+        assert_json_equal(response.json['geometry'], simplify(zone.geom, 1))
+
+    def test_zone_api_bad_simplify(self):
+        zone = GeoZoneFactory()
+
+        response = self.get(url_for('api.zone', id=zone.id, simplify=42))
+        self.assert400(response)
+
     def test_zones_api_no_geom(self):
         zone = GeoZoneFactory(geom=None)
 
@@ -303,6 +333,8 @@ class SpatialApiTest(APITestCase):
             VisibleDatasetFactory(
                 spatial=SpatialCoverageFactory(zones=[zone.id]))
 
+        compute_coverage()
+
         response = self.get(url_for('api.spatial_coverage', level='sub'))
         self.assert200(response)
         self.assertEqual(len(response.json['features']), len(subzones))
@@ -312,7 +344,7 @@ class SpatialApiTest(APITestCase):
 
             zone = get_by(subzones, 'id', feature['id'])
             self.assertIsNotNone(zone)
-            assert_json_equal(feature['geometry'], zone.geom)
+            assert_json_equal(feature['geometry'], reduce_precision(zone.geom, 3))
 
             properties = feature['properties']
             self.assertEqual(properties['name'], zone.name)
@@ -321,6 +353,31 @@ class SpatialApiTest(APITestCase):
             # Nested levels datasets should be counted
             self.assertEqual(properties['datasets'], 3)
 
+    def test_coverage_not_computed(self):
+        GeoLevelFactory(id='top')
+        zone = GeoZoneFactory(level='top')
+        VisibleDatasetFactory(spatial=SpatialCoverageFactory(zones=[zone.id]))
+
+        response = self.get(url_for('api.spatial_coverage', level='top'))
+        self.assert200(response)
+        [feature] = response.json['features']
+        self.assertEqual(feature['properties']['datasets'], 0)
+
+    def test_coverage_count_datasets_once(self):
+        GeoLevelFactory(id='top')
+        GeoLevelFactory(id='sub', parents=['top'])
+        zone = GeoZoneFactory(level='top')
+        subzones = GeoZoneFactory.create_batch(2, level='sub', parents=[zone.id])
+        VisibleDatasetFactory(spatial=SpatialCoverageFactory(
+            zones=[zone.id] + [z.id for z in subzones]))
+
+        compute_coverage()
+
+        response = self.get(url_for('api.spatial_coverage', level='top'))
+        self.assert200(response)
+        [feature] = response.json['features']
+        self.assertEqual(feature['properties']['datasets'], 1)
+
     def test_zone_children(self):
         paca, bdr, arles = create_geozones_fixtures()
 
@@ -0,0 +1,81 @@
+import io
+import lzma
+import tarfile
+
+import msgpack
+import pytest
+
+from udata.core.spatial.factories import GeoZoneFactory
+from udata.core.spatial.models import GeoLevel, GeoZone
+
+pytestmark = pytest.mark.usefixtures('clean_db', 'instance_path')
+
+LEVELS = [
+    {'id': 'country', 'label': 'Country', 'parents': [], 'admin_level': 10},
+    {'id': 'region', 'label': 'Region', 'parents': ['country'], 'admin_level': 40},
+]
+
+GEOM = {'type': 'MultiPolygon', 'coordinates': [[[[0, 0], [1, 0], [1, 1], [0, 0]]]]}
+
+
+def zone(code, level='region', **kwargs):
+    data = {
+        '_id': '{0}:{1}'.format(level, code),
+        'level': level,
+        'code': code,
+        'name': 'Zone {0}'.format(code),
+        'geom': GEOM,
+    }
+    data.update(kwargs)
+    return data
+
+
+@pytest.fixture
+def archive(tmpdir):
+    def build(levels, zones):
+        path = str(tmpdir / 'geozones.tar.xz')
+        with lzma.open(path, 'wb') as xz:
+            with tarfile.open(fileobj=xz, mode='w') as tar:
+                for name, items in (('levels', levels), ('zones', [{}] + zones)):
+                    content = b''.join(msgpack.packb(item) for item in items)
+                    info = tarfile.TarInfo('{0}.msgpack'.format(name))
+                    info.size = len(content)
+                    tar.addfile(info, io.BytesIO(content))
+        return path
+    return build
+
+
+class SpatialLoadTest:
+    def test_load(self, cli, archive):
+        zones = [zone(str(i)) for i in range(5)]
+        path = archive(LEVELS, zones + [zone('bad', geom={'type': 'Point'})])
+
+        cli('spatial', 'load', path, '--batch-size', '2')
+
+        assert GeoLevel.objects.count() == 2
+        assert GeoLevel.objects.get(id='region').parents[0].id == 'country'
+        assert GeoZone.objects.count() == 5
+        loaded = GeoZone.objects.get(id='region:1')
+        assert loaded.name == 'Zone 1'
+        assert loaded.slug == 'Zone-1'
+        assert loaded.geom == GEOM
+        assert sorted(loaded.simplified.keys()) == ['1', '2', '3']
+
+    def test_load_update_existing(self, cli, archive):
+        existing = GeoZoneFactory(id='region:1', level='region', code='1', name='Old')
+        other = GeoZoneFactory()
+        path = archive(LEVELS, [zone('1'), zone('2')])
+
+        cli('spatial', 'load', path)
+
+        assert GeoZone.objects.count() == 3
+        assert GeoZone.objects.get(id=existing.id).name == 'Zone 1'
+        assert GeoZone.objects.get(id=other.id).name == other.name
+
+    def test_load_drop(self, cli, archive):
+        GeoZoneFactory()
+        path = archive(LEVELS, [zone('1'), zone('2')])
+
+        cli('spatial', 'load', path, '--drop', '--batch-size', '1')
+
+        assert sorted(GeoZone.objects.scalar('id')) == ['region:1', 'region:2']
@@ -0,0 +1,68 @@
+from udata.core.spatial.geometry import (
+    SIMPLIFICATION_LEVELS, reduce_precision, simplify, simplify_levels, simplify_line
+)
+
+
+class ReducePrecisionTest:
+    def test_multipolygon(self):
+        geom = {
+            'type': 'MultiPolygon',
+            'coordinates': [[[
+                [1.123456, 2.987654], [3.5, 4.00001], [1.123456, 2.987654]
+            ]]],
+        }
+        assert reduce_precision(geom, 2) == {
+            'type': 'MultiPolygon',
+            'coordinates': [[[[1.12, 2.99], [3.5, 4.0], [1.12, 2.99]]]],
+        }
+
+    def test_empty(self):
+        assert reduce_precision(None, 2) is None
+        geom = {'type': 'MultiPolygon', 'coordinates': []}
+        assert reduce_precision(geom, 2) == geom
+
+    def test_geometry_collection(self):
+        geom = {
+            'type': 'GeometryCollection',
+            'geometries': [{'type': 'Point', 'coordinates': [1.2345, 6.789]}],
+        }
+        assert reduce_precision(geom, 1) == {
+            'type': 'GeometryCollection',
+            'geometries': [{'type': 'Point', 'coordinates': [1.2, 6.8]}],
+        }
+
+
+SQUARE = [[0, 0], [0.5, 0.00001], [1, 0], [1, 1], [0, 1], [0, 0]]
+
+
+class SimplifyTest:
+    def test_simplify_line(self):
+        points = [[0, 0], [1, 0.1], [2, -0.1], [3, 5], [4, 6],
+                  [5, 7], [6, 8.1], [7, 9], [8, 9], [9, 9]]
+        assert simplify_line(points, 1) == [[0, 0], [2, -0.1], [3, 5], [7, 9], [9, 9]]
+
+    def test_simplify_polygon(self):
+        geom = {'type': 'Polygon', 'coordinates': [SQUARE]}
+        assert simplify(geom, 3) == {
+            'type': 'Polygon',
+            'coordinates': [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+        }
+
+    def test_simplify_drop_collapsed_polygons_and_holes(self):
+        tiny = [[5, 5], [5.0001, 5], [5.0001, 5.0001], [5, 5]]
+        geom = {'type': 'MultiPolygon', 'coordinates': [[SQUARE, tiny], [tiny]]}
+        assert simplify(geom, 3) == {
+            'type': 'MultiPolygon',
+            'coordinates': [[[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]]],
+        }
+
+    def test_simplify_keep_quantized_geometry_if_everything_collapse(self):
+        tiny = [[5, 5], [5.0001, 5], [5.0001, 5.0001], [5, 5]]
+        geom = {'type': 'MultiPolygon', 'coordinates': [[tiny]]}
+        assert simplify(geom, 3) == reduce_precision(geom, 3)
+
+    def test_simplify_levels(self):
+        geom = {'type': 'MultiPolygon', 'coordinates': [[SQUARE]]}
+        levels = simplify_levels(geom)
+        assert sorted(levels.keys()) == [str(level) for level in sorted(SIMPLIFICATION_LEVELS)]
+        assert simplify_levels(None) == {}
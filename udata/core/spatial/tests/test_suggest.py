@@ -0,0 +1,58 @@
+import pytest
+
+from udata.app import cache
+from udata.core.spatial import suggest
+from udata.core.spatial.factories import GeoLevelFactory, GeoZoneFactory
+from udata.core.spatial.models import GeoZone
+
+pytestmark = pytest.mark.usefixtures('clean_db')
+
+
+def names(suggestions):
+    return [s['name'] for s in suggestions]
+
+
+class ZoneSuggestIndexTest:
+    def test_fold(self):
+        assert suggest.fold('Île-de-FRANCE') == 'ile-de-france'
+
+    def test_match_words_prefixes(self):
+        GeoZoneFactory(name='Saint-Étienne', is_current=True)
+        GeoZoneFactory(name='Étampes', is_current=True)
+
+        assert names(suggest.suggest('etienne')) == ['Saint-Étienne']
+        assert names(suggest.suggest('saint eti')) == ['Saint-Étienne']
+        assert names(suggest.suggest('ÉTA')) == ['Étampes']
+        assert suggest.suggest('tienne') == []
+
+    def test_long_terms(self):
+        GeoZoneFactory(name='Villeneuve-d\'Ascq', is_current=True)
+        GeoZoneFactory(name='Villeneuvette', is_current=True)
+
+        assert names(suggest.suggest('villeneuve')) == ['Villeneuve-d\'Ascq', 'Villeneuvette']
+        assert names(suggest.suggest('villeneuvet')) == ['Villeneuvette']
+
+    def test_rank_by_level_and_population(self):
+        GeoLevelFactory(id='country', admin_level=10)
+        GeoLevelFactory(id='town', admin_level=80)
+        GeoZoneFactory(name='Paris small', level='town', population=10, is_current=True)
+        GeoZoneFactory(name='Paris big', level='town', population=1000, is_current=True)
+        GeoZoneFactory(name='Paris country', level='country', population=1, is_current=True)
+
+        assert names(suggest.suggest('paris')) == ['Paris country', 'Paris big', 'Paris small']
+        assert names(suggest.suggest('paris', size=1)) == ['Paris country']
+
+    def test_rebuild_on_version_change(self, app):
+        app.config['CACHE_TYPE'] = 'simple'
+        cache.init_app(app)
+        zone = GeoZoneFactory(name='Lyon', is_current=True)
+        assert names(suggest.suggest('lyon')) == ['Lyon']
+
+        # Bypass signals
+        GeoZone.objects(id=zone.id).update(name='Marseille')
+        suggest.invalidate()
+        suggest.index.dirty = False
+        suggest.index.checked_at = 0
+
+        assert suggest.suggest('lyon') == []
+        assert names(suggest.suggest('marseille')) == ['Marseille']
@@ -12,6 +12,9 @@ from . import utils, chunks
 
 META = 'meta.json'
 
+#: Mime type of combined files without a known extension
+DEFAULT_MIME = 'application/octet-stream'
+
 IMAGES_MIMETYPES = ('image/jpeg', 'image/png', 'image/webp')
 
 
@@ -105,25 +108,41 @@ def save_chunk(file, args):
     raise UploadProgress()
 
 
-def combine_chunks(storage, args, prefix=None):
+def combine_chunks(storage, args, prefix=None, algorithms=('sha1',)):
     '''
     Combine a chunked file into a whole file again.
     Goes through each part, in order,
-    and appends that part's bytes to another destination file.
+    and streams that part's bytes to another destination file.
     Chunks are stored in the chunks storage.
+
+    Size and digests for the given `algorithms` are computed on the fly
+    and returned as metadata, like `storage.metadata()` would,
+    so the combined file does not need to be read again.
     '''
     uuid = args['uuid']
     # Normalize filename including extension
     target = utils.normalize(args['filename'])
     if prefix:
         target = os.path.join(prefix, target)
+    digests = utils.Digests(*algorithms)
     with storage.open(target, 'wb') as out:
         for i in range(args['totalparts']):
             partname = chunk_filename(uuid, i)
-            out.write(chunks.read(partname))
+            with chunks.open(partname, 'rb') as part:
+                utils.copy(part, out, digests)
             chunks.delete(partname)
     chunks.delete(chunk_filename(uuid, META))
-    return target
+    metadata = digests.hexdigests()
+    metadata.update({
+        'filename': os.path.basename(target),
+        'url': storage.url(target, external=True),
+        'checksum': '{0}:{1}'.format(algorithms[0], metadata.pop(algorithms[0])),
+        'size': digests.size,
+        'mime': utils.mime(target) or DEFAULT_MIME,
+        'modified': datetime.now(),
+        'fs_filename': target,
+    })
+    return metadata
 
 
 def handle_upload(storage, prefix=None):
@@ -135,7 +154,7 @@ def handle_upload(storage, prefix=None):
         if uploaded_file:
             save_chunk(uploaded_file, args)
         else:
-            fs_filename = combine_chunks(storage, args, prefix=prefix)
+            metadata = combine_chunks(storage, args, prefix=prefix)
     elif not uploaded_file:
         raise UploadError('Missing file parameter')
     else:
@@ -146,13 +165,13 @@ def handle_upload(storage, prefix=None):
             prefix=prefix,
             filename=filename
         )
+        metadata = storage.metadata(fs_filename)
+        metadata['fs_filename'] = fs_filename
 
-    metadata = storage.metadata(fs_filename)
-    metadata['fs_filename'] = fs_filename
     checksum = metadata.pop('checksum')
     algo, checksum = checksum.split(':', 1)
     metadata[algo] = checksum
-    metadata['format'] = utils.extension(fs_filename)
+    metadata['format'] = utils.extension(metadata['fs_filename'])
     return metadata
 
 
@@ -34,10 +34,44 @@ def md5(file):
 
 def crc32(file):
     '''Perform a CRC digest on a file'''
-    value = zlib.crc32(file.read())
+    value = 0
+    while True:
+        read_data = file.read(CHUNK_SIZE)
+        if not read_data:
+            break
+        value = zlib.crc32(read_data, value)
     return '%08X' % (value & 0xFFFFFFFF)
 
 
+class Digests(object):
+    '''Compute the size and some digests (ie. `sha1`, `md5`) of a stream in a single pass'''
+    def __init__(self, *algorithms):
+        self.hashers = {algorithm: hashlib.new(algorithm) for algorithm in algorithms}
+        self.size = 0
+
+    def update(self, data):
+        self.size += len(data)
+        for hasher in self.hashers.values():
+            hasher.update(data)
+
+    def hexdigests(self):
+        return {algorithm: hasher.hexdigest() for algorithm, hasher in self.hashers.items()}
+
+
+def copy(src, dst, digests=None, buffer_size=CHUNK_SIZE):
+    '''
+    Copy a file-like object into another one using a fixed size buffer,
+    updating the given `Digests` on the fly.
+    '''
+    while True:
+        data = src.read(buffer_size)
+        if not data:
+            break
+        dst.write(data)
+        if digests is not None:
+            digests.update(data)
+
+
 def mime(url):
     '''Get the mimetype from an url or a filename'''
     return mimetypes.guess_type(url)[0]
@@ -1,7 +1,6 @@
 from udata.api import api, API
 
-from udata.tags import slug  # TODO: merge this into this package
-from udata.models import Tag
+from . import suggest
 
 DEFAULT_SIZE = 8
 
@@ -23,6 +22,4 @@ class SuggestTagsAPI(API):
     def get(self):
         '''Suggest tags'''
         args = parser.parse_args()
-        q = slug(args['q'])
-        results = [{'text': i.name} for i in Tag.objects(name__icontains=q).limit(args['size'])]
-        return sorted(results, key=lambda o: len(o['text']))
+        return [{'text': name} for name in suggest.suggest(args['q'], args['size'])]
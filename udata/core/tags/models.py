@@ -10,12 +10,14 @@ __all__ = ('Tag', )
 
 class Tag(db.Document):
     '''
-    This collection is auto-populated every hour map-reducing tag properties
+    This collection is auto-populated every hour aggregating tag properties
     from Datasets dans Reuses.
     '''
     name = db.StringField(required=True, unique=True)
     counts = db.DictField()
     total = db.IntField(default=0)
+    # Added to or removed from a document since the last count
+    touched = db.BooleanField()
 
     meta = {
         'indexes': ['name', '-total'],
@@ -0,0 +1,88 @@
+'''
+In-process tags suggestion index.
+
+Tags are indexed by their name prefixes and their words (`-` separated) prefixes
+and suggestions are ranked by popularity (ie. `Tag.total`).
+
+The `count-tags` job bumps the index version stored in cache once counts are updated.
+Each process lazily builds its index on first use and rebuilds it when the version changes.
+The previous index is swapped as a whole once the new one is built
+and is still served by concurrent requests in the meantime.
+'''
+import logging
+
+from udata.core.cached_index import CachedIndex
+from udata.tags import slug
+
+from .models import Tag
+
+log = logging.getLogger(__name__)
+
+#: Longest indexed prefix, longer terms are matched against candidates names
+MAX_PREFIX_LENGTH = 10
+
+
+def prefixes(name):
+    '''All the indexed prefixes of a tag name'''
+    parts = [name] + [word for word in name.split('-') if word]
+    return set(
+        part[:length]
+        for part in parts
+        for length in range(1, min(len(part), MAX_PREFIX_LENGTH) + 1)
+    )
+
+
+def matches(name, term):
+    return name.startswith(term) or any(w.startswith(term) for w in name.split('-'))
+
+
+class TagSuggestIndex(CachedIndex):
+    version_key = 'tags-suggest-index-version'
+    # `(names, prefixes)` are swapped as a whole on rebuild
+    serve_stale = True
+
+    def __init__(self):
+        super(TagSuggestIndex, self).__init__()
+        self.data = ([], {})
+
+    def build(self):
+        '''Index all the tags by decreasing popularity'''
+        names, index = [], {}
+        tags = Tag.objects.order_by('-total', 'name').scalar('name')
+        for position, name in enumerate(tags):
+            names.append(name)
+            for prefix in prefixes(name):
+                index.setdefault(prefix, []).append(position)
+        self.data = (names, index)
+        log.debug('Indexed %s tags for suggestion', len(names))
+
+    def suggest(self, q, size=10):
+        '''
+        Suggest the most popular tags starting with the query
+        or having a word starting with the query.
+        '''
+        self.ensure_fresh()
+        term = slug(q or '')
+        if not term:
+            return []
+        names, index = self.data
+        results = []
+        for position in index.get(term[:MAX_PREFIX_LENGTH], []):
+            name = names[position]
+            if len(term) <= MAX_PREFIX_LENGTH or matches(name, term):
+                results.append(name)
+                if len(results) >= size:
+                    break
+        return results
+
+
+index = TagSuggestIndex()
+
+
+def suggest(q, size=10):
+    return index.suggest(q, size)
+
+
+def invalidate():
+    '''Trigger the suggestion index rebuild in all processes'''
+    index.invalidate()
@@ -1,45 +1,139 @@
 import logging
 
+from mongoengine.signals import pre_save, post_save, post_delete
+from pymongo import UpdateOne
+
 from udata.models import Dataset, Reuse
 from udata.tasks import job
+from udata.utils import to_bool
 
+from . import suggest
 from .models import Tag
 
 log = logging.getLogger(__name__)
 
-map_tags = '''
-function() {
-    this.tags.forEach(function(tag) {
-        emit(tag, 1);
-    });
-}
-'''
-
-reduce_tags = '''
-function(key, values) {
-    var total = 0;
-    for(var i = 0; i < values.length; i++) {
-        total += values[i];
-    }
-    return total;
-}
-'''
-
 TAGGED = {
     'datasets': Dataset,
     'reuses': Reuse,
 }
 
+#: Stale tags are deleted by batches of this size
+DELETE_BATCH_SIZE = 1000
 
-@job('count-tags')
-def count_tags(self):
-    '''Count tag occurences by type and update the tag collection'''
+
+def tags_pipeline(names=None):
+    '''
+    Aggregation pipeline counting tags occurences.
+
+    If `names` is given, only those tags are counted.
+    '''
+    match = {'tags': {'$in': names}} if names is not None else {'tags': {'$exists': True}}
+    pipeline = [
+        {'$match': match},
+        {'$project': {'tags': 1}},
+        {'$unwind': '$tags'},
+    ]
+    if names is not None:
+        pipeline.append({'$match': match})
+    pipeline.append({'$group': {'_id': '$tags', 'count': {'$sum': 1}}})
+    return pipeline
+
+
+def touch_tags(names):
+    '''Mark some tags to be recounted by the next incremental run'''
+    names = set(name for name in names if name)
+    if names:
+        Tag._get_collection().bulk_write([
+            UpdateOne({'name': name},
+                      {'$set': {'touched': True}, '$setOnInsert': {'counts': {}, 'total': 0}},
+                      upsert=True)
+            for name in names
+        ], ordered=False)
+
+
+def touched_tags():
+    '''
+    Get the touched tags and clear their mark.
+
+    The mark is cleared before counting so a tag touched meanwhile
+    will be recounted by the next run.
+    '''
+    names = list(Tag.objects(touched=True).scalar('name'))
+    Tag.objects(name__in=names).update(unset__touched=True)
+    return names
+
+
+def on_tagged_pre_save(sender, document, **kwargs):
+    '''Keep the tags added or removed by this save'''
+    if not document.id:
+        document._touched_tags = set(document.tags)
+    elif 'tags' in document._get_changed_fields():
+        previous = sender.objects(id=document.id).scalar('tags').first() or []
+        document._touched_tags = set(previous).symmetric_difference(document.tags)
+
+
+def on_tagged_post_save(sender, document, **kwargs):
+    '''Touch the tags once written so an incremental run can't miss them'''
+    touched = getattr(document, '_touched_tags', None)
+    if touched:
+        touch_tags(touched)
+        del document._touched_tags
+
+
+def on_tagged_post_delete(sender, document, **kwargs):
+    touch_tags(document.tags)
+
+
+for model in TAGGED.values():
+    pre_save.connect(on_tagged_pre_save, sender=model)
+    post_save.connect(on_tagged_post_save, sender=model)
+    post_delete.connect(on_tagged_post_delete, sender=model)
+
+
+def count_by_model(names=None):
+    '''Get each tag occurences count by model'''
+    counts = {}
+    if names is not None and not names:
+        return counts
     for key, model in TAGGED.items():
-        collection = '{0}_tags'.format(key)
-        results = (model.objects(tags__exists=True)
-                        .map_reduce(map_tags, reduce_tags, collection))
-        for result in results:
-            tag, created = Tag.objects.get_or_create(name=result.key,
-                                                     auto_save=False)
-            tag.counts[key] = int(result.value) if result.value else 0
-            tag.save()
+        for row in model._get_collection().aggregate(tags_pipeline(names)):
+            if row['_id']:
+                counts.setdefault(row['_id'], {})[key] = row['count']
+    return counts
+
+
+def delete_tags(names):
+    '''Delete some unused tags, unless they have been touched since they were counted'''
+    names = list(names)
+    for start in range(0, len(names), DELETE_BATCH_SIZE):
+        batch = names[start:start + DELETE_BATCH_SIZE]
+        Tag.objects(name__in=batch, touched__ne=True).delete()
+
+
+@job('count-tags')
+def count_tags(self, incremental=False):
+    '''
+    Count tag occurences by type and update the tag collection.
+
+    With `incremental`, only the tags added to or removed from
+    a dataset or a reuse since the last run are counted.
+    Tags are touched on documents saves and deletions:
+    queryset updates bypass this tracking until the next full run.
+    '''
+    if to_bool(incremental):
+        names = touched_tags()
+    else:
+        names = None
+        Tag.objects(touched=True).update(unset__touched=True)
+    counts = count_by_model(names)
+    if counts:
+        Tag._get_collection().bulk_write([
+            UpdateOne({'name': name},
+                      {'$set': {'counts': by_model, 'total': sum(by_model.values())}},
+                      upsert=True)
+            for name, by_model in counts.items()
+        ], ordered=False)
+    counted = names if names is not None else Tag.objects.scalar('name')
+    delete_tags(set(counted) - set(counts))
+    log.info('Counted %s tags', len(counts))
+    suggest.invalidate()
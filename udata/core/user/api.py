@@ -215,7 +215,7 @@ class ApiKeyAPI(API):
     @api.response(204, 'API Key deleted/cleared')
     def delete(self):
         '''Clear/destroy an apikey'''
-        current_user.apikey = None
+        current_user.clear_api_key()
         current_user.save()
         return '', 204
 
@@ -1,6 +1,5 @@
 from copy import copy
 from datetime import datetime
-from itertools import chain
 from time import time
 
 from blinker import Signal
@@ -12,6 +11,7 @@ from itsdangerous import JSONWebSignatureSerializer
 from werkzeug import cached_property
 
 from udata import mail
+from udata.auth import credentials
 from udata.uris import endpoint_for
 from udata.frontend.markdown import mdstrip
 from udata.i18n import lazy_gettext as _
@@ -23,6 +23,9 @@ __all__ = ('User', 'Role', 'datastore')
 
 AVATAR_SIZES = [500, 200, 100, 32, 25]
 
+#: Fields invalidating the cached API key authentication on change
+AUTH_FIELDS = {'active', 'deleted', 'roles'}
+
 
 # TODO: use simple text for role
 class Role(db.Document, RoleMixin):
@@ -131,35 +134,25 @@ class User(WithMetrics, UserMixin, db.Document):
         return count > 0 and self.active
 
     @cached_property
+    def organizations_rollups(self):
+        """Return the (cached) rollups of the user's organizations."""
+        from udata.core.organization import rollups  # Circular imports.
+        return rollups.get(self.organizations.scalar('id'))
+
+    @property
     def resources_availability(self):
         """Return the percentage of availability for resources."""
-        # Flatten the list.
-        availabilities = list(
-            chain(
-                *[org.check_availability() for org in self.organizations]
-            )
-        )
-        # Filter out the unknown
-        availabilities = [a for a in availabilities if type(a) is bool]
-        if availabilities:
-            # Trick will work because it's a sum() of booleans.
-            return round(100. * sum(availabilities) / len(availabilities), 2)
-        # if nothing is unavailable, everything is considered OK
-        return 100
+        return self.organizations_rollups['resources_availability']
 
-    @cached_property
+    @property
     def datasets_org_count(self):
         """Return the number of datasets of user's organizations."""
-        from udata.models import Dataset  # Circular imports.
-        return sum(Dataset.objects(organization=org).visible().count()
-                   for org in self.organizations)
+        return self.organizations_rollups['datasets']
 
-    @cached_property
+    @property
     def followers_org_count(self):
         """Return the number of followers of user's organizations."""
-        from udata.models import Follow  # Circular imports.
-        return sum(Follow.objects(following=org).count()
-                   for org in self.organizations)
+        return self.organizations_rollups['followers']
 
     @property
     def datasets_count(self):
@@ -171,7 +164,13 @@ class User(WithMetrics, UserMixin, db.Document):
         """Return the number of followers of the user."""
         return self.metrics.get('followers', 0)
 
+    def _keep_previous_apikey(self):
+        # The stored API key is invalidated once the new one has been saved
+        if not hasattr(self, '_previous_apikey'):
+            self._previous_apikey = self.apikey
+
     def generate_api_key(self):
+        self._keep_previous_apikey()
         s = JSONWebSignatureSerializer(current_app.config['SECRET_KEY'])
         byte_str = s.dumps({
             'user': str(self.id),
@@ -180,6 +179,7 @@ class User(WithMetrics, UserMixin, db.Document):
         self.apikey = byte_str.decode()
 
     def clear_api_key(self):
+        self._keep_previous_apikey()
         self.apikey = None
 
     @classmethod
@@ -193,6 +193,11 @@ class User(WithMetrics, UserMixin, db.Document):
 
     @classmethod
     def post_save(cls, sender, document, **kwargs):
+        if AUTH_FIELDS.intersection(document._get_changed_fields()):
+            credentials.invalidate(credentials.APIKEY, document.apikey)
+        if hasattr(document, '_previous_apikey'):
+            credentials.invalidate(credentials.APIKEY, document._previous_apikey)
+            del document._previous_apikey
         cls.after_save.send(document)
         if kwargs.get('created'):
             cls.on_create.send(document)
@@ -239,7 +244,7 @@ class User(WithMetrics, UserMixin, db.Document):
         self.website = None
         self.about = None
         self.extras = None
-        self.apikey = None
+        self.clear_api_key()
         self.deleted = datetime.now()
         self.save()
         for organization in self.organizations:
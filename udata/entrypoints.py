@@ -15,6 +15,10 @@ ENTRYPOINTS = {
 }
 
 
+#: Enabled entrypoints loaded once per process, by group and enabled plugins
+_registry = {}
+
+
 class EntrypointError(Exception):
     pass
 
@@ -29,20 +33,42 @@ def get_all(entrypoint_key):
     return dict(_ep_to_kv(e) for e in iter_all(entrypoint_key))
 
 
+def _enabled(name, app):
+    '''
+    Get the registry of entrypoints registered on name and enabled for the given app.
+
+    Entrypoints are only resolved and loaded on first lookup.
+    '''
+    plugins = tuple(app.config['PLUGINS'])
+    key = (name, plugins)
+    if key not in _registry:
+        _registry[key] = dict(
+            _ep_to_kv(e) for e in iter_all(name)
+            if e.name in plugins or e.name.startswith(plugins)
+        )
+    return _registry[key]
+
+
 def get_enabled(name, app):
     '''
     Get (and load) entrypoints registered on name
     and enabled for the given app.
+
+    Entrypoints are loaded once per process, see `reload()`.
     '''
-    plugins = app.config['PLUGINS']
-    return dict(_ep_to_kv(e) for e in iter_all(name) if e.name in plugins or e.name.startswith(tuple(plugins)))
+    return dict(_enabled(name, app))
 
 
 def get_plugin_module(name, app, plugin):
     '''
     Get the module for a given plugin
     '''
-    return next((m for p, m in get_enabled(name, app).items() if p == plugin), None)
+    return _enabled(name, app).get(plugin)
+
+
+def reload():
+    '''Forget the loaded entrypoints so they are resolved again on next lookup'''
+    _registry.clear()
 
 
 def _ep_to_kv(entrypoint):
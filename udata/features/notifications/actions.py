@@ -1,9 +1,21 @@
 import logging
 
+from datetime import datetime, timedelta
+
+from flask import current_app
+from pymongo import ReturnDocument
+
+from udata.models import Organization
+
+from .models import Inbox
+
 log = logging.getLogger(__name__)
 
 _providers = {}
 
+#: Number of attempts to store a built inbox while events are touching it
+BUILD_ATTEMPTS = 3
+
 
 def register_provider(name, func):
     '''Register a notification provder'''
@@ -23,8 +35,8 @@ def notifier(name):
     return wrapper
 
 
-def get_notifications(user):
-    '''List notification for a given user'''
+def compute_notifications(user):
+    '''Compute notifications for a given user from all the providers'''
     notifications = []
 
     for name, func in _providers.items():
@@ -35,3 +47,125 @@ def get_notifications(user):
         } for dt, details in func(user)])
 
     return notifications
+
+
+def build_inbox(user):
+    '''
+    Build a user inbox from the providers.
+
+    The inbox is marked as being built first so the events happening
+    while the providers are queried touch it. The built notifications
+    are then only stored if the inbox has not been touched meanwhile,
+    otherwise they are computed again.
+    '''
+    collection = Inbox._get_collection()
+    notifications = []
+    for _ in range(BUILD_ATTEMPTS):
+        started = datetime.now()
+        inbox = collection.find_one_and_update({'user': user.id}, {
+            '$set': {'built_at': None},
+            '$setOnInsert': {'notifications': []},
+            '$max': {'touches': 0},
+        }, projection={'touches': 1}, upsert=True, return_document=ReturnDocument.AFTER)
+        notifications = compute_notifications(user)
+        result = collection.update_one({'user': user.id, 'touches': inbox['touches']}, {
+            '$set': {'notifications': notifications, 'built_at': started},
+        })
+        if result.matched_count:
+            break
+    else:
+        log.warning('Unable to store the notifications inbox of user %s', user.id)
+    return notifications
+
+
+def get_notifications(user):
+    '''
+    List notification for a given user.
+
+    Notifications are read from the user materialized inbox
+    which is built from the providers when missing.
+    Expired inboxes are still served while being rebuilt in background.
+    '''
+    collection = Inbox._get_collection()
+    inbox = collection.find_one({'user': user.id}, {'notifications': 1, 'built_at': 1})
+    if not inbox:
+        return build_inbox(user)
+    duration = timedelta(seconds=current_app.config['NOTIFICATIONS_INBOX_DURATION'])
+    built_at = inbox.get('built_at')
+    if built_at and built_at < datetime.now() - duration:
+        # Postpone the expiry so a single rebuild is requested
+        result = collection.update_one({'_id': inbox['_id'], 'built_at': built_at},
+                                       {'$set': {'built_at': datetime.now()}})
+        if result.modified_count:
+            from .tasks import rebuild_inbox  # Avoid circular imports
+            rebuild_inbox.delay(str(user.id))
+    return inbox.get('notifications', [])
+
+
+def notify(name, users, created_on, details):
+    '''
+    Add (or replace) a notification identified by `details['id']`
+    into some users existing inboxes.
+
+    Missing inboxes are left untouched as they will be built on first read.
+    '''
+    ids = [getattr(user, 'id', user) for user in users]
+    if not ids:
+        return
+    collection = Inbox._get_collection()
+    collection.update_many({'user': {'$in': ids}}, {
+        '$pull': {'notifications': {'type': name, 'details.id': details['id']}},
+    })
+    collection.update_many({'user': {'$in': ids}}, {
+        '$push': {'notifications': {
+            'type': name,
+            'created_on': created_on,
+            'details': details,
+        }},
+        '$inc': {'touches': 1},
+    })
+
+
+def clear(name, id):
+    '''Remove a notification identified by its `details['id']` from all inboxes'''
+    collection = Inbox._get_collection()
+    collection.update_many(
+        {'notifications.type': name, 'notifications.details.id': id},
+        {'$pull': {'notifications': {'type': name, 'details.id': id}},
+         '$inc': {'touches': 1}},
+    )
+    # The inboxes being built may include the cleared notification
+    collection.update_many({'built_at': None}, {'$inc': {'touches': 1}})
+
+
+def invalidate(users):
+    '''Drop some users inboxes so they are rebuilt on next read'''
+    ids = [getattr(user, 'id', user) for user in users]
+    if ids:
+        Inbox.objects(user__in=ids).delete()
+
+
+def members(org_id, role=None):
+    '''The identifiers of an organization members, optionally filtered by role'''
+    org = Organization._get_collection().find_one({'_id': org_id}, {'members': 1})
+    return [
+        member['user'] for member in (org or {}).get('members', [])
+        if role is None or member.get('role') == role
+    ]
+
+
+def recipients(owner):
+    '''The users notified for a given owner, either a user or an organization'''
+    if isinstance(owner, Organization):
+        return members(owner.id)
+    return [owner.id] if owner else []
+
+
+def owners(document):
+    '''The users owning a given document, directly or as organization members'''
+    owner = document._data.get('owner')
+    org = document._data.get('organization')
+    ids = [owner.id] if owner else []
+    if org:
+        ids.extend(members(org.id))
+    return ids
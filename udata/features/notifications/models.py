@@ -0,0 +1,37 @@
+import logging
+
+from datetime import datetime
+
+from udata.models import db
+
+log = logging.getLogger(__name__)
+
+__all__ = ('Inbox', 'Notification')
+
+
+class Notification(db.EmbeddedDocument):
+    type = db.StringField(required=True)
+    created_on = db.DateTimeField(required=True)
+    details = db.DictField()
+
+
+class Inbox(db.Document):
+    '''
+    The materialized notifications of a given user.
+
+    Built on read from the notifications providers when missing or expired
+    and maintained from domain signals in between.
+    `built_at` is unset while the inbox is being built.
+    '''
+    user = db.ReferenceField('User', required=True, unique=True)
+    notifications = db.ListField(db.EmbeddedDocumentField(Notification))
+    built_at = db.DateTimeField(default=datetime.now)
+    #: Number of events having modified the inbox
+    touches = db.IntField(default=0)
+
+    meta = {
+        'indexes': [
+            ('notifications.type', 'notifications.details.id'),
+            'built_at',
+        ]
+    }
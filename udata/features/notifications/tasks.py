@@ -0,0 +1,18 @@
+import logging
+
+from udata.models import User
+from udata.tasks import task
+
+from .actions import build_inbox
+
+log = logging.getLogger(__name__)
+
+
+@task
+def rebuild_inbox(user_id):
+    '''Rebuild an expired user inbox from the providers'''
+    user = User.objects(id=user_id).first()
+    if user is None:
+        log.warning('Unable to rebuild the notifications inbox of unknown user %s', user_id)
+        return
+    build_inbox(user)
@@ -1,5 +1,9 @@
+from mongoengine.signals import post_save
+
 from udata.models import Transfer
-from udata.features.notifications.actions import notifier
+from udata.features.notifications.actions import (
+    notifier, notify, clear, invalidate, recipients
+)
 
 
 import logging
@@ -30,3 +34,23 @@ def transfer_request_notifications(user):
         }))
 
     return notifications
+
+
+def on_transfer_saved(sender, document, **kwargs):
+    '''Maintain the transfer recipients inboxes'''
+    if document.status == 'pending':
+        notify('transfer_request', recipients(document.recipient), document.created, {
+            'id': document.id,
+            'subject': {
+                'class': document.subject.__class__.__name__.lower(),
+                'id': document.subject.id,
+            }
+        })
+        return
+    clear('transfer_request', document.id)
+    if document.status == 'accepted':
+        # The subject notifications (ie. discussions) have moved to its new owners
+        invalidate(recipients(document.owner) + recipients(document.recipient))
+
+
+post_save.connect(on_transfer_saved, sender=Transfer)
@@ -1,4 +1,7 @@
-from udata.features.notifications.actions import notifier
+from mongoengine.signals import post_save
+
+from udata.features.notifications.actions import notifier, notify, clear, invalidate
+from udata.models import User, Role
 
 from .models import HarvestSource, VALIDATION_PENDING
 
@@ -27,3 +30,26 @@ def validate_harvester_notifications(user):
         }))
 
     return notifications
+
+
+def on_source_saved(sender, document, **kwargs):
+    '''Maintain the admins inboxes'''
+    if document.validation.state != VALIDATION_PENDING:
+        clear('validate_harvester', document.id)
+        return
+    admin = Role.objects(name='admin').first()
+    admins = User.objects(roles=admin).scalar('id') if admin else []
+    notify('validate_harvester', list(admins), document.created_at, {
+        'id': document.id,
+        'name': document.name,
+    })
+
+
+def on_user_saved(sender, document, **kwargs):
+    '''Harvesters validation notifications depend on the sysadmin role'''
+    if not kwargs.get('created') and 'roles' in document._get_changed_fields():
+        invalidate([document])
+
+
+post_save.connect(on_source_saved, sender=HarvestSource)
+post_save.connect(on_user_saved, sender=User)
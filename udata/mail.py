@@ -1,10 +1,13 @@
 import logging
+import uuid
+
 from contextlib import contextmanager
 
 from blinker import signal
 
 from flask import current_app, render_template
 from flask_mail import Mail, Message as _Message
+from markupsafe import escape
 
 from email.utils import make_msgid
 class Message(_Message):
@@ -24,6 +27,9 @@ mail = Mail()
 
 mail_sent = signal('mail-sent')
 
+#: Recipient attributes a template can use to be rendered once for many recipients
+RECIPIENT_FIELDS = ('first_name', 'last_name', 'fullname', 'email')
+
 
 class FakeMailer(object):
     '''Display sent mail in logging output'''
@@ -39,6 +45,87 @@ def dummyconnection(*args, **kw):
     yield FakeMailer()
 
 
+class PlaceholderError(Exception):
+    pass
+
+
+def _unsupported(self, *args, **kwargs):
+    raise PlaceholderError('an expression')
+
+
+class RecipientMarker(str):
+    '''
+    A recipient field value standing for any recipient value.
+
+    It can only be output as is: tests, comparisons and sizes raise a `PlaceholderError`.
+    '''
+    __bool__ = __len__ = __hash__ = _unsupported
+    __eq__ = __ne__ = __lt__ = __le__ = __gt__ = __ge__ = _unsupported
+
+
+class RecipientPlaceholder(object):
+    '''
+    Stands for any recipient to render a template once for many recipients.
+
+    Only `RECIPIENT_FIELDS` can be output,
+    any other usage of the recipient raises a `PlaceholderError`.
+    '''
+    __bool__ = __hash__ = _unsupported
+    __eq__ = __ne__ = _unsupported
+
+    def __init__(self):
+        self.token = uuid.uuid4().hex
+
+    def marker(self, field):
+        # Mixed case so any case filter alters it
+        return 'R{0}{1}M'.format(self.token, field.replace('_', ''))
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        if name not in RECIPIENT_FIELDS:
+            raise PlaceholderError(name)
+        return RecipientMarker(self.marker(name))
+
+    def __str__(self):
+        raise PlaceholderError('__str__')
+
+    def check(self, text):
+        '''Raise a `PlaceholderError` if some markers have been altered (ie. by a filter)'''
+        for field in RECIPIENT_FIELDS:
+            text = text.replace(self.marker(field), '')
+        if self.token[:8] in text.lower():
+            raise PlaceholderError('a filter')
+
+    def fill(self, text, recipient, autoescape=False):
+        '''Replace the placeholder markers by a given recipient values'''
+        for field in RECIPIENT_FIELDS:
+            marker = self.marker(field)
+            if marker in text:
+                value = getattr(recipient, field) or ''
+                text = text.replace(marker, str(escape(value)) if autoescape else value)
+        return text
+
+
+def renderer(template, recipients, **context):
+    '''
+    Get a function rendering a template for a given recipient.
+
+    The template is rendered only once for all recipients if possible.
+    '''
+    if len(recipients) > 1:
+        placeholder = RecipientPlaceholder()
+        try:
+            text = render_template(template, recipient=placeholder, **context)
+            placeholder.check(text)
+        except PlaceholderError as e:
+            log.debug('Template %s is rendered by recipient (uses recipient in %s)', template, e)
+        else:
+            autoescape = template.endswith('.html')
+            return lambda recipient: placeholder.fill(text, recipient, autoescape)
+    return lambda recipient: render_template(template, recipient=recipient, **context)
+
+
 def init_app(app):
     mail.init_app(app)
 
@@ -49,6 +136,9 @@ def send(subject, recipients, template_base, **kwargs):
 
     User prefered language is taken in account.
     To translate the subject in the right language, you should ugettext_lazy
+
+    Templates are rendered once by language
+    and all messages are sent using a single connection.
     '''
     sender = kwargs.pop('sender', None)
     if not isinstance(recipients, (list, tuple)):
@@ -58,18 +148,22 @@ def send(subject, recipients, template_base, **kwargs):
     send_mail = current_app.config.get('SEND_MAIL', not debug)
     connection = send_mail and mail.connect or dummyconnection
 
+    by_lang = {}
+    for recipient in recipients:
+        by_lang.setdefault(i18n._default_lang(recipient), []).append(recipient)
+
     with connection() as conn:
-        for recipient in recipients:
-            lang = i18n._default_lang(recipient)
+        for lang, group in by_lang.items():
             with i18n.language(lang):
-                log.debug(
-                    'Sending mail "%s" to recipient "%s"', subject, recipient)
-                msg = Message(subject, sender=sender,
-                              recipients=[recipient.email])
-                msg.body = render_template(
-                    'mail/{0}.txt'.format(template_base), subject=subject,
-                    sender=sender, recipient=recipient, **kwargs)
-                msg.html = render_template(
-                    'mail/{0}.html'.format(template_base), subject=subject,
-                    sender=sender, recipient=recipient, **kwargs)
-                conn.send(msg)
+                body = renderer('mail/{0}.txt'.format(template_base), group,
+                                subject=subject, sender=sender, **kwargs)
+                html = renderer('mail/{0}.html'.format(template_base), group,
+                                subject=subject, sender=sender, **kwargs)
+                for recipient in group:
+                    log.debug(
+                        'Sending mail "%s" to recipient "%s"', subject, recipient)
+                    msg = Message(subject, sender=sender,
+                                  recipients=[recipient.email])
+                    msg.body = body(recipient)
+                    msg.html = html(recipient)
+                    conn.send(msg)
@@ -0,0 +1,29 @@
+'''
+Schedule the `compute-spatial-coverage` job counting datasets by zone
+and compute the coverage once
+'''
+import logging
+
+from udata.core.jobs.models import PeriodicTask
+from udata.core.spatial.tasks import compute_coverage
+
+log = logging.getLogger(__name__)
+
+JOB = 'compute-spatial-coverage'
+CRON = '0 1 * * *'
+
+
+def migrate(db):
+    total = compute_coverage()
+    log.info('Computed spatial coverage for %s zones', total)
+    if PeriodicTask.objects(task=JOB).count():
+        log.info('Job %s is already scheduled', JOB)
+        return
+    PeriodicTask.objects.create(
+        task=JOB,
+        name='Job {0}'.format(JOB),
+        description='Periodic {0} job'.format(JOB),
+        enabled=True,
+        crontab=PeriodicTask.Crontab.parse(CRON),
+    )
+    log.info('Scheduled %s with crontab "%s"', JOB, CRON)
@@ -0,0 +1,30 @@
+'''
+Schedule the `emit-activities` job writing the queued activities
+'''
+import logging
+
+from flask import current_app
+
+from udata.core.jobs.models import PeriodicTask
+
+log = logging.getLogger(__name__)
+
+JOB = 'emit-activities'
+
+
+def migrate(db):
+    interval = current_app.config['ACTIVITY_FLUSH_INTERVAL']
+    if not interval:
+        log.info('Activities are not queued, nothing to schedule')
+        return
+    if PeriodicTask.objects(task=JOB).count():
+        log.info('Job %s is already scheduled', JOB)
+        return
+    PeriodicTask.objects.create(
+        task=JOB,
+        name='Job {0}'.format(JOB),
+        description='Periodic {0} job'.format(JOB),
+        enabled=True,
+        interval=PeriodicTask.Interval(every=interval, period='seconds'),
+    )
+    log.info('Scheduled %s every %s seconds', JOB, interval)
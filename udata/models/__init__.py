@@ -20,6 +20,7 @@ from .taglist_field import TagListField
 from .datetime_fields import DateField, DateRange, Datetimed
 from .extras_fields import ExtrasField
 from .slug_fields import SlugField
+from .reference_field import ReferenceField
 from .url_field import URLField
 from .uuid_fields import AutoUUIDField
 from .owned import Owned, OwnedQuerySet
@@ -39,6 +40,7 @@ class UDataMongoEngine(MongoEngine):
         self.Datetimed = Datetimed
         self.ExtrasField = ExtrasField
         self.SlugField = SlugField
+        self.ReferenceField = ReferenceField
         self.AutoUUIDField = AutoUUIDField
         self.Document = UDataDocument
         self.DomainModel = DomainModel
@@ -99,6 +101,7 @@ from udata.core.post.models import *  # noqa
 from udata.core.jobs.models import *  # noqa
 from udata.core.tags.models import *  # noqa
 
+from udata.features.notifications.models import *  # noqa
 from udata.features.transfer.models import *  # noqa
 from udata.features.territories.models import *  # noqa
 
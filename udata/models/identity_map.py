@@ -0,0 +1,123 @@
+'''
+Documents identity map helpers.
+
+- a request-scoped identity map, keyed by `(model, id)` and `(model, slug)`,
+  consulted by route converters and references dereferencing
+  so that a given document is fetched only once per request.
+- a bounded process-wide `slug -> id` cache for slug lookups.
+
+The identity map is only active during requests processing,
+not in workers or shell sessions.
+'''
+import threading
+
+from collections import OrderedDict
+
+from flask import has_request_context, request
+from mongoengine.signals import post_save, post_delete
+
+ENVIRON_KEY = 'udata.identity_map'
+
+SLUG_CACHE_SIZE = 10000
+
+
+def get_map(create=False):
+    '''
+    Get the current request identity map.
+
+    Returns `None` if there is no identity map for the current context.
+    '''
+    if not has_request_context():
+        return None
+    if create:
+        return request.environ.setdefault(ENVIRON_KEY, {})
+    return request.environ.get(ENVIRON_KEY)
+
+
+def start():
+    '''Ensure an identity map is active for the current request'''
+    get_map(create=True)
+
+
+def get(model, id=None, slug=None):
+    '''Get a document from the identity map given its id or its slug'''
+    identity_map = get_map()
+    if not identity_map:
+        return None
+    if id is not None:
+        return identity_map.get((model, 'id', str(id)))
+    return identity_map.get((model, 'slug', slug))
+
+
+def register(document):
+    '''Register a document into the current identity map if any'''
+    identity_map = get_map()
+    if identity_map is None or document is None or document.pk is None:
+        return document
+    model = document.__class__
+    identity_map[(model, 'id', str(document.pk))] = document
+    slug = document._data.get('slug')
+    if isinstance(slug, str):
+        identity_map[(model, 'slug', slug)] = document
+    return document
+
+
+def discard(document):
+    '''Remove a document from the current identity map if any'''
+    identity_map = get_map()
+    if not identity_map:
+        return
+    model = document.__class__
+    identity_map.pop((model, 'id', str(document.pk)), None)
+    slug = document._data.get('slug')
+    if isinstance(slug, str):
+        identity_map.pop((model, 'slug', slug), None)
+
+
+class SlugCache(object):
+    '''A bounded and thread-safe `(model, slug) -> id` LRU cache'''
+    def __init__(self, size=SLUG_CACHE_SIZE):
+        self.size = size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, model, slug):
+        key = (model.__name__, slug)
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, model, slug, id):
+        key = (model.__name__, slug)
+        with self._lock:
+            self._data[key] = id
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, model, slug):
+        with self._lock:
+            self._data.pop((model.__name__, slug), None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+slug_cache = SlugCache()
+
+
+@post_save.connect
+def on_document_saved(sender, document, **kwargs):
+    if get_map() is not None:
+        register(document)
+
+
+@post_delete.connect
+def on_document_deleted(sender, document, **kwargs):
+    discard(document)
+    slug = document._data.get('slug')
+    if isinstance(slug, str):
+        slug_cache.invalidate(document.__class__, slug)
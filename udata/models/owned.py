@@ -2,9 +2,9 @@ import logging
 
 from blinker import signal
 from mongoengine import NULLIFY, Q, post_save
-from mongoengine.fields import ReferenceField
 
 from .queryset import UDataQuerySet
+from .reference_field import ReferenceField
 
 log = logging.getLogger(__name__)
 
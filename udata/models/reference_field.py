@@ -0,0 +1,26 @@
+from bson import DBRef
+from mongoengine.base import get_document
+from mongoengine.fields import ReferenceField as BaseReferenceField
+
+from . import identity_map
+
+
+class ReferenceField(BaseReferenceField):
+    '''
+    A `ReferenceField` consulting the request identity map before dereferencing
+    and registering the dereferenced documents into it.
+    '''
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        value = instance._data.get(self.name)
+        if not isinstance(value, DBRef) or not instance._fields[self.name]._auto_dereference:
+            return super(ReferenceField, self).__get__(instance, owner)
+
+        cls = get_document(value.cls) if hasattr(value, 'cls') else self.document_type
+        document = identity_map.get(cls, id=value.id)
+        if document is not None:
+            instance._data[self.name] = document
+            return document
+        return identity_map.register(super(ReferenceField, self).__get__(instance, owner))
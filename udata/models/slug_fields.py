@@ -1,10 +1,13 @@
 import logging
+import re
+
 import slugify
 
 from flask_mongoengine import Document
 from mongoengine.fields import StringField
 from mongoengine.signals import pre_save, post_delete
 
+from .identity_map import slug_cache
 from .queryset import UDataQuerySet
 from udata.utils import is_uuid
 
@@ -71,11 +74,12 @@ class SlugField(StringField):
             return self.owner_document.objects(slug=follow.new_slug).first()
         return None
 
-    def cleanup_on_delete(self, sender, document, **kwargs):
+    def cleanup_on_delete(self, sender, document, bulk=False, **kwargs):
         '''
         Clean up slug redirections on object deletion
+        (bulk deletions clean them up by batches)
         '''
-        if not self.follow or sender is not self.owner_document:
+        if not self.follow or sender is not self.owner_document or bulk:
             return
         slug = getattr(document, self.db_field)
         namespace = self.owner_document.__name__
@@ -108,16 +112,50 @@ class SlugFollow(Document):
     }
 
 
+def may_have_changed(instance, field):
+    '''
+    Whether the slug or the value it is populated from
+    may have changed since the document has been loaded.
+    '''
+    changed = instance._get_changed_fields()
+    if field.db_field in changed:
+        return True
+    if not field.update or not field.populate_from:
+        return False
+    source = instance._fields.get(field.populate_from)
+    # `populate_from` may be a property whose sources are unknown
+    return source is None or source.db_field in changed
+
+
+def get_previous(instance, field):
+    '''
+    Fetch the stored version of a document with only the fields required
+    to compare slugs, or `None` for new documents.
+    '''
+    if instance.pk is None:
+        return None
+    qs = instance.__class__.objects(id=instance.pk)
+    if not field.populate_from or field.populate_from in instance._fields:
+        qs = qs.only(*filter(None, (field.name, field.populate_from)))
+    try:
+        return qs.first()
+    except Exception:
+        return None
+
+
 def populate_slug(instance, field):
     '''
     Populate a slug field if needed.
     '''
     value = getattr(instance, field.db_field)
 
-    try:
-        previous = instance.__class__.objects.get(id=instance.id)
-    except Exception:
-        previous = None
+    if instance.pk is not None and not instance._created:
+        # Document has been loaded from database:
+        # nothing to do until the slug or its source has changed
+        if not may_have_changed(instance, field):
+            return value
+
+    previous = get_previous(instance, field)
 
     # Field value has changed
     changed = field.db_field in instance._get_changed_fields()
@@ -159,10 +197,13 @@ def populate_slug(instance, field):
         if previous:
             qs = qs(id__ne=previous.id)
 
-        def exists(s):
-            return qs(**{field.db_field: s}).clear_cls_query().limit(1).count(True) > 0
+        # Fetch all the candidates slugs at once with an anchored regex
+        # which can use the slug index
+        pattern = re.compile(r'^{0}(-\d+)?$'.format(re.escape(base_slug)))
+        taken = set(qs(**{field.db_field: pattern}).clear_cls_query()
+                    .scalar(field.db_field))
 
-        while exists(slug):
+        while slug in taken:
             slug = '{0}-{1}'.format(base_slug, index)
             index += 1
 
@@ -188,5 +229,8 @@ def populate_slug(instance, field):
             # Maintain previous redirects
             SlugFollow.objects(namespace=ns, new_slug=old_slug).update(new_slug=slug)
 
+    if old_slug:
+        slug_cache.invalidate(instance.__class__, old_slug)
+
     setattr(instance, field.db_field, slug)
     return slug
@@ -6,8 +6,9 @@ from mongoengine.errors import InvalidQueryError
 from werkzeug.routing import BaseConverter, NotFound, PathConverter
 from werkzeug.urls import url_quote
 
-from udata import models
-from udata.models import db
+from udata import conditional, models
+from udata.models import db, identity_map
+from udata.models.identity_map import slug_cache
 from udata.core.spatial.models import GeoZone
 from udata.i18n import ISO_639_1_CODES
 
@@ -61,6 +62,8 @@ class ModelConverter(BaseConverter):
 
     When serializing to python, ir try in the following order:
 
+    * fetch from the request identity map
+    * fetch by id from the process slug cache
     * fetch by id
     * fetch by slug
     * raise 404
@@ -83,14 +86,40 @@ class ModelConverter(BaseConverter):
             return url_quote(value)
 
     def to_python(self, value):
+        identity_map.start()
+        obj = self.lookup_identity(value)
+        if obj is None:
+            obj = self.lookup(self.model.objects, value)
+        if isinstance(obj, self.model):
+            identity_map.register(obj)
+            if self.has_slug and obj.slug:
+                slug_cache.set(self.model, obj.slug, obj.id)
+        return obj
+
+    def lookup_identity(self, value):
+        '''Lookup an already known document from the identity map or the slug cache'''
+        obj = identity_map.get(self.model, id=value) or identity_map.get(self.model, slug=value)
+        if obj is not None or not self.has_slug or ObjectId.is_valid(value):
+            return obj
+        id = slug_cache.get(self.model, value)
+        if id is None:
+            return None
+        obj = self.model.objects(id=id).first()
+        if obj is None or obj.slug != value:
+            # Slug has changed in another process
+            slug_cache.invalidate(self.model, value)
+            return None
+        return obj
+
+    def lookup(self, queryset, value):
         try:
-            return self.model.objects.get_or_404(id=value)
+            return queryset.get_or_404(id=value)
         except NotFound:
             pass
         try:
             quoted = self.quote(value)
             query = db.Q(slug=value) | db.Q(slug=quoted)
-            obj = self.model.objects(query).get()
+            obj = queryset(query).get()
         except (InvalidQueryError, self.model.DoesNotExist):
             # If the model doesn't have a slug or matching slug doesn't exist.
             if self.has_redirected_slug:
@@ -194,14 +223,26 @@ class TerritoryConverter(PathConverter):
             raise ValueError('Unable to serialize "%s" to url' % obj)
 
 
+def is_conditional(value):
+    return (
+        conditional.supports(value) and
+        conditional.is_conditional_request() and
+        conditional.is_conditional_view()
+    )
+
+
 def lazy_raise_or_redirect():
     '''
     Raise exception lazily to ensure request.endpoint is set
-    Also perform redirect if needed
+    Also perform redirect or answer conditional requests if needed
     '''
     if not request.view_args:
         return
     for name, value in request.view_args.items():
+        if is_conditional(value):
+            etag = conditional.etag_for(value)
+            if conditional.not_modified(value, etag):
+                return conditional.not_modified_response(etag)
         if isinstance(value, NotFound):
             request.routing_exception = value
             break
@@ -213,6 +254,7 @@ def lazy_raise_or_redirect():
 
 
 def init_app(app):
+    app.before_request(identity_map.start)
     app.before_request(lazy_raise_or_redirect)
     app.url_map.converters['lang'] = LanguagePrefixConverter
     app.url_map.converters['list'] = ListConverter
@@ -14,10 +14,8 @@ log = logging.getLogger(__name__)
 adapter_catalog = {}
 
 
-@task(route='high.search')
-def reindex(classname, id):
-    model = db.resolve_model(classname)
-    obj = model.objects.get(pk=id)
+def index_document(classname, model, obj):
+    '''Produce the (un)indexation message of a given document'''
     adapter_class = adapter_catalog.get(model)
     document = adapter_class.serialize(obj)
     if adapter_class.is_indexable(obj):
@@ -40,9 +38,8 @@ def reindex(classname, id):
         log.exception('Unable to index/unindex %s "%s"', model.__name__, str(obj.id))
 
 
-@task(route='high.search')
-def unindex(classname, id):
-    model = db.resolve_model(classname)
+def unindex_document(classname, model, id):
+    '''Produce the unindexation message of a given document identifier'''
     log.info('Unindexing %s (%s)', model.__name__, id)
     try:
         action = KafkaMessageType.UNINDEX
@@ -58,15 +55,44 @@ def unindex(classname, id):
         log.exception('Unable to unindex %s "%s"', model.__name__, id)
 
 
+@task(route='high.search')
+def reindex(classname, id):
+    model = db.resolve_model(classname)
+    obj = model.objects.get(pk=id)
+    index_document(classname, model, obj)
+
+
+@task(route='high.search')
+def reindex_many(classname, ids):
+    '''(Re/Un)index a batch of documents in a single task'''
+    model = db.resolve_model(classname)
+    for obj in model.objects(pk__in=ids):
+        index_document(classname, model, obj)
+
+
+@task(route='high.search')
+def unindex(classname, id):
+    model = db.resolve_model(classname)
+    unindex_document(classname, model, id)
+
+
+@task(route='high.search')
+def unindex_many(classname, ids):
+    '''Unindex a batch of documents in a single task'''
+    model = db.resolve_model(classname)
+    for id in ids:
+        unindex_document(classname, model, id)
+
+
 def reindex_model_on_save(sender, document, **kwargs):
     '''(Re/Un)Index Mongo document on post_save'''
     if current_app.config.get('AUTO_INDEX'):
         reindex.delay(*as_task_param(document))
 
 
-def unindex_model_on_delete(sender, document, **kwargs):
-    '''Unindex Mongo document on post_delete'''
-    if current_app.config.get('AUTO_INDEX'):
+def unindex_model_on_delete(sender, document, bulk=False, **kwargs):
+    '''Unindex Mongo document on post_delete (bulk deletions unindex by batches)'''
+    if current_app.config.get('AUTO_INDEX') and not bulk:
         unindex.delay(*as_task_param(document))
 
 
@@ -221,6 +221,13 @@ class Defaults(object):
 
     DELAY_BEFORE_REMINDER_NOTIFICATION = 30  # Days
 
+    # Notifications inboxes are rebuilt in background from the providers after this duration
+    NOTIFICATIONS_INBOX_DURATION = 7 * 24 * 60 * 60  # Seconds
+
+    # Activities are queued and written by batches by the `emit-activities` job
+    ACTIVITY_BATCH_SIZE = 100
+    ACTIVITY_FLUSH_INTERVAL = 5  # Seconds, 0 to write each activity from its own task
+
     HARVEST_PREVIEW_MAX_ITEMS = 20
     # Harvesters are scheduled at midnight by default
     HARVEST_DEFAULT_SCHEDULE = '0 0 * * *'
@@ -235,6 +242,9 @@ class Defaults(object):
     # The order is important to compute parents/children, smaller first.
     HANDLED_LEVELS = tuple()
 
+    # Number of decimals kept in the spatial coverage API geometries
+    SPATIAL_COVERAGE_PRECISION = 3
+
     LINKCHECKING_ENABLED = True
     # Resource types ignored by linkchecker
     LINKCHECKING_UNCHECKED_TYPES = ('api', )
@@ -395,6 +405,16 @@ class Defaults(object):
 
     API_DOC_EXTERNAL_LINK = 'https://doc.data.gouv.fr/api/reference/'
 
+    # JSON backend used to serialize API responses:
+    # `auto`, `orjson`, `ujson` or `flask`
+    API_JSON_BACKEND = 'auto'
+
+    # Anonymous API responses cache duration (in seconds), 0 to disable
+    API_CACHE_DURATION = 5 * 60
+
+    # API keys and OAuth2 tokens lookups cache duration (in seconds), 0 to disable
+    API_AUTH_CACHE_DURATION = 60
+
     # Read Only Mode
     ####################
     # This mode can be used to mitigate a spam attack for example.
@@ -434,6 +454,7 @@ class Testing(object):
     THEME = 'testing'
     CACHE_TYPE = 'null'
     CACHE_NO_NULL_WARNING = True
+    API_AUTH_CACHE_DURATION = 0
     DEBUG_TOOLBAR = False
     SERVER_NAME = 'local.test'
     DEFAULT_LANGUAGE = 'en'
@@ -444,6 +465,7 @@ class Testing(object):
     URLS_ALLOWED_TLDS = tld_set | set(['test'])
     URLS_ALLOW_PRIVATE = False
     FS_IMAGES_OPTIMIZE = True
+    ACTIVITY_FLUSH_INTERVAL = 0
 
 
 class Debug(Defaults):
@@ -167,7 +167,9 @@ def init_app(app):
     import udata.core.organization.tasks  # noqa
     import udata.core.discussions.tasks  # noqa
     import udata.core.badges.tasks  # noqa
+    import udata.core.spatial.tasks  # noqa
     import udata.core.storages.tasks  # noqa
+    import udata.features.notifications.tasks  # noqa
     import udata.harvest.tasks  # noqa
 
     entrypoints.get_enabled('udata.tasks', app)
@@ -0,0 +1,65 @@
+import pytest
+
+from flask import url_for
+from mongoengine.queryset.base import BaseQuerySet
+
+from udata.core.activity.api import resolve_references
+from udata.core.dataset.activities import UserCreatedDataset
+from udata.core.dataset.factories import DatasetFactory
+from udata.core.organization.factories import OrganizationFactory
+from udata.core.reuse.activities import UserCreatedReuse
+from udata.core.reuse.factories import ReuseFactory
+from udata.core.user.factories import UserFactory
+from udata.models import Activity, Dataset
+from udata.tests.helpers import assert200
+
+
+@pytest.mark.usefixtures('clean_db')
+@pytest.mark.frontend
+class ActivityAPITest:
+    def test_activity_api_list(self, api):
+        user = UserFactory()
+        org = OrganizationFactory()
+        datasets = DatasetFactory.create_batch(2)
+        reuse = ReuseFactory()
+        for dataset in datasets:
+            UserCreatedDataset.objects.create(actor=user, related_to=dataset, organization=org)
+        UserCreatedReuse.objects.create(actor=user, related_to=reuse)
+
+        response = api.get(url_for('api.activity'))
+        assert200(response)
+
+        assert len(response.json['data']) == 3
+        for activity in response.json['data']:
+            assert activity['actor']['id'] == str(user.id)
+        kinds = set(activity['related_to_kind'] for activity in response.json['data'])
+        assert kinds == {'Dataset', 'Reuse'}
+
+    def test_activity_api_filter_out_missing_targets(self, api):
+        user = UserFactory()
+        dataset = DatasetFactory()
+        deleted = DatasetFactory()
+        UserCreatedDataset.objects.create(actor=user, related_to=dataset)
+        UserCreatedDataset.objects.create(actor=user, related_to=deleted)
+        Dataset.objects(id=deleted.id).delete()
+
+        response = api.get(url_for('api.activity'))
+        assert200(response)
+
+        assert len(response.json['data']) == 1
+        assert response.json['data'][0]['related_to_id'] == str(dataset.id)
+
+    def test_resolve_references_in_bulk(self, app, mocker):
+        user = UserFactory()
+        datasets = DatasetFactory.create_batch(3)
+        for dataset in datasets:
+            UserCreatedDataset.objects.create(actor=user, related_to=dataset)
+        in_bulk = mocker.spy(BaseQuerySet, 'in_bulk')
+
+        activities = resolve_references(list(Activity.objects))
+
+        assert len(activities) == 3
+        # One query for the users and one for the datasets
+        assert in_bulk.call_count == 2
+        assert set(a._data['related_to'].id for a in activities) == set(d.id for d in datasets)
+        assert all(a._data['actor'] == user for a in activities)
@@ -13,8 +13,10 @@ from authlib.oauth2.rfc7636 import (
 
 from udata.api import api, API
 from udata.api.oauth2 import OAuth2Client, OAuth2Token
-from udata.auth import PermissionDenied
+from udata.app import cache
+from udata.auth import PermissionDenied, credentials
 from udata.core.user.factories import UserFactory
+from udata.core.user.models import User
 from udata.forms import Form, fields, validators
 from udata.tests.helpers import (
     assert200, assert400, assert401, assert403, assert_status
@@ -547,3 +549,117 @@ class APIAuthTest:
 
         assert403(response)
         assert 'message' in response.json
+
+
+@pytest.fixture
+def credentials_cache(app):
+    app.config['CACHE_TYPE'] = 'simple'
+    app.config['API_AUTH_CACHE_DURATION'] = 60
+    cache.init_app(app)
+    cache.clear()
+    credentials.local_cache.clear()
+    yield
+    credentials.local_cache.clear()
+
+
+@pytest.mark.usefixtures('clean_db', 'credentials_cache')
+class APIAuthCacheTest:
+    modules = []
+
+    def post(self, api, headers):
+        '''Call the fake API without the session set by previous calls'''
+        api.client.cookie_jar.clear()
+        return api.post(url_for('api.fake'), headers=headers)
+
+    def test_apikey_lookup_is_cached(self, api):
+        user = UserFactory()
+        user.generate_api_key()
+        user.save()
+        headers = {'X-API-KEY': user.apikey}
+        assert200(self.post(api, headers))
+
+        # Bypass signals
+        User.objects(id=user.id).update(unset__apikey=True)
+
+        assert200(self.post(api, headers))
+
+    def test_cleared_apikey_is_invalidated(self, api):
+        user = UserFactory()
+        user.generate_api_key()
+        user.save()
+        headers = {'X-API-KEY': user.apikey}
+        assert200(self.post(api, headers))
+
+        user.clear_api_key()
+        user.save()
+
+        assert401(self.post(api, headers))
+
+    def test_regenerated_apikey_is_invalidated(self, api):
+        user = UserFactory()
+        user.generate_api_key()
+        user.save()
+        headers = {'X-API-KEY': user.apikey}
+        assert200(self.post(api, headers))
+
+        user.generate_api_key()
+        user.save()
+
+        assert401(self.post(api, headers))
+        assert200(self.post(api, {'X-API-KEY': user.apikey}))
+
+    def test_apikey_cached_before_save_is_invalidated(self, api):
+        user = UserFactory()
+        user.generate_api_key()
+        user.save()
+        headers = {'X-API-KEY': user.apikey}
+
+        user.generate_api_key()
+        # A concurrent request caches the still stored key
+        assert200(self.post(api, headers))
+        user.save()
+
+        assert401(self.post(api, headers))
+
+    def test_deleted_user_apikey_is_invalidated(self, api):
+        user = UserFactory()
+        user.generate_api_key()
+        user.save()
+        headers = {'X-API-KEY': user.apikey}
+        assert200(self.post(api, headers))
+
+        user.mark_as_deleted()
+
+        assert401(self.post(api, headers))
+
+    def test_revoked_token_is_invalidated(self, api, client, oauth):
+        token = OAuth2Token.objects.create(
+            client=oauth,
+            user=UserFactory(),
+            access_token='access-token',
+            refresh_token='refresh-token',
+        )
+        headers = {'Authorization': 'Bearer access-token'}
+        assert200(self.post(api, headers))
+
+        response = client.post(url_for('oauth.revoke_token'), {
+            'token': token.access_token,
+        }, headers=basic_header(oauth))
+        assert200(response)
+
+        assert401(self.post(api, headers))
+
+    def test_deleted_user_token_is_invalidated(self, api, oauth):
+        user = UserFactory()
+        OAuth2Token.objects.create(
+            client=oauth,
+            user=user,
+            access_token='access-token',
+            refresh_token='refresh-token',
+        )
+        headers = {'Authorization': 'Bearer access-token'}
+        assert200(self.post(api, headers))
+
+        user.mark_as_deleted()
+
+        assert401(self.post(api, headers))
@@ -0,0 +1,143 @@
+import pytest
+
+from flask import url_for
+
+from udata.api.cache import invalidate
+from udata.app import cache
+from udata.core.dataset.factories import VisibleDatasetFactory
+from udata.core.organization.factories import OrganizationFactory
+from udata.core.reuse.factories import ReuseFactory
+from udata.models import Dataset, Organization
+
+from udata.tests.helpers import assert200
+
+
+pytestmark = [
+    pytest.mark.usefixtures('clean_db'),
+]
+
+
+@pytest.fixture(autouse=True)
+def enable_cache(app):
+    app.config['CACHE_TYPE'] = 'simple'
+    cache.init_app(app)
+    cache.clear()
+
+
+class APICacheTest:
+    modules = []
+
+    def test_anonymous_response_is_cached(self, api):
+        dataset = VisibleDatasetFactory(title='original')
+        url = url_for('api.dataset', dataset=dataset)
+        assert200(api.get(url))
+
+        # Bypass signals
+        Dataset.objects(id=dataset.id).update(set__title='updated')
+
+        response = api.get(url)
+        assert200(response)
+        assert response.json['title'] == 'original'
+
+    def test_cache_is_invalidated_on_update(self, api):
+        dataset = VisibleDatasetFactory(description='original')
+        url = url_for('api.dataset', dataset=dataset)
+        assert200(api.get(url))
+
+        dataset.description = 'updated'
+        dataset.save()
+
+        response = api.get(url)
+        assert200(response)
+        assert response.json['description'] == 'updated'
+
+    def test_list_is_invalidated_on_create(self, api):
+        VisibleDatasetFactory()
+        url = url_for('api.datasets')
+        assert len(api.get(url).json['data']) == 1
+
+        VisibleDatasetFactory()
+
+        assert len(api.get(url).json['data']) == 2
+
+    def test_generations_outlive_responses(self, app, mocker):
+        set_many = mocker.spy(cache, 'set_many')
+
+        invalidate('datasets')
+
+        assert set_many.call_args[1]['timeout'] > app.config['API_CACHE_DURATION']
+
+    def test_dataset_is_invalidated_by_its_organization(self, api):
+        org = OrganizationFactory()
+        dataset = VisibleDatasetFactory(organization=org, title='original')
+        other = VisibleDatasetFactory(organization=OrganizationFactory(), title='original')
+        url = url_for('api.dataset', dataset=dataset)
+        other_url = url_for('api.dataset', dataset=other)
+        assert200(api.get(url))
+        assert200(api.get(other_url))
+
+        # Bypass signals
+        Dataset.objects.update(set__title='updated')
+        org.description = 'updated'
+        org.save()
+
+        assert api.get(url).json['title'] == 'updated'
+        assert api.get(other_url).json['title'] == 'original'
+
+    def test_list_is_invalidated_by_organizations_references_only(self, api):
+        org = OrganizationFactory()
+        VisibleDatasetFactory(organization=org, title='original')
+        url = url_for('api.datasets')
+        assert200(api.get(url))
+
+        # Bypass signals
+        Dataset.objects.update(set__title='updated')
+        org.count_datasets()
+
+        assert api.get(url).json['data'][0]['title'] == 'original'
+
+        org.name = 'renamed'
+        org.save()
+
+        data = api.get(url).json['data'][0]
+        assert data['title'] == 'updated'
+        assert data['organization']['name'] == 'renamed'
+
+    def test_reuse_is_invalidated_by_its_datasets_only(self, api):
+        dataset = VisibleDatasetFactory(title='original')
+        reuse = ReuseFactory(datasets=[dataset])
+        url = url_for('api.reuse', reuse=reuse)
+        assert200(api.get(url))
+
+        # Bypass signals
+        Dataset.objects(id=dataset.id).update(set__title='updated')
+        VisibleDatasetFactory()
+
+        assert api.get(url).json['datasets'][0]['title'] == 'original'
+
+        dataset.reload()
+        dataset.save()
+
+        assert api.get(url).json['datasets'][0]['title'] == 'updated'
+
+    def test_cache_depends_on_query_string_and_fields(self, api):
+        VisibleDatasetFactory.create_batch(2)
+        url = url_for('api.datasets')
+
+        assert len(api.get(url, qs={'page_size': 1}).json['data']) == 1
+        assert len(api.get(url, qs={'page_size': 2}).json['data']) == 2
+
+        response = api.get(url, headers={'X-Fields': 'total'})
+        assert list(response.json.keys()) == ['total']
+
+    def test_authenticated_response_is_not_cached(self, api):
+        org = OrganizationFactory(name='original')
+        url = url_for('api.organization', org=org)
+        with api.user():
+            assert200(api.get(url))
+
+            Organization.objects(id=org.id).update(set__name='updated')
+
+            response = api.get(url)
+            assert200(response)
+            assert response.json['name'] == 'updated'
@@ -21,7 +21,7 @@ from udata.core.organization.factories import OrganizationFactory
 from udata.core.spatial.factories import SpatialCoverageFactory
 from udata.tests.features.territories import create_geozones_fixtures
 from udata.models import (
-    CommunityResource, Dataset, Follow, Member, UPDATE_FREQUENCIES,
+    CommunityResource, Dataset, Follow, Member, Organization, UPDATE_FREQUENCIES,
     LEGACY_FREQUENCIES, RESOURCE_TYPES, db
 )
 from udata.tags import MIN_TAG_LENGTH, MAX_TAG_LENGTH
@@ -198,6 +198,75 @@ class DatasetAPITest(APITestCase):
         self.assertEqual(len(data['resources']), len(resources))
         self.assertTrue('quality' in data)
 
+    def test_dataset_api_get_if_none_match(self):
+        '''It should answer 304 if the dataset ETag matches'''
+        dataset = VisibleDatasetFactory()
+        url = url_for('api.dataset', dataset=dataset)
+
+        response = self.get(url)
+        self.assert200(response)
+        etag = response.headers['ETag']
+
+        response = self.get(url, headers={'If-None-Match': etag})
+        self.assertStatus(response, 304)
+        self.assertEqual(response.headers['ETag'], etag)
+
+        dataset.featured = True
+        dataset.save()
+
+        response = self.get(url, headers={'If-None-Match': etag})
+        self.assert200(response)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_dataset_api_get_etag_covers_any_write(self):
+        '''It should not answer 304 once the dataset has been updated by any mean'''
+        dataset = VisibleDatasetFactory()
+        url = url_for('api.dataset', dataset=dataset)
+        etag = self.get(url).headers['ETag']
+
+        Dataset.objects(id=dataset.id).update(set__description='Updated')
+
+        response = self.get(url, headers={'If-None-Match': etag})
+        self.assert200(response)
+        self.assertEqual(response.json['description'], 'Updated')
+
+    def test_dataset_api_get_etag_covers_embedded_documents(self):
+        '''It should not answer 304 once an embedded document has been updated'''
+        organization = OrganizationFactory()
+        dataset = VisibleDatasetFactory(organization=organization)
+        url = url_for('api.dataset', dataset=dataset)
+        etag = self.get(url).headers['ETag']
+
+        Organization.objects(id=organization.id).update(set__name='Updated')
+
+        response = self.get(url, headers={'If-None-Match': etag})
+        self.assert200(response)
+        self.assertEqual(response.json['organization']['name'], 'Updated')
+        etag = response.headers['ETag']
+
+        CommunityResourceFactory(dataset=dataset)
+
+        response = self.get(url, headers={'If-None-Match': etag})
+        self.assert200(response)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_dataset_api_get_conditional_by_slug(self):
+        '''It should answer conditional requests on slug URLs'''
+        dataset = VisibleDatasetFactory()
+        url = url_for('api.dataset', dataset=dataset.slug)
+        etag = self.get(url).headers['ETag']
+
+        response = self.get(url, headers={'If-None-Match': etag})
+        self.assertStatus(response, 304)
+
+    def test_dataset_api_get_conditional_deleted(self):
+        '''It should not answer 304 for a deleted dataset'''
+        dataset = VisibleDatasetFactory(deleted=datetime.now())
+
+        response = self.get(url_for('api.dataset', dataset=dataset),
+                            headers={'If-None-Match': '*'})
+        self.assert410(response)
+
     def test_dataset_api_get_deleted(self):
         '''It should not fetch a deleted dataset from the API and raise 410'''
         dataset = VisibleDatasetFactory(deleted=datetime.now())
@@ -0,0 +1,53 @@
+import json
+from datetime import date, datetime
+
+import pytest
+
+from bson import ObjectId
+
+from udata.api import encoding
+from udata.i18n import lazy_gettext as _
+
+
+BACKENDS = [
+    pytest.param(name, marks=pytest.mark.skipif(
+        not backend.is_available(), reason='{0} is not installed'.format(name)
+    ))
+    for name, backend in encoding.BACKENDS.items()
+]
+
+
+class FakeSerializable(object):
+    def serialize(self):
+        return {'serialized': True}
+
+
+@pytest.mark.parametrize('name', BACKENDS)
+class JsonBackendTest:
+    def test_native_types(self, app, name):
+        backend = encoding.get_backend(name)
+        data = {'string': 'é', 'int': 42, 'float': 4.2, 'list': [1, None, True]}
+        assert json.loads(backend.dumps(data)) == data
+
+    def test_special_types_match_flask_encoder(self, app, name):
+        backend = encoding.get_backend(name)
+        data = {
+            'id': ObjectId(),
+            'datetime': datetime(2022, 7, 8, 12, 30, 15, 123456),
+            'date': date(2022, 7, 8),
+            'lazy': _('Welcome'),
+            'serializable': FakeSerializable(),
+        }
+        expected = json.loads(encoding.FlaskBackend().dumps(data))
+        assert json.loads(backend.dumps(data)) == expected
+
+
+def test_get_backend_auto(app):
+    backend = encoding.get_backend('auto')
+    assert backend.name in encoding.PREFERRED_BACKENDS
+    assert backend.is_available()
+
+
+def test_get_backend_unknown(app):
+    with pytest.raises(ValueError):
+        encoding.get_backend('unknown')
@@ -49,6 +49,21 @@ class OrganizationAPITest:
         response = api.get(url_for('api.organization', org=organization))
         assert200(response)
 
+    def test_organization_api_get_if_none_match(self, api):
+        '''It should answer 304 if the organization ETag matches'''
+        organization = OrganizationFactory()
+        url = url_for('api.organization', org=organization)
+        etag = api.get(url).headers['ETag']
+
+        response = api.get(url, headers={'If-None-Match': etag})
+        assert_status(response, 304)
+
+        organization.description = 'Updated'
+        organization.save()
+
+        response = api.get(url, headers={'If-None-Match': etag})
+        assert200(response)
+
     def test_organization_api_get_deleted(self, api):
         '''It should not fetch a deleted organization from the API'''
         organization = OrganizationFactory(deleted=datetime.now())
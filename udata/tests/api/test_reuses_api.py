@@ -10,11 +10,12 @@ from udata.core.user.factories import AdminFactory
 from udata.core.reuse.factories import ReuseFactory
 from udata.core.organization.factories import OrganizationFactory
 from udata.core.user.factories import UserFactory
-from udata.models import Reuse, Follow, Member, REUSE_TOPICS, REUSE_TYPES
+from udata.models import Dataset, Reuse, Follow, Member, REUSE_TOPICS, REUSE_TYPES
 from udata.utils import faker
 
 from udata.tests.helpers import (
-    assert200, assert201, assert204, assert400, assert404, assert410
+    assert200, assert201, assert204, assert400, assert404, assert410,
+    assert_status
 )
 
 
@@ -90,6 +91,34 @@ class ReuseAPITest:
         response = api.get(url_for('api.reuse', reuse=reuse))
         assert200(response)
 
+    def test_reuse_api_get_if_none_match(self, api):
+        '''It should answer 304 if the reuse ETag matches'''
+        reuse = ReuseFactory()
+        url = url_for('api.reuse', reuse=reuse)
+        etag = api.get(url).headers['ETag']
+
+        response = api.get(url, headers={'If-None-Match': etag})
+        assert_status(response, 304)
+
+        reuse.description = 'Updated'
+        reuse.save()
+
+        response = api.get(url, headers={'If-None-Match': etag})
+        assert200(response)
+
+    def test_reuse_api_get_etag_covers_datasets(self, api):
+        '''It should not answer 304 once a reused dataset has been updated'''
+        dataset = DatasetFactory()
+        reuse = ReuseFactory(datasets=[dataset])
+        url = url_for('api.reuse', reuse=reuse)
+        etag = api.get(url).headers['ETag']
+
+        Dataset.objects(id=dataset.id).update(set__title='Updated')
+
+        response = api.get(url, headers={'If-None-Match': etag})
+        assert200(response)
+        assert response.json['datasets'][0]['title'] == 'Updated'
+
     def test_reuse_api_get_deleted(self, api):
         '''It should not fetch a deleted reuse from the API and raise 410'''
         reuse = ReuseFactory(deleted=datetime.now())
@@ -4,11 +4,17 @@ from flask import url_for
 
 from udata.core.dataset.factories import DatasetFactory
 from udata.core.reuse.factories import ReuseFactory
+from udata.core.tags import suggest
 from udata.core.tags.tasks import count_tags
 from udata.utils import faker
 from udata.tests.helpers import assert200
 
 
+@pytest.fixture(autouse=True)
+def dirty_index():
+    suggest.index.mark_dirty()
+
+
 @pytest.mark.frontend
 class TagsAPITest:
     def test_suggest_tags_api(self, api):
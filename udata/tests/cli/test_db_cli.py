@@ -55,3 +55,42 @@ def test_unrecord_with_too_many_parameters(cli, migrations):
     result = cli('db unrecord udata test.py too many', check=False)
     assert result.exit_code != 0
     assert migrations.count_documents({}) == 1
+
+
+@pytest.mark.usefixtures('clean_db')
+def test_check_integrity(cli, mocker):
+    from udata.core.dataset.factories import DatasetFactory
+    from udata.core.organization.factories import OrganizationFactory
+    from udata.core.user.factories import UserFactory
+    from udata.models import Follow, Member, User
+
+    mocker.patch('udata.commands.db.INTEGRITY_BATCH_SIZE', 2)
+    owner, deleted, follower = UserFactory.create_batch(3)
+    org = OrganizationFactory(members=[Member(user=owner), Member(user=deleted)])
+    valid = DatasetFactory(owner=owner)
+    broken = [DatasetFactory(owner=deleted) for _ in range(2)]
+    Follow.objects.create(follower=follower, following=broken[0])
+    User._get_collection().delete_one({'_id': deleted.id})
+
+    result = cli('db check-integrity --models Dataset --models Organization --models Follow')
+
+    assert 'Dataset.owner(User) — direct...\nErrors: 2' in result.output
+    assert 'Organization.members__user(User) — embed_list...\nErrors: 1' in result.output
+    assert 'Follow.following(Generic) — direct...\nErrors: 0' in result.output
+    for dataset in broken:
+        assert str(dataset.id) in result.output
+    assert str(valid.id) not in result.output
+    assert str(org.id) in result.output
+    assert 'Total errors: 3' in result.output
+
+
+@pytest.mark.usefixtures('clean_db')
+def test_check_integrity_all_models(cli):
+    from udata.core.dataset.factories import DatasetFactory
+
+    DatasetFactory()
+
+    result = cli('db check-integrity')
+
+    assert '[ERROR]' not in result.output
+    assert 'Total errors: 0' in result.output
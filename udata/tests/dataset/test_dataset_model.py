@@ -12,6 +12,7 @@ from udata.models import (
 from udata.core.dataset.factories import (
     ResourceFactory, DatasetFactory, CommunityResourceFactory, LicenseFactory
 )
+from udata.core.dataset.models import license_matcher
 from udata.core.dataset.exceptions import (
     SchemasCatalogNotFoundException, SchemasCacheUnavailableException
 )
@@ -419,6 +420,48 @@ class LicenseModelTest:
         assert isinstance(found, License)
         assert license.id == found.id
 
+    def test_guess_is_memoized(self, mocker):
+        license = LicenseFactory(title='License ODBl')
+        assert License.guess('License ODBL').id == license.id
+
+        match = mocker.spy(license_matcher, 'match')
+        objects = mocker.spy(License, 'objects')
+        assert License.guess('License ODBL').id == license.id
+
+        match.assert_not_called()
+        objects.assert_not_called()
+
+    def test_guess_returns_copies(self):
+        LicenseFactory(title='License ODBl')
+
+        found = License.guess('License ODBL')
+        found.title = 'Modified'
+
+        assert License.guess('License ODBL').title == 'License ODBl'
+
+    def test_guess_is_refreshed_on_license_change(self):
+        license = LicenseFactory(url='https://example.com/old')
+        assert License.guess('https://example.com/old').id == license.id
+
+        license.url = 'https://example.com/new'
+        license.save()
+
+        assert License.guess('https://example.com/new').id == license.id
+        assert License.guess('https://example.com/old') is None
+
+    def test_guess_is_refreshed_on_version_change(self, app):
+        app.config['CACHE_TYPE'] = 'simple'
+        cache.init_app(app)
+        assert License.guess('new-license') is None
+
+        # Bypass signals
+        License.objects.insert(License(id='new-license', title='New', slug='new'))
+        license_matcher.invalidate()
+        license_matcher.dirty = False
+        license_matcher.checked_at = 0
+
+        assert License.guess('new-license').id == 'new-license'
+
     def test_no_with_multiple_alternate_titles_from_different_licences(self):
         LicenseFactory(alternate_titles=['Licence Ouverte v2'])
         LicenseFactory(alternate_titles=['Licence Ouverte v2.0'])
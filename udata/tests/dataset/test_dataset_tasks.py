@@ -1,9 +1,25 @@
 from udata.core.user.factories import UserFactory
 import pytest
 
-from udata.models import Dataset, Topic, CommunityResource, Transfer
+from datetime import datetime, timedelta
+
+from mongoengine.signals import post_delete
+
+from udata.api.cache import generations
+from udata.app import cache
+from udata.models import (
+    Activity, Dataset, Discussion, Follow, Member, Topic, CommunityResource, Transfer
+)
+from udata.core.dataset.activities import UserCreatedDataset
+from udata.harvest.models import HarvestItem
+from udata.harvest.tests.factories import HarvestJobFactory
 from udata.core.dataset import tasks
-from udata.core.dataset.factories import DatasetFactory, CommunityResourceFactory
+from udata.core.dataset.factories import (
+    DatasetFactory, CommunityResourceFactory, ResourceFactory
+)
+from udata.core.organization.factories import OrganizationFactory
+from udata.core.reuse.factories import ReuseFactory
+from udata.tests.helpers import capture_mails
 # Those imports seem mandatory for the csv adapters to be registered.
 # This might be because of the decorator mechanism.
 from udata.core.dataset.csv import DatasetCsvAdapter, ResourcesCsvAdapter  # noqa
@@ -40,6 +56,51 @@ def test_purge_datasets():
     assert topic.datasets[0] == datasets[1]
 
 
+def test_purge_datasets_by_batches(mocker):
+    mocker.patch('udata.core.purge.BATCH_SIZE', 2)
+    user = UserFactory()
+    deleted = [Dataset.objects.create(title='delete me', deleted='2016-01-01') for _ in range(3)]
+    kept = Dataset.objects.create(title='keep me')
+    for dataset in deleted + [kept]:
+        Follow.objects.create(follower=user, following=dataset)
+        Discussion.objects.create(user=user, subject=dataset, title='test')
+        UserCreatedDataset.objects.create(actor=user, related_to=dataset)
+    topic = Topic.objects.create(name='test topic', datasets=deleted + [kept])
+    harvest_job = HarvestJobFactory(items=[
+        HarvestItem(remote_id=str(i), dataset=dataset)
+        for i, dataset in enumerate(deleted + [kept])
+    ])
+
+    tasks.purge_datasets()
+
+    assert list(Dataset.objects) == [kept]
+    assert Follow.objects.count() == 1
+    assert Discussion.objects.count() == 1
+    assert Activity.objects.count() == 1
+    assert Topic.objects.get(id=topic.id).datasets == [kept]
+    harvest_job.reload()
+    assert [item.dataset for item in harvest_job.items] == [None, None, None, kept]
+    assert [item.remote_id for item in harvest_job.items] == ['0', '1', '2', '3']
+
+
+def test_purge_datasets_sends_delete_signals(app, mocker):
+    app.config['AUTO_INDEX'] = True
+    unindex = mocker.patch('udata.search.unindex.delay')
+    unindex_many = mocker.patch('udata.core.purge.unindex_many.delay')
+    dataset = Dataset.objects.create(title='delete me', deleted='2016-01-01')
+    deleted = []
+
+    def on_delete(sender, document, **kwargs):
+        deleted.append((document.id, kwargs.get('bulk')))
+
+    with post_delete.connected_to(on_delete, sender=Dataset):
+        tasks.purge_datasets()
+
+    assert deleted == [(dataset.id, True)]
+    unindex.assert_not_called()
+    unindex_many.assert_called_once_with('Dataset', [str(dataset.id)])
+
+
 def test_purge_datasets_community():
     dataset = Dataset.objects.create(title='delete me', deleted='2016-01-01')
     community_resource1 = CommunityResourceFactory()
@@ -50,6 +111,78 @@ def test_purge_datasets_community():
     assert CommunityResource.objects.count() == 0
 
 
+def test_update_datasets_reuses_metrics(app, mocker):
+    app.config['AUTO_INDEX'] = True
+    reindex = mocker.patch.object(tasks.reindex_many, 'delay')
+    reused = DatasetFactory(resources=[ResourceFactory()])
+    unreused = DatasetFactory(resources=[ResourceFactory()], metrics={'reuses': 3})
+    unchanged = DatasetFactory(resources=[ResourceFactory()], metrics={'reuses': 1})
+    ReuseFactory(datasets=[reused, unchanged])
+    ReuseFactory(datasets=[reused, reused])
+    ReuseFactory(datasets=[reused, unreused], private=True)
+
+    tasks.update_datasets_reuses_metrics()
+
+    assert Dataset.objects.get(id=reused.id).metrics['reuses'] == 2
+    assert Dataset.objects.get(id=unreused.id).metrics['reuses'] == 0
+    assert Dataset.objects.get(id=unchanged.id).metrics['reuses'] == 1
+    reindex.assert_called_once_with('Dataset', mocker.ANY)
+    assert sorted(reindex.call_args[0][1]) == sorted([str(reused.id), str(unreused.id)])
+
+
+def test_update_datasets_reuses_metrics_invalidates_api_cache(app):
+    app.config['CACHE_TYPE'] = 'simple'
+    cache.init_app(app)
+    dataset = DatasetFactory(resources=[ResourceFactory()])
+    reuse = ReuseFactory(datasets=[dataset])
+    scopes = ['datasets', 'dataset:{0}'.format(dataset.id), 'reuse:{0}'.format(reuse.id)]
+    before = generations(scopes)
+
+    tasks.update_datasets_reuses_metrics()
+
+    assert all(a != b for a, b in zip(before, generations(scopes)))
+
+
+@pytest.mark.frontend(['admin'])
+def test_send_frequency_reminder(app):
+    app.config['DELAY_BEFORE_REMINDER_NOTIFICATION'] = 2
+    org = OrganizationFactory(members=[Member(user=UserFactory(), role='admin')])
+    other_org = OrganizationFactory(members=[Member(user=UserFactory(), role='admin')])
+    old = datetime.now() - timedelta(days=10)
+    recent = datetime.now() - timedelta(days=1)
+    outdated = [
+        DatasetFactory(organization=org, frequency='weekly', resources=[
+            ResourceFactory(published=old), ResourceFactory(published=old - timedelta(days=1))
+        ]),
+        DatasetFactory(organization=org, frequency='daily', resources=[
+            ResourceFactory(published=recent - timedelta(days=2)),
+        ]),
+    ]
+    # Updated according to frequency and allowed delay
+    DatasetFactory(organization=org, frequency='weekly', resources=[
+        ResourceFactory(published=old), ResourceFactory(published=recent)
+    ])
+    DatasetFactory(organization=other_org, frequency='daily', resources=[
+        ResourceFactory(published=recent),
+    ])
+    # Without expected update delay
+    DatasetFactory(organization=other_org, frequency='irregular', resources=[
+        ResourceFactory(published=old),
+    ])
+    # Not visible
+    DatasetFactory(organization=other_org, frequency='daily', private=True, resources=[
+        ResourceFactory(published=old),
+    ])
+
+    with capture_mails() as mails:
+        tasks.send_frequency_reminder()
+
+    assert len(mails) == 1
+    assert mails[0].send_to == set(m.user.email for m in org.members)
+    for dataset in outdated:
+        assert dataset.title in mails[0].body
+
+
 @pytest.mark.usefixtures('instance_path')
 def test_export_csv(app):
     dataset = DatasetFactory()
@@ -7,6 +7,10 @@ from udata.core.organization.factories import OrganizationFactory
 from udata.core.organization.notifications import (
     membership_request_notifications
 )
+from udata.core.organization.signals import (
+    new_membership_request, membership_accepted
+)
+from udata.features.notifications.actions import get_notifications
 
 from udata.tests.helpers import assert_equal_dates
 
@@ -36,3 +40,33 @@ class OrganizationNotificationsTest:
         assert details['user']['id'] == applicant.id
         assert details['user']['fullname'] == applicant.fullname
         assert details['user']['avatar'] == str(applicant.avatar)
+
+    def test_membership_requests_inbox(self):
+        admin = UserFactory()
+        editor = UserFactory()
+        applicant = UserFactory()
+        members = [
+            Member(user=editor, role='editor'),
+            Member(user=admin, role='admin')
+        ]
+        org = OrganizationFactory(members=members)
+        assert get_notifications(admin) == []
+        assert get_notifications(editor) == []
+
+        request = MembershipRequest(user=applicant, comment='test')
+        org.requests.append(request)
+        org.save()
+        new_membership_request.send(org, request=request)
+
+        assert get_notifications(editor) == []
+        notifications = get_notifications(admin)
+        assert len(notifications) == 1
+        assert notifications[0]['type'] == 'membership_request'
+        assert notifications[0]['details']['id'] == request.id
+        assert notifications[0]['details']['user']['id'] == applicant.id
+
+        request.status = 'accepted'
+        org.save()
+        membership_accepted.send(org, request=request)
+
+        assert get_notifications(admin) == []
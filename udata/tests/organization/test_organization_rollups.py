@@ -0,0 +1,96 @@
+import pytest
+
+from udata.app import cache
+from udata.core.dataset.factories import DatasetFactory, ResourceFactory
+from udata.core.organization import rollups
+from udata.core.organization.factories import OrganizationFactory
+from udata.core.user.factories import UserFactory
+from udata.models import Follow, Member, User
+
+
+@pytest.fixture
+def cached(app):
+    app.config['CACHE_TYPE'] = 'simple'
+    cache.init_app(app)
+    yield
+    cache.clear()
+
+
+def remote(available=None):
+    extras = {} if available is None else {'check:available': available}
+    return ResourceFactory(filetype='remote', extras=extras)
+
+
+@pytest.mark.usefixtures('clean_db')
+class OrganizationRollupsTest:
+    def test_user_rollups(self, app):
+        user = UserFactory()
+        orgs = [OrganizationFactory(members=[Member(user=user)]) for _ in range(2)]
+        OrganizationFactory()
+        DatasetFactory(organization=orgs[0], resources=[remote(True), remote(False)])
+        DatasetFactory(organization=orgs[1], resources=[remote(True), remote()])
+        DatasetFactory(organization=orgs[1], resources=[remote(True)], private=True)
+        DatasetFactory(resources=[remote(False)])
+        for org in orgs:
+            Follow.objects.create(follower=UserFactory(), following=org)
+
+        assert user.datasets_org_count == 2
+        assert user.followers_org_count == 2
+        assert user.resources_availability == pytest.approx(66.67)
+        assert list(orgs[0].check_availability()) == [True, False]
+
+    def test_user_without_organization(self, app):
+        user = UserFactory()
+
+        assert user.datasets_org_count == 0
+        assert user.followers_org_count == 0
+        assert user.resources_availability == 100
+
+    def test_availability_sample_by_organization(self, app, mocker):
+        mocker.patch.object(rollups, 'AVAILABILITY_SAMPLE_SIZE', 1)
+        org = OrganizationFactory()
+        DatasetFactory.create_batch(3, organization=org, resources=[remote(True)])
+
+        assert rollups.availabilities([org.id]) == [True]
+
+    def test_availability_pipeline_limits_datasets_lookup(self):
+        pipeline = rollups.availability_pipeline(['org'], size=5)
+
+        assert pipeline[0] == {'$match': {'_id': {'$in': ['org']}}}
+        lookup = pipeline[1]['$lookup']
+        assert lookup['from'] == 'dataset'
+        assert {'$limit': 5} in lookup['pipeline']
+
+    @pytest.mark.usefixtures('cached')
+    def test_rollups_cached_and_invalidated(self, app, mocker):
+        user = UserFactory()
+        org = OrganizationFactory(members=[Member(user=user)])
+        DatasetFactory(organization=org, resources=[remote()])
+        compute = mocker.spy(rollups, 'compute')
+
+        assert User.objects.get(id=user.id).datasets_org_count == 1
+        assert User.objects.get(id=user.id).datasets_org_count == 1
+        assert compute.call_count == 1
+
+        DatasetFactory(organization=org, resources=[remote()])
+
+        assert User.objects.get(id=user.id).datasets_org_count == 2
+        assert compute.call_count == 2
+
+        Follow.objects.create(follower=UserFactory(), following=org)
+
+        assert User.objects.get(id=user.id).followers_org_count == 1
+        assert compute.call_count == 3
+
+    @pytest.mark.usefixtures('cached')
+    def test_rollups_invalidated_on_organization_change(self, app):
+        user = UserFactory()
+        org = OrganizationFactory(members=[Member(user=user)])
+        dataset = DatasetFactory(organization=org, resources=[remote()])
+
+        assert User.objects.get(id=user.id).datasets_org_count == 1
+
+        dataset.organization = OrganizationFactory()
+        dataset.save()
+
+        assert User.objects.get(id=user.id).datasets_org_count == 0
@@ -113,11 +113,14 @@ def get_settings(request):
 
 def drop_db(app):
     '''Clear the database'''
+    from udata.core.dataset.models import license_matcher
     parsed_url = urlparse(app.config['MONGODB_HOST'])
 
     # drop the leading /
     db_name = parsed_url.path[1:]
     db.connection.drop_database(db_name)
+    # Dropping the database does not trigger any signal
+    license_matcher.mark_dirty()
 
 
 @pytest.fixture
@@ -1,8 +1,13 @@
-from udata.models import db, Activity
+from datetime import datetime, timedelta
+
+from udata.models import db, Activity, QueuedActivity
 from udata.tests import TestCase, DBTestMixin, WebTestMixin
 from udata.core.user.factories import UserFactory
 from udata.core.organization.factories import OrganizationFactory
 from udata.auth import login_user
+from udata.core.activity.tasks import (
+    claim_activities, emit_activities, emit_queued_activities
+)
 
 
 class FakeSubject(db.Document):
@@ -75,3 +80,57 @@ class ActivityTest(WebTestMixin, DBTestMixin, TestCase):
 
         self.assertEqual(Activity.objects(related_to=self.fake).count(), 1)
         self.assertEqual(Activity.objects(actor=self.user).count(), 1)
+
+    def test_emit_queued(self):
+        '''It should queue activities and write them by batches'''
+        self.app.config['ACTIVITY_FLUSH_INTERVAL'] = 5
+        self.app.config['ACTIVITY_BATCH_SIZE'] = 3
+        with self.app.app_context():
+            login_user(self.user)
+            for _ in range(4):
+                FakeActivity.emit(self.fake)
+
+        self.assertEqual(Activity.objects.count(), 0)
+        self.assertEqual(QueuedActivity.objects.count(), 4)
+
+        emit_queued_activities()
+
+        self.assertEqual(QueuedActivity.objects.count(), 0)
+        self.assertEqual(Activity.objects(related_to=self.fake).count(), 4)
+        for emitted in Activity.objects:
+            self.assertIsInstance(emitted, FakeActivity)
+            self.assertEqual(emitted.actor, self.user)
+
+    def test_claimed_activities_are_not_emitted_twice(self):
+        self.app.config['ACTIVITY_FLUSH_INTERVAL'] = 5
+        with self.app.app_context():
+            login_user(self.user)
+            FakeActivity.emit(self.fake)
+            FakeActivity.emit(self.fake)
+
+        # Claimed by a concurrent run
+        token = claim_activities(1)
+        emit_queued_activities()
+
+        self.assertEqual(Activity.objects.count(), 1)
+        self.assertEqual(QueuedActivity.objects.get().claim, token)
+
+        # Claims expire
+        QueuedActivity.objects.update(claimed_at=datetime.now() - timedelta(hours=1))
+        emit_queued_activities()
+
+        self.assertEqual(Activity.objects.count(), 2)
+
+    def test_emit_activities_with_organization(self):
+        org = OrganizationFactory()
+        emit_activities([{
+            'classname': 'FakeActivity',
+            'actor': self.user.id,
+            'related_to': self.fake.id,
+            'organization': org.id,
+            'created_at': datetime.now(),
+        }])
+
+        activity = Activity.objects.get(organization=org)
+        self.assertIsInstance(activity, FakeActivity)
+        self.assertEqual(activity.related_to, self.fake)
@@ -6,6 +6,7 @@ from udata.models import Dataset, Member
 from udata.core.discussions.models import Message, Discussion
 from udata.core.discussions.metrics import update_discussions_metric
 from udata.core.discussions.notifications import discussions_notifications
+from udata.features.notifications.actions import get_notifications
 from udata.core.discussions.signals import (
     on_new_discussion, on_new_discussion_comment,
     on_discussion_closed, on_discussion_deleted,
@@ -516,3 +517,31 @@ class DiscussionsNotificationsTest(TestCase, DBTestMixin):
             self.assertEqual(details['title'], discussion.title)
             self.assertEqual(details['subject']['id'], discussion.subject.id)
             self.assertEqual(details['subject']['type'], 'dataset')
+
+    def test_org_discussions_inbox(self):
+        recipient = UserFactory()
+        member = Member(user=recipient, role='editor')
+        org = OrganizationFactory(members=[member])
+        dataset = DatasetFactory(organization=org)
+        self.assertEqual(get_notifications(recipient), [])
+
+        user = UserFactory()
+        message = Message(content=faker.sentence(), posted_by=user)
+        discussion = Discussion.objects.create(
+            subject=dataset,
+            user=user,
+            title=faker.sentence(),
+            discussion=[message]
+        )
+        on_new_discussion.send(discussion)
+
+        notifications = get_notifications(recipient)
+        self.assertEqual(len(notifications), 1)
+        details = notifications[0]['details']
+        self.assertEqual(details['id'], discussion.id)
+        self.assertEqual(details['title'], discussion.title)
+        self.assertEqual(details['subject'], {'id': dataset.id, 'type': 'dataset'})
+
+        on_discussion_closed.send(discussion, message=0)
+
+        self.assertEqual(get_notifications(recipient), [])
@@ -0,0 +1,56 @@
+import pytest
+
+from udata import entrypoints
+
+
+class FakeEntrypoint(object):
+    def __init__(self, name):
+        self.name = name
+        self.loads = 0
+
+    def load(self):
+        self.loads += 1
+        return type(self.name, (object, ), {})
+
+
+@pytest.fixture
+def eps(app, mocker):
+    app.config['PLUGINS'] = ['first', 'second']
+    eps = [FakeEntrypoint(name) for name in ('first', 'second', 'disabled')]
+    mocker.patch('udata.entrypoints.iter_all', return_value=eps)
+    entrypoints.reload()
+    yield eps
+    entrypoints.reload()
+
+
+class EntrypointsRegistryTest:
+    def test_get_enabled(self, app, eps):
+        enabled = entrypoints.get_enabled('udata.test', app)
+
+        assert sorted(enabled) == ['first', 'second']
+        assert enabled['first'].name == 'first'
+
+    def test_loaded_once(self, app, eps):
+        first = entrypoints.get_enabled('udata.test', app)
+        # Returned values can safely be altered
+        first.pop('first')
+        second = entrypoints.get_enabled('udata.test', app)
+
+        assert sorted(second) == ['first', 'second']
+        assert [ep.loads for ep in eps] == [1, 1, 0]
+        assert entrypoints.get_plugin_module('udata.test', app, 'second') is second['second']
+        assert entrypoints.get_plugin_module('udata.test', app, 'disabled') is None
+
+    def test_reload(self, app, eps):
+        entrypoints.get_enabled('udata.test', app)
+
+        entrypoints.reload()
+        entrypoints.get_enabled('udata.test', app)
+
+        assert [ep.loads for ep in eps] == [2, 2, 0]
+
+    def test_registry_by_enabled_plugins(self, app, eps):
+        entrypoints.get_enabled('udata.test', app)
+        app.config['PLUGINS'] = ['first']
+
+        assert list(entrypoints.get_enabled('udata.test', app)) == ['first']
@@ -0,0 +1,81 @@
+import pytest
+
+from flask import render_template_string
+
+from udata import mail
+from udata.core.user.factories import UserFactory
+from udata.tests.helpers import capture_mails
+
+
+@pytest.mark.usefixtures('clean_db')
+@pytest.mark.frontend
+class MailSendTest:
+    def test_send_once_by_recipient(self, app):
+        users = UserFactory.create_batch(3)
+
+        with capture_mails() as mails:
+            mail.send('Test', users, 'test')
+
+        assert [m.recipients for m in mails] == [[u.email] for u in users]
+        for user, message in zip(users, mails):
+            assert 'Hi {0}'.format(user.first_name) in message.body
+            assert 'Hi {0}'.format(user.first_name) in message.html
+
+    def test_render_once_by_language(self, app, mocker):
+        app.config['LANGUAGES'] = {'en': 'English', 'fr': 'Français'}
+        users = UserFactory.create_batch(2) + UserFactory.create_batch(2, prefered_language='fr')
+        render = mocker.spy(mail, 'render_template')
+
+        with capture_mails() as mails:
+            mail.send('Test', users, 'test')
+
+        assert len(mails) == 4
+        # One text and one html template by language
+        assert render.call_count == 4
+
+    def test_escape_recipient_in_html(self, app):
+        users = [UserFactory(first_name='<b>John</b>'), UserFactory()]
+
+        with capture_mails() as mails:
+            mail.send('Test', users, 'test')
+
+        assert 'Hi <b>John</b>' in mails[0].body
+        assert 'Hi &lt;b&gt;John&lt;/b&gt;' in mails[0].html
+
+    def test_render_by_recipient_on_unknown_field(self, app, mocker):
+        users = UserFactory.create_batch(2)
+        render = mocker.patch('udata.mail.render_template')
+
+        def fake_render(template, recipient, **kwargs):
+            return str(recipient.id)
+        render.side_effect = fake_render
+
+        with capture_mails() as mails:
+            mail.send('Test', users, 'test')
+
+        assert [m.body for m in mails] == [str(u.id) for u in users]
+
+
+@pytest.mark.parametrize('source', [
+    '{{ recipient.first_name|title }}',
+    '{{ recipient.first_name|upper }}',
+    '{{ recipient.first_name|lower }}',
+    '{{ recipient.first_name|capitalize }}',
+    '{{ recipient.first_name|truncate(8, True, "") }}',
+    '{% if recipient.last_name %}{{ recipient.last_name }}{% else %}none{% endif %}',
+    '{{ recipient == owner }}',
+    '{{ recipient.id }}',
+])
+def test_render_by_recipient_on_unsupported_usage(app, mocker, source):
+    users = [
+        UserFactory.build(first_name='john Jim', last_name='doe'),
+        UserFactory.build(first_name='jane', last_name=''),
+    ]
+    render = mocker.patch('udata.mail.render_template')
+    render.side_effect = lambda template, **context: render_template_string(source, **context)
+
+    renderer = mail.renderer('test.txt', users, owner=users[0])
+
+    assert [renderer(user) for user in users] == [
+        render_template_string(source, recipient=user, owner=users[0]) for user in users
+    ]
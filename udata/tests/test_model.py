@@ -8,6 +8,7 @@ from mongoengine.fields import BaseField
 
 from udata.settings import Defaults
 from udata.models import db, Dataset, validate_config, build_test_config
+from udata.models import slug_fields
 from udata.errors import ConfigError
 from udata.tests.helpers import assert_json_equal, assert_equal_dates
 
@@ -171,6 +172,24 @@ class SlugFieldTest:
         obj.save()
         assert obj.slug == 'a-title'
 
+    def test_unchanged_loaded_document_is_not_reloaded(self, mocker):
+        '''SlugField should not fetch the stored document if nothing changed'''
+        SlugUpdateTester.objects.create(title='A Title')
+        obj = SlugUpdateTester.objects.first()
+        get_previous = mocker.spy(slug_fields, 'get_previous')
+        obj.save()
+        assert obj.slug == 'a-title'
+        assert not get_previous.called
+
+    def test_loaded_document_changed_source(self):
+        '''SlugField should update a loaded document slug on source change'''
+        SlugUpdateTester.objects.create(title='A Title')
+        obj = SlugUpdateTester.objects.first()
+        obj.title = 'Title'
+        obj.save()
+        assert obj.slug == 'title'
+        assert SlugUpdateTester.objects.get(id=obj.id).slug == 'title'
+
     def test_changed_no_update(self):
         '''SlugField should not update slug if update=False'''
         obj = SlugTester(title="A Title")
@@ -193,6 +212,28 @@ class SlugFieldTest:
         inherited = InheritedSlugTester.objects.create(title='title')
         assert obj.slug != inherited.slug
 
+    def test_multiple_collisions(self):
+        '''SlugField should find the first free suffix'''
+        slugs = [SlugTester.objects.create(title='title').slug for _ in range(4)]
+        assert slugs == ['title', 'title-1', 'title-2', 'title-3']
+
+    def test_reuse_free_suffix(self):
+        '''SlugField should reuse a freed suffix'''
+        SlugTester.objects.create(title='title')
+        SlugTester.objects.create(title='title').delete()
+        SlugTester.objects.create(title='title-2')
+        obj = SlugTester.objects.create(title='title')
+        assert obj.slug == 'title-1'
+
+    def test_collision_ignore_similar_slugs(self):
+        '''SlugField should only consider numeric suffixes of the same slug'''
+        SlugTester.objects.create(title='title')
+        SlugTester.objects.create(title='title 2')
+        SlugTester.objects.create(title='title other')
+        SlugTester.objects.create(title='a title')
+        obj = SlugTester.objects.create(title='title')
+        assert obj.slug == 'title-1'
+
     def test_crop(self):
         '''SlugField should truncate itself on save if not set'''
         obj = SlugTester(title='x' * (SlugTester.slug.max_length + 1))
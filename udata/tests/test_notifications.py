@@ -1,9 +1,19 @@
-from datetime import datetime
+import mock
+
+from datetime import datetime, timedelta
 
 from flask import url_for
 
 from udata.features.notifications import actions
+from udata.features.notifications.models import Inbox
+from udata.core.dataset.factories import DatasetFactory
+from udata.core.organization.factories import OrganizationFactory
 from udata.core.user.factories import UserFactory
+from udata.models import Member, Role
+# Load the notifications signals handlers
+import udata.core.discussions.notifications  # noqa
+import udata.core.organization.notifications  # noqa
+import udata.harvest.notifications  # noqa
 
 from . import TestCase, DBTestMixin
 from .api import APITestCase
@@ -47,6 +57,181 @@ class NotificationsActionsTest(NotificationsMixin, TestCase, DBTestMixin):
         self.assertEqualDates(notifs[0]['created_on'], dt)
 
 
+class InboxTest(NotificationsMixin, TestCase, DBTestMixin):
+    def test_inbox_built_on_first_read(self):
+        dt = datetime.now()
+        calls = []
+
+        @actions.notifier('fake')
+        def fake_provider(user):
+            calls.append(user)
+            return [(dt, {'id': 1})]
+
+        user = UserFactory()
+        self.assertEqual(len(actions.get_notifications(user)), 1)
+        self.assertEqual(len(actions.get_notifications(user)), 1)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(Inbox.objects(user=user).count(), 1)
+
+    def test_notify_and_clear(self):
+        dt = datetime.now()
+        user, other, unbuilt = UserFactory.create_batch(3)
+        actions.get_notifications(user)
+        actions.get_notifications(other)
+
+        actions.notify('fake', [user, unbuilt], dt, {'id': 1, 'some': 'value'})
+        actions.notify('fake', [user], dt, {'id': 1, 'some': 'other'})
+        actions.notify('fake', [user], dt, {'id': 2})
+
+        notifs = actions.get_notifications(user)
+        self.assertEqual(len(notifs), 2)
+        self.assertEqual(notifs[0]['type'], 'fake')
+        self.assertEqual(notifs[0]['details'], {'id': 1, 'some': 'other'})
+        self.assertEqualDates(notifs[0]['created_on'], dt)
+        self.assertEqual(actions.get_notifications(other), [])
+        # Missing inboxes are built on first read
+        self.assertEqual(Inbox.objects(user=unbuilt).count(), 0)
+
+        actions.clear('fake', 1)
+
+        notifs = actions.get_notifications(user)
+        self.assertEqual(len(notifs), 1)
+        self.assertEqual(notifs[0]['details'], {'id': 2})
+
+    def test_invalidate(self):
+        dt = datetime.now()
+        results = [(dt, {'id': 1})]
+
+        @actions.notifier('fake')
+        def fake_provider(user):
+            return list(results)
+
+        user = UserFactory()
+        actions.get_notifications(user)
+        results.append((dt, {'id': 2}))
+        self.assertEqual(len(actions.get_notifications(user)), 1)
+
+        actions.invalidate([user])
+
+        self.assertEqual(len(actions.get_notifications(user)), 2)
+
+    def test_expired_inbox_is_rebuilt(self):
+        calls = []
+
+        @actions.notifier('fake')
+        def fake_provider(user):
+            calls.append(user)
+            return []
+
+        user = UserFactory()
+        actions.get_notifications(user)
+        duration = self.app.config['NOTIFICATIONS_INBOX_DURATION']
+        Inbox.objects(user=user).update(
+            built_at=datetime.now() - timedelta(seconds=duration + 1))
+
+        actions.get_notifications(user)
+
+        self.assertEqual(len(calls), 2)
+
+    @mock.patch('udata.features.notifications.tasks.rebuild_inbox.delay')
+    def test_expired_inbox_is_served_and_rebuilt_in_background(self, delay):
+        dt = datetime.now()
+        calls = []
+
+        @actions.notifier('fake')
+        def fake_provider(user):
+            calls.append(user)
+            return [(dt, {'id': 1})]
+
+        user = UserFactory()
+        for org in OrganizationFactory.create_batch(3):
+            org.members.append(Member(user=user, role='admin'))
+            org.save()
+        actions.get_notifications(user)
+        duration = self.app.config['NOTIFICATIONS_INBOX_DURATION']
+        Inbox.objects(user=user).update(
+            built_at=datetime.now() - timedelta(seconds=duration + 1))
+
+        self.assertEqual(len(actions.get_notifications(user)), 1)
+        self.assertEqual(len(actions.get_notifications(user)), 1)
+
+        # Providers are not run on read, a single rebuild is requested
+        self.assertEqual(len(calls), 1)
+        delay.assert_called_once_with(str(user.id))
+
+    def test_event_during_build_is_kept(self):
+        dt = datetime.now()
+        results = [(dt, {'id': 1})]
+
+        @actions.notifier('fake')
+        def fake_provider(user):
+            if len(results) == 1:
+                # A notification is sent while the inbox is being built
+                results.append((dt, {'id': 2}))
+                actions.notify('fake', [user], dt, {'id': 2})
+                return results[:1]
+            return list(results)
+
+        user = UserFactory()
+
+        self.assertEqual(len(actions.get_notifications(user)), 2)
+        self.assertEqual(len(Inbox.objects.get(user=user).notifications), 2)
+
+    def test_clear_during_build_is_kept(self):
+        dt = datetime.now()
+        results = [(dt, {'id': 1}), (dt, {'id': 2})]
+
+        @actions.notifier('fake')
+        def fake_provider(user):
+            current = list(results)
+            if len(results) == 2:
+                results.pop()
+                actions.clear('fake', 2)
+            return current
+
+        user = UserFactory()
+
+        self.assertEqual(len(actions.get_notifications(user)), 1)
+        self.assertEqual(len(Inbox.objects.get(user=user).notifications), 1)
+
+    def test_invalidated_on_owner_change(self):
+        user, new_owner = UserFactory.create_batch(2)
+        member = UserFactory()
+        org = OrganizationFactory(members=[Member(user=member, role='admin')])
+        dataset = DatasetFactory(owner=user)
+        for u in (user, new_owner, member):
+            actions.get_notifications(u)
+
+        dataset.organization = org
+        dataset.save()
+
+        self.assertEqual(Inbox.objects(user=user).count(), 0)
+        self.assertEqual(Inbox.objects(user=member).count(), 0)
+        self.assertEqual(Inbox.objects(user=new_owner).count(), 1)
+
+    def test_invalidated_on_organization_deletion(self):
+        member, other = UserFactory.create_batch(2)
+        org = OrganizationFactory(members=[Member(user=member)])
+        actions.get_notifications(member)
+        actions.get_notifications(other)
+
+        org.deleted = datetime.now()
+        org.save()
+
+        self.assertEqual(Inbox.objects(user=member).count(), 0)
+        self.assertEqual(Inbox.objects(user=other).count(), 1)
+
+    def test_invalidated_on_roles_change(self):
+        user = UserFactory()
+        actions.get_notifications(user)
+
+        user.roles = [Role.objects.create(name='admin')]
+        user.save()
+
+        self.assertEqual(Inbox.objects(user=user).count(), 0)
+
+
 class NotificationsAPITest(NotificationsMixin, APITestCase):
     def test_no_notifications(self):
         self.login()
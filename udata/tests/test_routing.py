@@ -8,7 +8,8 @@ from flask import url_for
 from udata import routing
 from udata.core.spatial.models import GeoZone
 from udata.core.spatial.factories import GeoZoneFactory
-from udata.models import db
+from udata.models import db, identity_map
+from udata.models.identity_map import slug_cache
 from udata.models.slug_fields import SlugFollow
 from udata.tests.helpers import assert200, assert404, assert_redirects
 
@@ -278,6 +279,77 @@ class SlugAsSLugFieldWithFollowTest(AsSlugMixin):
         assert SlugFollow.objects.count() is 0
 
 
+class ReferenceTester(db.Document):
+    target = db.ReferenceField(SlugTester)
+
+
+@pytest.mark.usefixtures('clean_db')
+class IdentityMapTest:
+    @pytest.fixture(autouse=True)
+    def setup(self, app):
+        slug_cache.clear()
+        app.url_map.converters['tester'] = SlugTesterConverter
+
+        @app.route('/model/<tester:model>')
+        def model_tester(model):
+            assert identity_map.get(SlugTester, id=model.id) is model
+            assert identity_map.get(SlugTester, slug=model.slug) is model
+            return str(model.id)
+
+    def test_converter_register_in_identity_map(self, client):
+        tester = SlugTester.objects.create(slug='slug')
+        assert200(client.get(url_for('model_tester', model=tester)))
+
+    def test_converter_fill_slug_cache(self, client):
+        tester = SlugTester.objects.create(slug='slug')
+        assert200(client.get('/model/slug'))
+        assert slug_cache.get(SlugTester, 'slug') == tester.id
+
+    def test_slug_cache_invalidated_on_slug_change(self, client):
+        tester = SlugTester.objects.create(slug='old')
+        assert200(client.get('/model/old'))
+
+        tester.slug = 'new'
+        tester.save()
+
+        assert slug_cache.get(SlugTester, 'old') is None
+        assert404(client.get('/model/old'))
+
+    def test_stale_slug_cache_is_ignored(self, client):
+        tester = SlugTester.objects.create(slug='old')
+        slug_cache.set(SlugTester, 'old', tester.id)
+        # Bypass the slug population
+        SlugTester.objects(id=tester.id).update(slug='new')
+
+        assert404(client.get('/model/old'))
+        assert slug_cache.get(SlugTester, 'old') is None
+
+    def test_dereference_from_identity_map(self, app):
+        target = SlugTester.objects.create(slug='slug')
+        reference = ReferenceTester.objects.create(target=target)
+        reference = ReferenceTester.objects.get(id=reference.id)
+        with app.test_request_context('/'):
+            identity_map.start()
+            identity_map.register(target)
+            assert reference.target is target
+
+    def test_dereference_register_in_identity_map(self, app):
+        target = SlugTester.objects.create(slug='slug')
+        reference = ReferenceTester.objects.create(target=target)
+        reference = ReferenceTester.objects.get(id=reference.id)
+        with app.test_request_context('/'):
+            identity_map.start()
+            dereferenced = reference.target
+            assert identity_map.get(SlugTester, id=target.id) is dereferenced
+
+    def test_no_identity_map_outside_requests(self):
+        target = SlugTester.objects.create(slug='slug')
+        reference = ReferenceTester.objects.create(target=target)
+        reference = ReferenceTester.objects.get(id=reference.id)
+        assert reference.target == target
+        assert reference.target is not target
+
+
 @pytest.mark.usefixtures('clean_db')
 @pytest.mark.options(TERRITORY_DEFAULT_PREFIX='fr')  # Not implemented
 class TerritoryConverterTest:
@@ -53,6 +53,18 @@ class StorageUtilsTest:
         expected = 'CA975130'  # Output of cksfv
         assert utils.crc32(self.file) == expected
 
+    def test_copy_with_digests(self):
+        out = BytesIO()
+        digests = utils.Digests('sha1', 'md5')
+        utils.copy(self.file, out, digests, buffer_size=1000)
+
+        assert out.getvalue() == b'a' * 2 * (2 ** 16)
+        assert digests.size == 2 * (2 ** 16)
+        assert digests.hexdigests() == {
+            'sha1': 'ce5653590804baa9369f72d483ed9eba72f04d29',
+            'md5': '81615449a98aaaad8dc179b3bec87f38',
+        }
+
     def test_mime(self):
         assert utils.mime('test.txt') == 'text/plain'
         assert utils.mime('test') is None
@@ -167,6 +179,7 @@ class StorageUploadViewTest:
         assert 'size' in response.json
         assert response.json['size'] == parts
         assert 'sha1' in response.json
+        assert response.json['sha1'] == '70c881d4a26984ddce795f6f71817c9cf4480e79'
         expected_filename = 'test-with-spaces.txt'
         filename = response.json['filename']
         assert filename.endswith(expected_filename)
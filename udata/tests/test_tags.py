@@ -9,6 +9,8 @@ from udata.frontend import csv
 from udata.tests.helpers import assert200
 from udata.core.dataset.factories import DatasetFactory
 from udata.core.reuse.factories import ReuseFactory
+from udata.app import cache
+from udata.core.tags import suggest
 from udata.core.tags.models import Tag
 from udata.core.tags.tasks import count_tags
 from udata.tags import tags_list, normalize, slug
@@ -20,7 +22,7 @@ MAX_TAG_LENGTH = 32
 
 
 @pytest.mark.frontend
-class TagsTests:
+class TagsTest:
     modules = ['core.tags']
 
     def test_csv(self, client):
@@ -44,7 +46,7 @@ class TagsTests:
         assert rows[1] == ['datasets-only', '15', '0', '15']
         assert rows[2] == ['reuses-only', '0', '10', '10']
 
-    def test_count(self):
+    def test_count(self, app):
         for i in range(1, 4):
             # Tags should be normalized and deduplicated.
             tags = ['Tag "{0}"'.format(j) for j in range(i)] + ['tag-0']
@@ -67,6 +69,102 @@ class TagsTests:
             assert tag.counts['datasets'] == count
             assert tag.counts['reuses'] == count
 
+    def test_count_removes_stale_tags(self, app):
+        Tag.objects.create(name='stale', counts={'datasets': 3})
+        DatasetFactory(tags=['fresh'])
+
+        count_tags.run()
+
+        assert Tag.objects.get(name='fresh').counts == {'datasets': 1}
+        assert Tag.objects(name='stale').count() == 0
+
+    def test_count_incremental(self, app):
+        dataset = DatasetFactory(tags=['old', 'partially-removed'])
+        DatasetFactory(tags=['partially-removed'])
+        count_tags.run()
+
+        # Not touched since last run
+        Tag.objects(name='old').update(set__counts={'datasets': 42}, set__total=42)
+        dataset.tags = ['old', 'new']
+        dataset.save()
+        ReuseFactory(tags=['new'])
+
+        count_tags.run(incremental='true')
+
+        assert Tag.objects.get(name='new').counts == {'datasets': 1, 'reuses': 1}
+        assert Tag.objects.get(name='new').total == 2
+        assert Tag.objects.get(name='partially-removed').counts == {'datasets': 1}
+        assert Tag.objects.get(name='old').counts == {'datasets': 42}
+
+    def test_count_incremental_without_touched_tags(self, app):
+        DatasetFactory(tags=['tag'])
+        count_tags.run()
+        Tag.objects(name='tag').update(set__counts={'datasets': 42}, set__total=42)
+
+        count_tags.run(incremental='true')
+
+        assert Tag.objects.get(name='tag').total == 42
+
+    def test_count_incremental_removes_unused_tags(self, app):
+        dataset = DatasetFactory(tags=['kept', 'removed'])
+        count_tags.run()
+
+        dataset.tags = ['kept']
+        dataset.save()
+
+        count_tags.run(incremental='true')
+
+        assert Tag.objects.get(name='kept').counts == {'datasets': 1}
+        assert Tag.objects(name='removed').count() == 0
+
+
+@pytest.mark.usefixtures('clean_db')
+class TagSuggestIndexTest:
+    @pytest.fixture(autouse=True)
+    def dirty_index(self):
+        suggest.index.mark_dirty()
+
+    def test_rank_by_popularity(self):
+        Tag.objects.create(name='test-rare', counts={'datasets': 1})
+        Tag.objects.create(name='test', counts={'datasets': 10})
+        Tag.objects.create(name='testing', counts={'datasets': 5})
+        Tag.objects.create(name='other', counts={'datasets': 100})
+
+        assert suggest.suggest('tes') == ['test', 'testing', 'test-rare']
+        assert suggest.suggest('tes', size=2) == ['test', 'testing']
+        assert suggest.suggest('unknown') == []
+        assert suggest.suggest('') == []
+
+    def test_match_words_prefixes(self):
+        Tag.objects.create(name='open-data', counts={'datasets': 2})
+        Tag.objects.create(name='data', counts={'datasets': 1})
+
+        assert suggest.suggest('dat') == ['open-data', 'data']
+        assert suggest.suggest('Open Da') == ['open-data']
+        assert suggest.suggest('ata') == []
+
+    def test_long_terms(self):
+        Tag.objects.create(name='environnement', counts={'datasets': 2})
+        Tag.objects.create(name='environnemental', counts={'datasets': 1})
+
+        assert suggest.suggest('environneme') == ['environnement', 'environnemental']
+        assert suggest.suggest('environnementa') == ['environnemental']
+
+    def test_rebuild_on_version_change(self, app):
+        app.config['CACHE_TYPE'] = 'simple'
+        cache.init_app(app)
+        tag = Tag.objects.create(name='lyon', counts={'datasets': 1})
+        assert suggest.suggest('lyon') == ['lyon']
+
+        tag.delete()
+        Tag.objects.create(name='marseille', counts={'datasets': 1})
+        suggest.invalidate()
+        suggest.index.dirty = False
+        suggest.index.checked_at = 0
+
+        assert suggest.suggest('lyon') == []
+        assert suggest.suggest('marseille') == ['marseille']
+
 
 class TagsUtilsTest:
 